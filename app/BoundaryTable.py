@@ -0,0 +1,29 @@
+class BoundaryTable:
+    # keeps the boundary of the region in temporary tables of the database session, so that queries join against it
+    # instead of parsing and transforming its WKT each - the boundary is kept as a whole in transnet_boundary and
+    # subdivided into indexed parts of few vertices in transnet_boundary_parts, against which intersection tests
+    # are cheap
+    def __init__(self):
+        pass
+
+    # loads the boundary given in EPSG:4269 into the tables, replacing a boundary loaded before
+    # cur - cursor of the database connection the queries of the region are run with
+    @staticmethod
+    def load(cur, boundary):
+        cur.execute('''DROP TABLE IF EXISTS transnet_boundary, transnet_boundary_parts;
+                    CREATE TEMPORARY TABLE transnet_boundary AS
+                      SELECT st_transform(st_geomfromtext(%s, 4269), 3857) AS way;
+                    CREATE TEMPORARY TABLE transnet_boundary_parts AS
+                      SELECT ST_Subdivide(way, 256) AS way FROM transnet_boundary;
+                    CREATE INDEX ON transnet_boundary_parts USING gist (way);
+                    ANALYZE transnet_boundary_parts;''', [boundary.wkt])
+
+    # returns the condition that the geometry column intersects the boundary
+    @staticmethod
+    def intersects(column):
+        return 'EXISTS (SELECT 1 FROM transnet_boundary_parts b WHERE st_intersects(%s, b.way))' % column
+
+    # returns the condition that the geometry column lies within the boundary
+    @staticmethod
+    def within(column):
+        return 'st_within(%s, (SELECT way FROM transnet_boundary))' % column
@@ -0,0 +1,97 @@
+import math
+import random
+import unittest
+
+from shapely.geometry import LineString, Point, Polygon, box
+
+from BoundaryTable import BoundaryTable
+
+
+class BoundaryTableUnitTest(unittest.TestCase):
+    # records the statements instead of running them
+    class FakeCursor:
+        def __init__(self):
+            self.statements = []
+
+        def execute(self, sql, params=None):
+            self.statements.append((sql, params))
+
+    # splits the polygon along the middle of the longer side of its bounds until each part has at most max_vertices
+    # vertices, as ST_Subdivide does
+    @staticmethod
+    def subdivide(polygon, max_vertices):
+        vertices = len(polygon.exterior.coords) + sum(len(ring.coords) for ring in polygon.interiors)
+        if vertices <= max_vertices:
+            return [polygon]
+        (min_x, min_y, max_x, max_y) = polygon.bounds
+        if max_x - min_x >= max_y - min_y:
+            halves = [box(min_x, min_y, (min_x + max_x) / 2, max_y), box((min_x + max_x) / 2, min_y, max_x, max_y)]
+        else:
+            halves = [box(min_x, min_y, max_x, (min_y + max_y) / 2), box(min_x, (min_y + max_y) / 2, max_x, max_y)]
+        parts = []
+        for half in halves:
+            clipped = polygon.intersection(half)
+            for part in getattr(clipped, 'geoms', [clipped]):
+                if isinstance(part, Polygon) and not part.is_empty:
+                    parts.extend(BoundaryTableUnitTest.subdivide(part, max_vertices))
+        return parts
+
+    # a boundary of many vertices with a hole, as of a country around an enclave
+    @staticmethod
+    def create_boundary():
+        angles = [2 * math.pi * i / 400 for i in range(400)]
+        shell = [(10 + (1 + 0.3 * math.sin(7 * a)) * math.cos(a), 50 + (1 + 0.3 * math.sin(7 * a)) * math.sin(a))
+                 for a in angles]
+        hole = [(10.2 + 0.2 * math.cos(a), 50.1 + 0.2 * math.sin(a)) for a in angles[::8]]
+        return Polygon(shell, [hole])
+
+    # the semi join of intersects over the parts selects the rows st_intersects against the whole boundary did
+    def test_intersects_parts(self):
+        boundary = BoundaryTableUnitTest.create_boundary()
+        parts = BoundaryTableUnitTest.subdivide(boundary, 16)
+        self.assertGreater(len(parts), 20)
+        self.assertAlmostEqual(boundary.area, sum(part.area for part in parts))
+        generator = random.Random(1)
+        geometries = [boundary.exterior, Point(boundary.exterior.coords[0]), Point(10.2, 50.1)]
+        for i in range(2000):
+            (x, y) = (generator.uniform(8.5, 11.5), generator.uniform(48.5, 51.5))
+            length = generator.uniform(0, 0.3)
+            geometries.append(LineString([(x, y), (x + length, y + generator.uniform(-length, length))]))
+            geometries.append(Point(x, y))
+            geometries.append(box(x, y, x + length, y + length))
+        intersecting = [g.intersects(boundary) for g in geometries]
+        self.assertTrue(any(intersecting))
+        self.assertFalse(all(intersecting))
+        self.assertEqual(intersecting, [any(g.intersects(part) for part in parts) for g in geometries])
+
+    # within takes the whole boundary, as a geometry within it may span several parts without being within any
+    def test_within_whole_boundary(self):
+        boundary = BoundaryTableUnitTest.create_boundary()
+        parts = BoundaryTableUnitTest.subdivide(boundary, 16)
+        station = box(9.4, 49.9, 9.6, 50.1)
+        self.assertTrue(station.within(boundary))
+        self.assertFalse(any(station.within(part) for part in parts))
+
+    def test_load(self):
+        cur = BoundaryTableUnitTest.FakeCursor()
+        boundary = box(10.0, 50.0, 11.0, 51.0)
+        BoundaryTable.load(cur, boundary)
+        self.assertEqual(1, len(cur.statements))
+        (sql, params) = cur.statements[0]
+        # the WKT is passed as parameter instead of being formatted into the statement
+        self.assertEqual([boundary.wkt], params)
+        self.assertNotIn(boundary.wkt, sql)
+        self.assertEqual(1, sql.count('%s'))
+        self.assertIn('DROP TABLE IF EXISTS transnet_boundary, transnet_boundary_parts', sql)
+        self.assertIn('ST_Subdivide(way, 256)', sql)
+        self.assertIn('CREATE INDEX ON transnet_boundary_parts USING gist (way)', sql)
+        self.assertIn('ANALYZE transnet_boundary_parts', sql)
+
+    def test_conditions(self):
+        self.assertEqual('EXISTS (SELECT 1 FROM transnet_boundary_parts b WHERE st_intersects(l.way, b.way))',
+                         BoundaryTable.intersects('l.way'))
+        self.assertEqual('st_within(p.way, (SELECT way FROM transnet_boundary))', BoundaryTable.within('p.way'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+class CircuitDeduplicator:
+    # keeps track of the circuits seen so far by a canonical identity - the unordered pair of end stations, the
+    # voltage and the sequence of lines between them - so that a circuit found from both of its end stations, on
+    # several voltage levels or in several countries is only kept once, while parallel circuits are all kept
+    def __init__(self):
+        self.circuit_keys = set()
+
+    def __len__(self):
+        return len(self.circuit_keys)
+
+    # returns the canonical identity of the circuit, which is the same for the circuit in reverse direction
+    @staticmethod
+    def key(circuit):
+        station1_id = circuit.members[0].id
+        station2_id = circuit.members[-1].id
+        line_ids = tuple(line.id for line in circuit.members[1:-1])
+        reverse_line_ids = tuple(reversed(line_ids))
+        if (station2_id, reverse_line_ids) < (station1_id, line_ids):
+            return station2_id, station1_id, circuit.voltage, reverse_line_ids
+        return station1_id, station2_id, circuit.voltage, line_ids
+
+    # returns whether the circuit has not been seen before and remembers it
+    def add(self, circuit):
+        key = CircuitDeduplicator.key(circuit)
+        if key in self.circuit_keys:
+            return False
+        self.circuit_keys.add(key)
+        return True
+
+    # returns the circuits not seen before in their order, the first of duplicates within circuits is kept
+    def filter(self, circuits):
+        return [circuit for circuit in circuits if self.add(circuit)]
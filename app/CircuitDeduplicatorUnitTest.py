@@ -0,0 +1,48 @@
+import unittest
+
+from shapely.geometry import LineString, box
+
+from Circuit import Circuit
+from CircuitDeduplicator import CircuitDeduplicator
+from Line import Line
+from Station import Station
+
+
+class CircuitDeduplicatorUnitTest(unittest.TestCase):
+    @staticmethod
+    def create_station(_id):
+        geom = box(_id, 0, _id + 1, 1)
+        return Station(_id, geom, 'substation', None, None, '380000', None, None, geom.centroid.y,
+                       geom.centroid.x, None)
+
+    @staticmethod
+    def create_line(_id):
+        geom = LineString([(0, 0), (1, 0)])
+        return Line(_id, geom, 'line', None, None, '380000', '3', [1, 2], None, geom.centroid.y,
+                    geom.centroid.x, (0, 0, 1, 0), geom.length, None)
+
+    def setUp(self):
+        self.station12 = CircuitDeduplicatorUnitTest.create_station(12)
+        self.station345 = CircuitDeduplicatorUnitTest.create_station(345)
+        self.line1 = CircuitDeduplicatorUnitTest.create_line(1)
+        self.line2 = CircuitDeduplicatorUnitTest.create_line(2)
+
+    def test_reverse_circuit_is_duplicate(self):
+        circuit = Circuit([self.station12, self.line1, self.line2, self.station345], '380000', None, None)
+        reverse_circuit = Circuit([self.station345, self.line2, self.line1, self.station12], '380000', None, None)
+        circuit_deduplicator = CircuitDeduplicator()
+        self.assertEqual([circuit], circuit_deduplicator.filter([circuit, reverse_circuit]))
+        # duplicates are also recognized in later calls, e.g. of another voltage level or country
+        self.assertFalse(circuit_deduplicator.add(reverse_circuit))
+        self.assertEqual(1, len(circuit_deduplicator))
+
+    def test_distinct_circuits(self):
+        circuit = Circuit([self.station12, self.line1, self.station345], '380000', None, None)
+        parallel_circuit = Circuit([self.station12, self.line2, self.station345], '380000', None, None)
+        circuit_of_other_voltage = Circuit([self.station12, self.line1, self.station345], '220000', None, None)
+        circuits = [circuit, parallel_circuit, circuit_of_other_voltage]
+        self.assertEqual(circuits, CircuitDeduplicator().filter(circuits))
+
+
+if __name__ == '__main__':
+    unittest.main()
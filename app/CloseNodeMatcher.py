@@ -0,0 +1,49 @@
+import numpy as np
+from shapely.geometry import LinearRing
+
+
+class CloseNodeMatcher:
+    # matches line end points to the stations whose outline is within a geodesic distance
+    # station_index - StationIndex of the stations to match
+    # geod - pyproj.Geod used to measure the distances
+    def __init__(self, station_index, geod):
+        self.station_index = station_index
+        self.geod = geod
+
+    # returns a dict that maps the id of each node to the ids of the stations whose exterior ring is closer than
+    # distance meters to it - candidates are prefiltered by their bounding box, the remaining distances are
+    # measured with one batched geodesic computation
+    # nodes - dict of node ids to points
+    def match(self, nodes, distance):
+        node_ids = []
+        station_ids = []
+        touch_lons = []
+        touch_lats = []
+        node_lons = []
+        node_lats = []
+        rings = dict()
+        for (node_id, node) in nodes.items():
+            for station in self.station_index.stations_near(node, distance):
+                if station.id not in rings:
+                    rings[station.id] = LinearRing(station.geom.exterior.coords)
+                pol_ext = rings[station.id]
+                touch_node = pol_ext.interpolate(pol_ext.project(node))
+                node_ids.append(node_id)
+                station_ids.append(station.id)
+                touch_lons.append(touch_node.x)
+                touch_lats.append(touch_node.y)
+                node_lons.append(node.x)
+                node_lats.append(node.y)
+
+        close_station_ids = dict()
+        if not node_ids:
+            return close_station_ids
+        angles1, angles2, distances = self.geod.inv(np.array(touch_lons), np.array(touch_lats),
+                                                    np.array(node_lons), np.array(node_lats))
+        # a node on the exterior ring is not considered close, it intersects the station anyway
+        for index in np.flatnonzero((distances > 0) & (distances < distance)):
+            node_id = node_ids[index]
+            if node_id not in close_station_ids:
+                close_station_ids[node_id] = set()
+            close_station_ids[node_id].add(station_ids[index])
+        return close_station_ids
@@ -0,0 +1,37 @@
+import unittest
+
+import pyproj
+from shapely.geometry import Point, box
+
+from CloseNodeMatcher import CloseNodeMatcher
+from Station import Station
+from StationIndex import StationIndex
+
+
+class CloseNodeMatcherUnitTest(unittest.TestCase):
+    def setUp(self):
+        self.geod = pyproj.Geod(ellps='WGS84')
+        geom = box(10.0, 50.0, 10.01, 50.01)
+        self.station = Station(1, geom, 'substation', None, None, '380000', None, None, geom.centroid.y,
+                               geom.centroid.x, None)
+        self.matcher = CloseNodeMatcher(StationIndex({1: self.station}), self.geod)
+
+    # returns the point the distance in meters east of the east edge of the station
+    def east_of_station(self, distance):
+        (lon, lat, azimuth) = self.geod.fwd(10.01, 50.005, 90, distance)
+        return Point(lon, lat)
+
+    def test_distance_edges(self):
+        nodes = {1: Point(10.01, 50.005), 2: self.east_of_station(0.5), 3: self.east_of_station(49.9),
+                 4: self.east_of_station(50.1), 5: self.east_of_station(500)}
+        # a node on the outline of the station is not close, as it intersects the station
+        self.assertEqual({2: set([1]), 3: set([1])}, self.matcher.match(nodes, 50))
+        self.assertEqual({2: set([1]), 3: set([1]), 4: set([1])}, self.matcher.match(nodes, 50.2))
+
+    def test_no_candidates(self):
+        self.assertEqual(dict(), self.matcher.match(dict(), 50))
+        self.assertEqual(dict(), self.matcher.match({5: self.east_of_station(500)}, 50))
+
+
+if __name__ == '__main__':
+    unittest.main()
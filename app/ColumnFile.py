@@ -0,0 +1,68 @@
+import json
+from glob import glob
+from os.path import basename
+
+import numpy as np
+
+
+class ColumnFile:
+    # keeps the columns of a store in files of a directory - numpy arrays in .npy files, which are memory mapped
+    # instead of read when loaded, lists of strings, numbers and lists or dicts of them in .json files - neither
+    # runs any code of the files when loaded, unlike unpickling
+    def __init__(self):
+        pass
+
+    # writes the columns, a dict of numpy arrays and lists by name, to the files of the store of the name
+    @staticmethod
+    def save(directory, name, columns):
+        for (column, values) in columns.items():
+            path = '{0}/{1}.{2}'.format(directory, name, column)
+            if isinstance(values, np.ndarray):
+                np.save(path + '.npy', values, allow_pickle=False)
+            else:
+                with open(path + '.json', 'w') as column_file:
+                    json.dump(values, column_file)
+
+    # returns the columns of the files of the store of the name by column name, the arrays mapped read only
+    @staticmethod
+    def load(directory, name):
+        columns = dict()
+        for path in glob('{0}/{1}.*.npy'.format(directory, name)):
+            # the plain array of the mapping, as the memmap subclass makes slicing row by row several times slower
+            columns[basename(path)[len(name) + 1:-len('.npy')]] = np.asarray(
+                np.load(path, mmap_mode='r', allow_pickle=False))
+        for path in glob('{0}/{1}.*.json'.format(directory, name)):
+            with open(path) as column_file:
+                columns[basename(path)[len(name) + 1:-len('.json')]] = json.load(column_file)
+        return columns
+
+    # returns the values of a list of bytes packed into an array of bytes and the offsets of each value into it,
+    # value i is buffer[offsets[i]:offsets[i + 1]], empty for None
+    @staticmethod
+    def pack_bytes(values):
+        sizes = np.array([len(value) if value is not None else 0 for value in values], dtype=np.int64)
+        offsets = np.concatenate((np.zeros(1, dtype=np.int64), np.cumsum(sizes)))
+        buffer = np.frombuffer(b''.join(value for value in values if value is not None), dtype=np.uint8)
+        return buffer, offsets
+
+    # returns the bytes of value i of a buffer packed by pack_bytes, None if empty
+    @staticmethod
+    def unpack_bytes(buffer, offsets, i):
+        return ColumnFile.unpack_all(buffer, offsets, [i])[0]
+
+    # returns the list of bytes of the values of the rows of a buffer packed by pack_bytes, None if empty - the
+    # offsets are read as python ints and the buffer sliced as a memoryview, as indexing numpy per value is slow
+    @staticmethod
+    def unpack_all(buffer, offsets, rows):
+        rows = np.asarray(rows, dtype=np.intp)
+        data = memoryview(buffer)
+        return [data[start:end].tobytes() if end > start else None
+                for (start, end) in zip(offsets[rows].tolist(), offsets[rows + 1].tolist())]
+
+    # returns the values of a list of sequences of integers packed into an array and the offsets of each sequence
+    @staticmethod
+    def pack_ints(values):
+        sizes = np.array([len(value) for value in values], dtype=np.int64)
+        offsets = np.concatenate((np.zeros(1, dtype=np.int64), np.cumsum(sizes)))
+        packed = np.fromiter((x for value in values for x in value), dtype=np.int64, count=int(offsets[-1]))
+        return packed, offsets
@@ -0,0 +1,92 @@
+from LineIndex import LineIndex
+from StationIndex import StationIndex
+
+
+class ComponentPartitioner:
+    # partitions the lines and stations of one region and voltage level into the connected components of the line
+    # graph - a circuit never leaves the component of its start line, so components can be inferred independently
+    # stations - dict of all stations of the region and voltage level
+    # lines - dict of all lines of the region and voltage level
+    # close_nodes - whether lines starting close to a station are connected to it
+    def __init__(self, stations, lines, close_nodes):
+        self.stations = stations
+        self.lines = lines
+        self.close_nodes = close_nodes
+        self.parents = dict()
+
+    def find(self, line_id):
+        parent = self.parents[line_id]
+        while parent != line_id:
+            # path halving
+            self.parents[line_id] = self.parents[parent]
+            line_id = parent
+            parent = self.parents[line_id]
+        return line_id
+
+    def union(self, line_id1, line_id2):
+        root1 = self.find(line_id1)
+        root2 = self.find(line_id2)
+        if root1 != root2:
+            self.parents[root2] = root1
+
+    # returns the components as list of (stations, lines) dicts, both in the iteration order of the given dicts
+    # lines are connected if they share an OSM node or one ends on the other, i.e. whenever the inference may
+    # continue from one to the other - a station belongs to every component with a line ending at or close to it
+    def components(self):
+        self.parents = dict((line_id, line_id) for line_id in self.lines)
+        line_index = LineIndex(self.lines)
+        for line in self.lines.values():
+            for node_id in [line.first_node(), line.last_node()]:
+                for adjacent_line in line_index.lines_at(node_id, line.end_point(node_id)):
+                    self.union(line.id, adjacent_line.id)
+
+        station_index = StationIndex(self.stations)
+        component_ids_by_station = dict()
+        for line in self.lines.values():
+            for node in [line.end_point(line.first_node()), line.end_point(line.last_node())]:
+                # the bounding box of close nodes is a superset of the stations within 50 meters
+                touching_stations = station_index.stations_near(node, 50) if self.close_nodes \
+                    else station_index.intersecting_stations(node)
+                for station in touching_stations:
+                    if station.id not in component_ids_by_station:
+                        component_ids_by_station[station.id] = set()
+                    component_ids_by_station[station.id].add(self.find(line.id))
+
+        components = dict()
+        order = []
+        for (line_id, line) in self.lines.items():
+            component_id = self.find(line_id)
+            if component_id not in components:
+                components[component_id] = (dict(), dict())
+                order.append(component_id)
+            components[component_id][1][line_id] = line
+        for (station_id, station) in self.stations.items():
+            for component_id in component_ids_by_station.get(station_id, []):
+                components[component_id][0][station_id] = station
+        return [components[component_id] for component_id in order]
+
+    # groups the components into at most num_batches batches of about the same number of lines, each given as
+    # (stations, lines) dicts in the iteration order of the given dicts
+    def batches(self, num_batches):
+        components = self.components()
+        batch_sizes = [0] * min(num_batches, len(components))
+        batch_by_line_id = dict()
+        batches_by_station_id = dict()
+        # the largest components first, each to the smallest batch
+        for (component_stations, component_lines) in sorted(components, key=lambda c: len(c[1]), reverse=True):
+            batch = batch_sizes.index(min(batch_sizes))
+            batch_sizes[batch] += len(component_lines)
+            for line_id in component_lines:
+                batch_by_line_id[line_id] = batch
+            for station_id in component_stations:
+                if station_id not in batches_by_station_id:
+                    batches_by_station_id[station_id] = set()
+                batches_by_station_id[station_id].add(batch)
+
+        batches = [(dict(), dict()) for _ in batch_sizes]
+        for (line_id, line) in self.lines.items():
+            batches[batch_by_line_id[line_id]][1][line_id] = line
+        for (station_id, station) in self.stations.items():
+            for batch in batches_by_station_id.get(station_id, []):
+                batches[batch][0][station_id] = station
+        return batches
@@ -0,0 +1,57 @@
+import unittest
+
+from shapely.geometry import LineString, box
+
+from ComponentPartitioner import ComponentPartitioner
+from Line import Line
+from Station import Station
+
+
+class ComponentPartitionerUnitTest(unittest.TestCase):
+    @staticmethod
+    def create_station(_id, geom):
+        return Station(_id, geom, 'substation', None, None, '380000', None, None, geom.centroid.y,
+                       geom.centroid.x, None)
+
+    @staticmethod
+    def create_line(_id, nodes, coordinates):
+        geom = LineString(coordinates)
+        return Line(_id, geom, 'line', None, None, '380000', '3', nodes, None, geom.centroid.y,
+                    geom.centroid.x, coordinates[0] + coordinates[-1], geom.length, None)
+
+    def test_components(self):
+        station1 = ComponentPartitionerUnitTest.create_station(1, box(-1, -1, 1, 1))
+        station2 = ComponentPartitionerUnitTest.create_station(2, box(9, -1, 11, 1))
+        station3 = ComponentPartitionerUnitTest.create_station(3, box(9, 19, 11, 21))
+        stations = {station1.id: station1, station2.id: station2, station3.id: station3}
+        # lines 10 and 11 share node 101, line 12 ends on line 11 without sharing a node
+        line10 = ComponentPartitionerUnitTest.create_line(10, [100, 101], [(0, 0), (5, 0)])
+        line11 = ComponentPartitionerUnitTest.create_line(11, [101, 102], [(5, 0), (10, 0)])
+        line12 = ComponentPartitionerUnitTest.create_line(12, [103, 104], [(7, 0), (7, 5)])
+        # line 13 connects station 2 and 3 on its own
+        line13 = ComponentPartitionerUnitTest.create_line(13, [105, 106], [(10, 0.5), (10, 20)])
+        lines = {line10.id: line10, line11.id: line11, line12.id: line12, line13.id: line13}
+
+        components = ComponentPartitioner(stations, lines, False).components()
+        self.assertEqual(2, len(components))
+        self.assertEqual([10, 11, 12], list(components[0][1].keys()))
+        self.assertEqual([1, 2], sorted(components[0][0].keys()))
+        self.assertEqual([13], list(components[1][1].keys()))
+        # a station belongs to every component ending at it
+        self.assertEqual([2, 3], sorted(components[1][0].keys()))
+
+    def test_batches(self):
+        stations = dict()
+        lines = dict()
+        for i in range(6):
+            line = ComponentPartitionerUnitTest.create_line(i, [2 * i, 2 * i + 1], [(10 * i, 0), (10 * i + 5, 0)])
+            lines[line.id] = line
+        batches = ComponentPartitioner(stations, lines, False).batches(4)
+        self.assertEqual(4, len(batches))
+        self.assertEqual(sorted(lines.keys()), sorted(line_id for batch in batches for line_id in batch[1]))
+        for (batch_stations, batch_lines) in batches:
+            self.assertEqual(sorted(batch_lines.keys()), list(batch_lines.keys()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,285 @@
+import logging
+import sys
+import time
+from optparse import OptionParser
+from os import environ
+from os.path import basename, dirname, join
+from subprocess import call
+
+import psycopg2
+
+try:
+    import osmium
+except ImportError:
+    osmium = None
+
+root = logging.getLogger()
+root.setLevel(logging.INFO)
+
+
+class ChangeReader(osmium.SimpleHandler if osmium is not None else object):
+    # collects the ids of the objects of an OSM change file, telling the power ways and relations created or modified
+    # from the other objects, and the nodes of these ways
+    def __init__(self):
+        osmium.SimpleHandler.__init__(self)
+        self.node_ids = set()
+        self.way_ids = set()
+        self.relation_ids = set()
+        self.power_way_ids = set()
+        self.power_relation_ids = set()
+        self.power_way_nodes = set()
+
+    def node(self, n):
+        self.node_ids.add(n.id)
+
+    def way(self, w):
+        self.way_ids.add(w.id)
+        if w.visible and 'power' in w.tags:
+            self.power_way_ids.add(w.id)
+            self.power_way_nodes.update(node.ref for node in w.nodes)
+
+    def relation(self, r):
+        self.relation_ids.add(r.id)
+        if r.visible and ('power' in r.tags or r.tags.get('route') == 'power'):
+            self.power_relation_ids.add(r.id)
+
+
+class ChangeWriter(osmium.SimpleHandler if osmium is not None else object):
+    # writes all versions of the objects of the ids of an OSM change file to the writer
+    def __init__(self, writer, node_ids, way_ids, relation_ids):
+        osmium.SimpleHandler.__init__(self)
+        self.writer = writer
+        self.node_ids = node_ids
+        self.way_ids = way_ids
+        self.relation_ids = relation_ids
+
+    def node(self, n):
+        if n.id in self.node_ids:
+            self.writer.add_node(n)
+
+    def way(self, w):
+        if w.id in self.way_ids:
+            self.writer.add_way(w)
+
+    def relation(self, r):
+        if r.id in self.relation_ids:
+            self.writer.add_relation(r)
+
+
+class DiffUpdater:
+    # number of ids looked up in the database at a time
+    lookup_size = 100000
+
+    # applies OSM change files, e.g. the daily diffs of the dump of prepare_db.sh, to the import with osm2pgsql
+    # --append instead of importing the dump again - a change file holds the changes of all data of its region, of
+    # which the changes of the power data are filtered as by prepare_pbf.sh, so that the import keeps the power data
+    # only
+    # the lines and stations whose geometry or attributes changed by each update are recorded with their geometries
+    # before and after the update in transnet_changes, so that later stages can limit their work to the areas
+    # changed, and the tables of sql/transnet_topology.sql are refreshed for them if built
+    # conn - connection to the imported database
+    # password, connection - database connection settings as of Transnet, for osm2pgsql
+    # style - style of the import, util/power.style as by prepare_db.sh
+    def __init__(self, conn, password, connection, style):
+        if osmium is None:
+            raise ImportError('Reading OSM change files needs pyosmium (pip install osmium)')
+        self.conn = conn
+        self.password = password
+        self.connection = connection
+        self.style = style
+
+    # returns the ids of the table among the ids
+    def existing(self, table, ids):
+        ids = list(ids)
+        found = set()
+        cur = self.conn.cursor()
+        try:
+            for i in range(0, len(ids), DiffUpdater.lookup_size):
+                cur.execute('SELECT id FROM {0} WHERE id = ANY(%s)'.format(table), [ids[i:i + DiffUpdater.lookup_size]])
+                found.update(row[0] for row in cur.fetchall())
+        finally:
+            cur.close()
+        return found
+
+    # writes the changes of the power data of the OSM change file to the OSM change file power_change_file - these
+    # are the changes of the power ways and relations, of the ways, relations and nodes of the import and of the nodes
+    # of the power ways, with all their versions
+    # returns the ids of the ways and nodes written
+    def filter(self, change_file, power_change_file):
+        reader = ChangeReader()
+        reader.apply_file(change_file)
+        way_ids = reader.power_way_ids | self.existing('planet_osm_ways', reader.way_ids - reader.power_way_ids)
+        relation_ids = reader.power_relation_ids | self.existing(
+            'planet_osm_rels', reader.relation_ids - reader.power_relation_ids)
+        imported_node_ids = self.existing('planet_osm_nodes', reader.node_ids | reader.power_way_nodes)
+        node_ids = reader.node_ids & (reader.power_way_nodes | imported_node_ids)
+
+        num_missing = len(reader.power_way_nodes - reader.node_ids - imported_node_ids)
+        if num_missing:
+            # nodes of ways tagged power=* by the changes which were neither changed nor imported, osm2pgsql leaves
+            # them out of the geometries of the ways
+            root.warning('%d nodes of the power ways of %s are missing in the import, rerun prepare_db.sh to '
+                         'import them', num_missing, change_file)
+
+        writer = osmium.SimpleWriter(power_change_file, overwrite=True)
+        try:
+            ChangeWriter(writer, node_ids, way_ids, relation_ids).apply_file(change_file)
+        finally:
+            writer.close()
+        root.info('Filtered %d nodes, %d ways and %d relations of %d nodes, %d ways and %d relations of %s',
+                  len(node_ids), len(way_ids), len(relation_ids), len(reader.node_ids), len(reader.way_ids),
+                  len(reader.relation_ids), change_file)
+        return way_ids, node_ids & imported_node_ids
+
+    # returns the ways changed by changing the ways and the imported nodes - the geometries of the ways of these
+    # nodes change as well
+    def changed_ways(self, way_ids, node_ids):
+        node_ids = list(node_ids)
+        changed = set(way_ids)
+        cur = self.conn.cursor()
+        try:
+            for i in range(0, len(node_ids), DiffUpdater.lookup_size):
+                # looked up node by node in the index of the nodes of the ways, an overlap with all nodes at once
+                # is tested way by way
+                cur.execute('''SELECT DISTINCT w.id FROM planet_osm_ways w, unnest(%s::bigint[]) n(id)
+                            WHERE w.nodes @> ARRAY[n.id]''', [node_ids[i:i + DiffUpdater.lookup_size]])
+                changed.update(row[0] for row in cur.fetchall())
+        finally:
+            cur.close()
+        return changed
+
+    # returns the rows of the lines and stations of the ways by their id and kind, line or station - each row holds
+    # the EWKB of the geometry and the attributes the tables of sql/transnet_topology.sql carry, a way split into
+    # several rows by osm2pgsql has a sorted tuple of them
+    def rows(self, way_ids):
+        cur = self.conn.cursor()
+        try:
+            rows = dict()
+            cur.execute('''SELECT l.osm_id, 'line', l.way, l.power, l.name, l.ref, l.voltage, l.cables, w.tags, w.nodes
+                        FROM planet_osm_line l LEFT JOIN planet_osm_ways w ON w.id = l.osm_id
+                        WHERE l.osm_id = ANY(%s) AND l.power ~ 'line|cable|minor_line' ''', [list(way_ids)])
+            for row in cur.fetchall():
+                rows.setdefault(row[:2], []).append(tuple(row[2:]))
+            cur.execute('''SELECT p.osm_id, 'station', p.way, p.power, p.name, p.ref, p.voltage,
+                          p."plant:output:electricity", p."generator:output:electricity", p.tags
+                        FROM planet_osm_polygon p
+                        WHERE p.osm_id = ANY(%s) AND p.power ~ 'substation|station|sub_station|plant|generator' ''',
+                        [list(way_ids)])
+            for row in cur.fetchall():
+                rows.setdefault(row[:2], []).append(tuple(row[2:]))
+            return dict((key, tuple(sorted(key_rows, key=repr))) for (key, key_rows) in rows.items())
+        finally:
+            cur.close()
+
+    # returns the changes of the lines and stations of the update, given by their rows before and after as of rows -
+    # a line or station is changed if its geometry or any of its attributes changed, its geometries before and after
+    # are the ones of its rows
+    @staticmethod
+    def changes(update_id, before, after):
+        changes = []
+        for key in sorted(set(before) | set(after)):
+            (old_rows, new_rows) = (before.get(key), after.get(key))
+            if old_rows == new_rows:
+                continue
+            action = 'create' if old_rows is None else 'delete' if new_rows is None else 'modify'
+            changes.append((update_id, key[0], key[1], action,
+                            [row[0] for row in old_rows] if old_rows is not None else None,
+                            [row[0] for row in new_rows] if new_rows is not None else None))
+        return changes
+
+    # applies the OSM change file to the import with osm2pgsql as prepare_db.sh imports
+    def apply(self, power_change_file):
+        command = 'osm2pgsql --append --username={0} -d {1} -E 3857 -k -s -C 6000 -v --host={2} --port={3} ' \
+                  '--style {4} {5}'.format(self.connection['user'], self.connection['database'],
+                                           self.connection['host'], self.connection['port'], self.style,
+                                           power_change_file)
+        env = dict(environ)
+        if self.password:
+            env['PGPASSWORD'] = self.password
+        return_code = call(command, shell=True, env=env)
+        if return_code != 0:
+            raise RuntimeError('osm2pgsql failed with return code {0}'.format(return_code))
+
+    # records the changes of the lines and stations of the update of the change file, given by their rows before
+    # and after as of rows, returns the id of the update
+    def record(self, change_file, before, after):
+        cur = self.conn.cursor()
+        try:
+            # created by prepare_db.sh, unless the database was imported before
+            with open(join(dirname(__file__), '../sql/transnet_updates.sql')) as sql_file:
+                cur.execute(sql_file.read())
+            cur.execute('INSERT INTO transnet_updates (change_file) VALUES (%s) RETURNING update_id',
+                        [basename(change_file)])
+            update_id = cur.fetchone()[0]
+            changes = DiffUpdater.changes(update_id, before, after)
+            # the geometry of a way split into several rows is the collection of the geometries of the rows
+            cur.executemany('''INSERT INTO transnet_changes VALUES (%s, %s, %s, %s,
+                              ST_CollectionHomogenize(ST_Collect(%s::geometry[])),
+                              ST_CollectionHomogenize(ST_Collect(%s::geometry[])))''', changes)
+            root.info('Update %d changed %d lines and %d stations', update_id,
+                      sum(1 for change in changes if change[2] == 'line'),
+                      sum(1 for change in changes if change[2] == 'station'))
+            return update_id
+        finally:
+            cur.close()
+
+    # refreshes the tables of sql/transnet_topology.sql for the lines and stations changed by the update, if built
+    def refresh_topology(self, update_id):
+        cur = self.conn.cursor()
+        try:
+            cur.execute("SELECT to_regclass('transnet_station_lines') IS NOT NULL")
+            if not cur.fetchone()[0]:
+                return
+            with open(join(dirname(__file__), '../sql/transnet_topology_update.sql')) as sql_file:
+                cur.execute(sql_file.read(), {'update_id': update_id})
+            root.info('Refreshed the topology tables')
+        finally:
+            cur.close()
+
+    # applies the changes of the power data of the OSM change file, written to power_change_file
+    def update(self, change_file, power_change_file):
+        start = time.time()
+        (way_ids, node_ids) = self.filter(change_file, power_change_file)
+        way_ids = self.changed_ways(way_ids, node_ids)
+        before = self.rows(way_ids)
+        # the transaction is ended before osm2pgsql changes the tables
+        self.conn.rollback()
+        self.apply(power_change_file)
+        after = self.rows(way_ids)
+        update_id = self.record(change_file, before, after)
+        self.refresh_topology(update_id)
+        self.conn.commit()
+        root.info('Applied %s in %.1f s', change_file, time.time() - start)
+
+
+if __name__ == '__main__':
+    parser = OptionParser()
+    parser.add_option("-D", "--dbname", action="store", dest="dbname",
+                      help="database name of the topology network")
+    parser.add_option("-H", "--dbhost", action="store", dest="dbhost", default="127.0.0.1",
+                      help="database host address of the topology network")
+    parser.add_option("-P", "--dbport", action="store", dest="dbport", default="5432",
+                      help="database port of the topology network")
+    parser.add_option("-U", "--dbuser", action="store", dest="dbuser",
+                      help="database user name of the topology network")
+    parser.add_option("-X", "--dbpwrd", action="store", dest="dbpwrd",
+                      help="database user password of the topology network")
+    parser.add_option("-c", "--changes", action="store", dest="changes",
+                      help="OSM change file to apply, e.g. the changes.osc.gz of update_db.sh")
+    parser.add_option("-o", "--output", action="store", dest="output",
+                      help="OSM change file to write the changes of the power data to, power_<changes> if not given")
+    parser.add_option("-S", "--style", action="store", dest="style",
+                      default=join(dirname(__file__), '../util/power.style'),
+                      help="style of the import, default util/power.style")
+    (options, args) = parser.parse_args()
+    if not options.changes:
+        parser.error('The change file is required')
+
+    root.addHandler(logging.StreamHandler(sys.stdout))
+    connection = {'database': options.dbname, 'user': options.dbuser, 'host': options.dbhost, 'port': options.dbport}
+    conn = psycopg2.connect(password=options.dbpwrd, **connection)
+    try:
+        DiffUpdater(conn, options.dbpwrd, connection, options.style).update(
+            options.changes, options.output or join(dirname(options.changes), 'power_' + basename(options.changes)))
+    finally:
+        conn.close()
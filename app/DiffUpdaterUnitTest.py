@@ -0,0 +1,55 @@
+import shutil
+import tempfile
+import unittest
+
+from DiffUpdater import DiffUpdater, osmium
+
+
+class DiffUpdaterUnitTest(unittest.TestCase):
+    def test_changes(self):
+        line = ('L10', 'line', None, None, '380000', '3', ['power', 'line'], [1, 2])
+        station = ('P12', 'substation', None, None, '380000', None, None, '')
+        before = {(10, 'line'): (line,), (11, 'line'): (line,), (12, 'station'): (station,),
+                  (13, 'line'): (line, ('L13b',) + line[1:])}
+        after = {(10, 'line'): (line,),
+                 # retagged only, the geometry is the same
+                 (11, 'line'): (line[:4] + ('220000',) + line[5:],),
+                 (13, 'line'): (line, ('L13c',) + line[1:]),
+                 (20, 'line'): (line,)}
+        self.assertEqual([(1, 11, 'line', 'modify', ['L10'], ['L10']),
+                          (1, 12, 'station', 'delete', ['P12'], None),
+                          (1, 13, 'line', 'modify', ['L10', 'L13b'], ['L10', 'L13c']),
+                          (1, 20, 'line', 'create', None, ['L10'])], DiffUpdater.changes(1, before, after))
+
+    @unittest.skipIf(osmium is None, 'needs pyosmium')
+    def test_filter(self):
+        directory = tempfile.mkdtemp()
+        try:
+            change_file = '{0}/changes.osc'.format(directory)
+            writer = osmium.SimpleWriter(change_file)
+            # a moved tower of an imported line, a node of a new power line and a node of a new road
+            for node_id in [2, 60, 70]:
+                writer.add_node(osmium.osm.mutable.Node(id=node_id, location=(1, 1), version=2, visible=True))
+            writer.add_way(osmium.osm.mutable.Way(id=20, nodes=[3, 60], tags={'power': 'line'}, version=1,
+                                                  visible=True))
+            writer.add_way(osmium.osm.mutable.Way(id=21, nodes=[70, 3], tags={'highway': 'road'}, version=1,
+                                                  visible=True))
+            # an imported way retagged away from power
+            writer.add_way(osmium.osm.mutable.Way(id=13, nodes=[5, 6], tags={'highway': 'path'}, version=3,
+                                                  visible=True))
+            writer.close()
+
+            imported = {'planet_osm_ways': set([10, 13]), 'planet_osm_rels': set(),
+                        'planet_osm_nodes': set([1, 2, 3, 5, 6])}
+            updater = DiffUpdater(None, None, None, None)
+            updater.existing = lambda table, ids: imported[table] & set(ids)
+            power_change_file = '{0}/power_changes.osc'.format(directory)
+            self.assertEqual((set([13, 20]), set([2])), updater.filter(change_file, power_change_file))
+            self.assertEqual([('n', 2), ('n', 60), ('w', 20), ('w', 13)],
+                             [(obj.type_str(), obj.id) for obj in osmium.FileProcessor(power_change_file)])
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import logging
+import random
+import sys
+from datetime import datetime
+from optparse import OptionParser
+
+import pyproj
+from shapely.geometry import LineString, Point, box
+
+from Line import Line
+from LineIndex import LineIndex
+from RelationInference import RelationInference
+from Station import Station
+from StationIndex import StationIndex
+
+root = logging.getLogger()
+root.setLevel(logging.INFO)
+
+
+class InferenceBenchmark:
+    # benchmarks the per hop lookups of the relation inference on a synthetic grid of stations scattered over a
+    # 10x8 degree region instead of the lines of an import, so that it runs without a database
+    # num_stations, num_lines - size of the synthetic grid
+    # seed - seed of the grid, the same seed gives the same grid
+    def __init__(self, num_stations=3000, num_lines=20000, seed=42):
+        self.random = random.Random(seed)
+        self.stations = dict()
+        self.lines = dict()
+        self.create_grid(num_stations, num_lines)
+
+    def create_grid(self, num_stations, num_lines):
+        # stations are small squares scattered over a 10x8 degree region, lines run in chains of sections
+        # between nearby stations with shared OSM nodes at the section joints
+        node_coordinates = dict()
+        station_node_ids = []
+        node_id = 1
+        for station_id in range(1, num_stations + 1):
+            x, y = self.random.uniform(5, 15), self.random.uniform(47, 55)
+            self.stations[station_id] = Station(station_id, box(x - 0.002, y - 0.002, x + 0.002, y + 0.002),
+                                                'substation', None, None, '380000', None, None, y, x, None)
+            node_coordinates[node_id] = (x, y)
+            station_node_ids.append(node_id)
+            node_id += 1
+        line_id = 1
+        while line_id <= num_lines:
+            start_node_id = self.random.choice(station_node_ids)
+            (x1, y1) = node_coordinates[start_node_id]
+            end_node_id = min([n for n in self.random.sample(station_node_ids, 6) if n != start_node_id],
+                              key=lambda n: Point(x1, y1).distance(Point(node_coordinates[n])))
+            (x2, y2) = node_coordinates[end_node_id]
+            # sections of roughly 5 km, as OSM ways of transmission lines are split at towers and junctions
+            distance = Point(x1, y1).distance(Point(x2, y2))
+            num_sections = min(max(1, int(distance / 0.05)), num_lines - line_id + 1)
+            joint_node_ids = [start_node_id]
+            for i in range(1, num_sections):
+                fraction = float(i) / num_sections
+                node_coordinates[node_id] = (x1 + (x2 - x1) * fraction, y1 + (y2 - y1) * fraction)
+                joint_node_ids.append(node_id)
+                node_id += 1
+            joint_node_ids.append(end_node_id)
+            for i in range(num_sections):
+                nodes = [joint_node_ids[i], joint_node_ids[i + 1]]
+                coordinates = [node_coordinates[n] for n in nodes]
+                geom = LineString(coordinates)
+                self.lines[line_id] = Line(line_id, geom, 'line', None, None, '380000', '3', nodes, None,
+                                           geom.centroid.y, geom.centroid.x, coordinates[0] + coordinates[-1],
+                                           geom.length, None)
+                line_id += 1
+
+    def sample_hops(self, num_hops):
+        lines = self.random.sample(list(self.lines.values()), min(num_hops, len(self.lines)))
+        return [(line.last_node(), line.end_point(line.last_node())) for line in lines]
+
+    # noinspection PyMethodMayBeStatic
+    def time_per_hop(self, lookup, hops):
+        time = datetime.now()
+        for (node_id, node) in hops:
+            lookup(node_id, node)
+        duration = datetime.now() - time
+        return (duration.seconds * 1e6 + duration.microseconds) / len(hops)
+
+    def run(self, num_hops):
+        root.info('Benchmark on %s stations and %s lines', str(len(self.stations)), str(len(self.lines)))
+        hops = self.sample_hops(num_hops)
+
+        time = datetime.now()
+        line_index = LineIndex(self.lines)
+        station_index = StationIndex(self.stations)
+        root.info('Building the indices took %s', str(datetime.now() - time))
+
+        lines = self.lines.values()
+        stations = self.stations.values()
+        linear_line_lookup = self.time_per_hop(lambda node_id, node: [l for l in lines if node.intersects(l.geom)],
+                                               hops)
+        indexed_line_lookup = self.time_per_hop(line_index.lines_at, hops)
+        # second round answers from the memoized geometric fallback, as for every hop after the first visit
+        cached_line_lookup = self.time_per_hop(line_index.lines_at, hops)
+        linear_station_lookup = self.time_per_hop(
+            lambda node_id, node: next((s.id for s in stations if node.intersects(s.geom)), None), hops)
+        indexed_station_lookup = self.time_per_hop(
+            lambda node_id, node: station_index.intersecting_station_id(node), hops)
+
+        root.info('Line lookup per hop: linear scan %.1f us, index %.1f us (first visit), %.1f us (cached) - '
+                  'speedup %.0fx', linear_line_lookup, indexed_line_lookup, cached_line_lookup,
+                  linear_line_lookup / max(indexed_line_lookup, 0.01))
+        root.info('Station lookup per hop: linear scan %.1f us, index %.1f us - speedup %.0fx',
+                  linear_station_lookup, indexed_station_lookup,
+                  linear_station_lookup / max(indexed_station_lookup, 0.01))
+
+        time = datetime.now()
+        relation_inference = RelationInference(self.stations, self.lines, False, pyproj.Geod(ellps='WGS84'))
+        circuits = relation_inference.create_relations_of_region(self.stations.keys(), '380000')
+        root.info('Single sweep inference of %s circuits took %s', str(len(circuits)), str(datetime.now() - time))
+
+
+if __name__ == '__main__':
+    parser = OptionParser()
+    parser.add_option("-s", "--stations", action="store", dest="stations", type="int", default=3000,
+                      help="number of stations of the synthetic grid, default 3000")
+    parser.add_option("-l", "--lines", action="store", dest="lines", type="int", default=20000,
+                      help="number of lines of the synthetic grid, default 20000")
+    parser.add_option("-n", "--hops", action="store", dest="hops", type="int", default=500,
+                      help="number of sampled path extension hops")
+    parser.add_option("-r", "--seed", action="store", dest="seed", type="int", default=42,
+                      help="seed of the synthetic grid, default 42")
+    (options, args) = parser.parse_args()
+
+    root.addHandler(logging.StreamHandler(sys.stdout))
+    InferenceBenchmark(options.stations, options.lines, options.seed).run(options.hops)
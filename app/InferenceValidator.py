@@ -1,13 +1,17 @@
 import logging
 
+from BoundaryTable import BoundaryTable
 from Util import Util
 
 
 class InferenceValidator:
     cur = None
 
-    def __init__(self, cur):
+    # cur - cursor of the database connection, relations are streamed from server side cursors of its connection
+    # batch_size - number of rows transferred at a time by server side cursors
+    def __init__(self, cur, batch_size):
         self.cur = cur
+        self.batch_size = batch_size
 
     def validate(self, ssid, circuits, boundary, voltage_levels):
         num_stations = InferenceValidator.num_stations(circuits)
@@ -44,7 +48,8 @@ class InferenceValidator:
         logging.info('Not hit stations: %s', str(not_hit_stations))
         return hits * 1.0 / len(result)
 
-    def validate2(self, circuits, stations_dict, boundary, voltage_levels):
+    # validates the circuits against the relations of the region loaded into the BoundaryTable
+    def validate2(self, circuits, stations_dict, voltage_levels):
 
         logging.info("Starting inference validation")
 
@@ -57,23 +62,20 @@ class InferenceValidator:
         sql += '''where ((s1.power ~ 'substation|station|sub_station'
                 and s1.voltage ~ '%s') or s1.power ~ 'generator|plant')
                 and ARRAY[s1.osm_id]::bigint[] <@ r.parts
-                and st_within(s1.way, st_transform(st_geomfromtext('%s',4269),3857)) ''' \
-               % (voltage_levels, boundary.wkt)
+                and %s ''' \
+               % (voltage_levels, BoundaryTable.within('s1.way'))
 
         sql += '''and ((s2.power ~ 'substation|station|sub_station'
                 and s2.voltage ~ '%s')
                 or s2.power ~ 'generator|plant')
                 and ARRAY[s2.osm_id]::bigint[] <@ r.parts
-                and st_within(s2.way, st_transform(st_geomfromtext('%s',4269),3857)) ''' % \
-               (voltage_levels, boundary.wkt)
+                and %s ''' % \
+               (voltage_levels, BoundaryTable.within('s2.way'))
 
         sql += '''and s1.osm_id <> s2.osm_id
             and hstore(r.tags)->'route'='power' '''
 
-        self.cur.execute(sql)
-        relations_result = self.cur.fetchall()
-
-        num_eligible_relations = len(relations_result)
+        num_eligible_relations = 0
 
         hits = 0
         not_hit_connections = []
@@ -86,7 +88,8 @@ class InferenceValidator:
 
         covered_connections = []
         filtered_circuits = []
-        for (_id, parts, voltage) in relations_result:
+        for (_id, parts, voltage) in Util.stream_rows(self.cur.connection, sql, self.batch_size):
+            num_eligible_relations += 1
             if not voltage or int(voltage) < voltages[0]:
                 sql = "SELECT parts FROM planet_osm_rels WHERE id = " + str(_id)
                 self.cur.execute(sql)
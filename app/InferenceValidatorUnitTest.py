@@ -0,0 +1,96 @@
+import logging
+import unittest
+
+from Circuit import Circuit
+from InferenceValidator import InferenceValidator
+
+
+class FakeCursor:
+    # answers the queries of InferenceValidator.validate2 from the relations, stations and lines of the test, the
+    # named cursor streams the relations in batches as a server side cursor does
+    def __init__(self, connection, name=None):
+        self.connection = connection
+        self.name = name
+        self.rows = []
+
+    def execute(self, sql, parameters=None):
+        if self.name is not None:
+            self.rows = list(self.connection.relations)
+        elif 'array_agg(s.osm_id)' in sql:
+            self.rows = [(self.connection.stations[tuple(parameters[0])],)]
+        elif 'FROM planet_osm_line l' in sql:
+            self.rows = [(line_id, '380000', 1000.0) for line_id in parameters[0]]
+        else:
+            raise AssertionError('Unexpected query {0}'.format(sql))
+
+    def fetchmany(self, size):
+        (rows, self.rows) = (self.rows[:size], self.rows[size:])
+        if self.name is not None:
+            self.connection.streamed.append(len(rows))
+        return rows
+
+    def fetchall(self):
+        return self.fetchmany(len(self.rows))
+
+    def fetchone(self):
+        return self.fetchmany(1)[0]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, relations, stations):
+        self.relations = relations
+        self.stations = stations
+        self.streamed = []
+
+    def cursor(self, name=None):
+        return FakeCursor(self, name)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class ValidatorStation:
+    def __init__(self, _id):
+        self.id = _id
+        self.connected_stations = {'380000': set()}
+
+
+class ValidatorLine:
+    def __init__(self, length):
+        self.length = length
+
+
+class InferenceValidatorUnitTest(unittest.TestCase):
+    def test_validate2_streams_relations(self):
+        relations = [(100, [1, 10, 2], '380000'), (101, [2, 11, 3], '380000'), (102, [3, 12, 4], '380000')]
+        stations = {(1, 10, 2): [1, 2], (2, 11, 3): [2, 3], (3, 12, 4): [3, 4]}
+        connection = FakeConnection(relations, stations)
+        stations_dict = dict((station_id, ValidatorStation(station_id)) for station_id in [1, 2, 3, 4])
+        for (station1, station2) in [(1, 2), (2, 3)]:
+            stations_dict[station1].connected_stations['380000'].add(station2)
+            stations_dict[station2].connected_stations['380000'].add(station1)
+        circuits = [Circuit([stations_dict[1], ValidatorLine(1000.0), stations_dict[2]], '380000', None, None)]
+
+        handler = ListHandler()
+        logging.getLogger().addHandler(handler)
+        logging.getLogger().setLevel(logging.INFO)
+        try:
+            InferenceValidator(connection.cursor(), 2).validate2(circuits, stations_dict, '380000')
+        finally:
+            logging.getLogger().removeHandler(handler)
+        # the relations are transferred two at a time, then the empty batch ending the stream
+        self.assertEqual([2, 1, 0], connection.streamed)
+        self.assertIn('Found 2 of 3 eligible point-to-point connections (0.67)', handler.messages)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,26 @@
+from shapely.geometry import Point
+from shapely.ops import transform
+
+from Util import Util
 from Way import Way
+from WkbDecoder import WkbDecoder
 
 
 class Line(Way):
-    def __init__(self, _id, geom, srs_geom, _type, name, ref, voltage, cables, nodes, tags, lat, lon, end_point_dict,
-                 length, raw_geom):
-        Way.__init__(self, _id, geom, _type, name, ref, voltage, nodes, tags, lat, lon, raw_geom)
-        self.srs_geom = srs_geom
+    __slots__ = ('cables', 'end_coords', 'length', 'srs_wkb', 'missing_voltage_estimate', 'missing_cables_estimate',
+                 '_srs_geom', '_end_points')
+
+    # end_coords - lon, lat of the first node followed by lon, lat of the last node
+    def __init__(self, _id, geom, _type, name, ref, voltage, cables, nodes, tags, lat, lon, end_coords, length, wkb):
+        Way.__init__(self, _id, geom, _type, name, ref, voltage, nodes, tags, lat, lon, wkb)
         self.cables = cables
-        self.end_point_dict = end_point_dict
+        self.end_coords = tuple(end_coords)
         self.length = length
+        # EWKB bytes of the geometry in web mercator as imported, set where it is fetched
+        self.srs_wkb = None
+        # the geometry in web mercator and the points of the first and last node, created on first use
+        self._srs_geom = None
+        self._end_points = None
 
         self.missing_voltage_estimate = None
         self.missing_cables_estimate = None
@@ -16,6 +28,31 @@ class Line(Way):
     def __str__(self):
         return 'Line - ' + Way.__str__(self)
 
+    # returns the lon, lat of the first or last node of the line
+    def end_coords_of(self, node_id):
+        if node_id == self.nodes[-1]:
+            return self.end_coords[2:]
+        return self.end_coords[:2]
+
+    # returns the point of the first or last node of the line, the same point on each call
+    def end_point(self, node_id):
+        if self._end_points is None:
+            self._end_points = (Point(self.end_coords[:2]), Point(self.end_coords[2:]))
+        if node_id == self.nodes[-1]:
+            return self._end_points[1]
+        return self._end_points[0]
+
+    # the geometry in web mercator as imported, decoded on first use, or projected from the geometry in WGS84 if not
+    # fetched
+    @property
+    def srs_geom(self):
+        if self._srs_geom is None:
+            if self.srs_wkb is not None:
+                self._srs_geom = WkbDecoder.decode([self.srs_wkb])[0]
+            else:
+                self._srs_geom = transform(Util.to_mercator, self.geom)
+        return self._srs_geom
+
     def add_missing_data_estimation(self, voltage=None, cables=None):
         self.missing_voltage_estimate = voltage
         self.missing_cables_estimate = cables
@@ -29,7 +66,7 @@ class Line(Way):
             'name': str(self.name),
             'voltage': str(self.voltage),
             'cables': str(self.cables),
-            'nodes': self.nodes,
+            'nodes': self.nodes.tolist(),
             'tags': str(self.tags),
             'lat': str(self.lat),
             'lon': str(self.lon),
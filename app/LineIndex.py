@@ -0,0 +1,39 @@
+from shapely.strtree import STRtree
+
+from Way import Way
+
+
+class LineIndex:
+    # adjacency index that maps OSM node ids to the lines covering them
+    # lines - dict of all lines of one region and voltage level
+    def __init__(self, lines):
+        self.lines = lines
+        self.lines_by_node_id = dict()
+        self.line_by_geom_id = dict()
+        Way.decode(lines.values())
+        geoms = []
+        for line in lines.values():
+            for node_id in set(line.nodes):
+                if node_id not in self.lines_by_node_id:
+                    self.lines_by_node_id[node_id] = []
+                self.lines_by_node_id[node_id].append(line)
+            geoms.append(line.geom)
+            self.line_by_geom_id[id(line.geom)] = line
+        self.tree = STRtree(geoms) if geoms else None
+        self.lines_at_node = dict()
+
+    # returns all lines whose geometry covers the given end point node
+    # lines sharing the OSM node are taken from the node index, lines that only touch the node geometrically
+    # (e.g. a line ending on the segment of another line) are found once via the geometric fallback
+    def lines_at(self, node_id, node):
+        if node_id in self.lines_at_node:
+            return self.lines_at_node[node_id]
+        lines = list(self.lines_by_node_id.get(node_id, []))
+        if self.tree is not None:
+            sharing_line_ids = set(line.id for line in lines)
+            for geom in self.tree.query(node):
+                line = self.line_by_geom_id[id(geom)]
+                if line.id not in sharing_line_ids and node.intersects(line.geom):
+                    lines.append(line)
+        self.lines_at_node[node_id] = lines
+        return lines
@@ -0,0 +1,44 @@
+import unittest
+
+from shapely.geometry import LineString, Point
+
+from Line import Line
+from LineIndex import LineIndex
+
+
+class LineIndexUnitTest(unittest.TestCase):
+    @staticmethod
+    def create_line(_id, nodes, coordinates):
+        geom = LineString(coordinates)
+        return Line(_id, geom, 'line', None, None, '380000', '3', nodes, None, geom.centroid.y, geom.centroid.x,
+                    coordinates[0] + coordinates[-1], geom.length, None)
+
+    # line 1 and 2 share node 2, line 3 ends on the segment of line 2 without sharing a node with it, line 4 is
+    # apart from the others
+    def setUp(self):
+        self.lines = dict((line.id, line) for line in [
+            LineIndexUnitTest.create_line(1, [1, 2], [(0, 0), (1, 0)]),
+            LineIndexUnitTest.create_line(2, [2, 3], [(1, 0), (3, 0)]),
+            LineIndexUnitTest.create_line(3, [4, 5], [(2, 1), (2, 0)]),
+            LineIndexUnitTest.create_line(4, [6, 7], [(5, 5), (6, 5)])])
+        self.line_index = LineIndex(self.lines)
+
+    def test_shared_node(self):
+        self.assertEqual([1, 2], [line.id for line in self.line_index.lines_at(2, Point(1, 0))])
+        self.assertEqual([4], [line.id for line in self.line_index.lines_at(7, Point(6, 5))])
+
+    def test_geometric_fallback(self):
+        lines = self.line_index.lines_at(5, Point(2, 0))
+        self.assertEqual([3, 2], [line.id for line in lines])
+        # the lines of a node are memoized, later lookups of the node neither query the tree nor test the node again
+        self.line_index.tree = None
+        self.assertIs(lines, self.line_index.lines_at(5, Point(2, 0)))
+        self.assertIs(lines, self.line_index.lines_at(5, Point(9, 9)))
+
+    def test_no_lines(self):
+        self.assertEqual([], self.line_index.lines_at(8, Point(4, 4)))
+        self.assertEqual([], LineIndex(dict()).lines_at(1, Point(0, 0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
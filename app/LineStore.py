@@ -0,0 +1,169 @@
+import re
+from array import array
+
+import numpy as np
+
+from ColumnFile import ColumnFile
+from Line import Line
+from WkbDecoder import WkbDecoder
+
+
+class LineStore:
+    # columnar store of the lines of a region as fetched by Transnet.fetch_region - the ids, end points, lengths and
+    # centroids of the lines are kept in numpy arrays, their node ids and geometries packed into numpy arrays with
+    # the offsets of each line, their other attributes in lists by row, so that voltage levels are selected and
+    # counted on the arrays, and Line views are created for the lines of a voltage level only
+    # a line of several voltage levels gets a view for each of them, lines keep no state across voltage levels
+    # the columns are saved to and loaded from the files of a snapshot as they are, the arrays memory mapped
+    # columns - dict of the columns by name, as of from_rows or ColumnFile.load
+    def __init__(self, columns):
+        self.columns = columns
+        self.ids = columns['ids']
+        self.lats = columns['lats']
+        self.lons = columns['lons']
+        self.lengths = columns['lengths']
+        self.end_nodes = columns['end_nodes']
+        self.end_coords = columns['end_coords']
+        self.voltage_codes = columns['voltage_codes']
+        self.distinct_voltages = columns['distinct_voltages']
+        self.types = columns['types']
+        self.names = columns['names']
+        self.refs = columns['refs']
+        self.voltages = columns['voltages']
+        self.cables = columns['cables']
+        self.tags = columns['tags']
+        self.node_ids = columns['node_ids']
+        self.node_offsets = columns['node_offsets']
+        self.wkb_buffer = columns['wkb_buffer']
+        self.wkb_offsets = columns['wkb_offsets']
+        self.srs_wkb_buffer = columns['srs_wkb_buffer']
+        self.srs_wkb_offsets = columns['srs_wkb_offsets']
+
+    # returns the store of the rows of the line queries of Transnet.fetch_region, ids may repeat where osm2pgsql split
+    # a way
+    @staticmethod
+    def from_rows(rows):
+        ids = []
+        lats = []
+        lons = []
+        lengths = []
+        end_nodes = []
+        first_node_geoms = []
+        last_node_geoms = []
+        types = []
+        names = []
+        refs = []
+        voltages = []
+        cables = []
+        nodes = []
+        tags = []
+        wkbs = []
+        srs_wkbs = []
+        # voltages as tagged are matched against the voltage levels once per distinct value
+        voltage_codes = []
+        code_by_voltage = dict()
+        for (osm_id, geom, srs_geom, power_type, name, ref, voltage, line_cables, line_nodes, line_tags,
+             first_node_geom, last_node_geom, lat, lon, length) in rows:
+            ids.append(osm_id)
+            lats.append(lat)
+            lons.append(lon)
+            lengths.append(length)
+            end_nodes.append((line_nodes[0], line_nodes[-1]))
+            first_node_geoms.append(first_node_geom)
+            last_node_geoms.append(last_node_geom)
+            voltage_codes.append(code_by_voltage.setdefault(voltage, len(code_by_voltage)))
+            types.append(power_type)
+            names.append(name.replace(',', ';') if name else None)
+            refs.append(ref.replace(',', ';') if ref is not None else None)
+            voltages.append(voltage.replace(',', ';').replace('/', ';') if voltage else None)
+            cables.append(line_cables)
+            nodes.append(line_nodes)
+            tags.append(line_tags)
+            wkbs.append(geom)
+            srs_wkbs.append(srs_geom)
+        distinct_voltages = [None] * len(code_by_voltage)
+        for (voltage, code) in code_by_voltage.items():
+            distinct_voltages[code] = voltage
+        (node_ids, node_offsets) = ColumnFile.pack_ints(nodes)
+        (wkb_buffer, wkb_offsets) = ColumnFile.pack_bytes(wkbs)
+        (srs_wkb_buffer, srs_wkb_offsets) = ColumnFile.pack_bytes(srs_wkbs)
+        return LineStore({
+            'ids': np.array(ids, dtype=np.int64),
+            'lats': np.array(lats, dtype=float),
+            'lons': np.array(lons, dtype=float),
+            'lengths': np.array(lengths, dtype=float),
+            'end_nodes': np.array(end_nodes, dtype=np.int64).reshape(-1, 2),
+            # the end points of all lines are parsed at once
+            'end_coords': np.column_stack((WkbDecoder.points(first_node_geoms), WkbDecoder.points(last_node_geoms))),
+            'voltage_codes': np.array(voltage_codes, dtype=np.int32),
+            'distinct_voltages': distinct_voltages,
+            'types': types,
+            'names': names,
+            'refs': refs,
+            'voltages': voltages,
+            'cables': cables,
+            'tags': tags,
+            'node_ids': node_ids,
+            'node_offsets': node_offsets,
+            'wkb_buffer': wkb_buffer,
+            'wkb_offsets': wkb_offsets,
+            'srs_wkb_buffer': srs_wkb_buffer,
+            'srs_wkb_offsets': srs_wkb_offsets})
+
+    # writes the columns to the files of the store of the name in the directory
+    def save(self, directory, name):
+        ColumnFile.save(directory, name, self.columns)
+
+    # returns the store of the name saved to the directory
+    @staticmethod
+    def load(directory, name):
+        return LineStore(ColumnFile.load(directory, name))
+
+    def __len__(self):
+        return len(self.ids)
+
+    # returns the rows of the lines whose voltage as tagged matches the voltage level as regular expression
+    def voltage_level_rows(self, voltage_level):
+        voltage_pattern = re.compile(voltage_level)
+        matches = np.array([voltage is not None and voltage_pattern.search(voltage) is not None
+                            for voltage in self.distinct_voltages], dtype=bool)
+        if not len(matches):
+            return np.zeros(0, dtype=np.intp)
+        return np.flatnonzero(matches[self.voltage_codes])
+
+    # returns a new view of the line of the row
+    def line(self, row):
+        return self.views([row])[0]
+
+    # returns the dict of new views of the lines of the rows by id, in the order of the rows
+    def lines(self, rows):
+        lines = dict()
+        for line in self.views(rows):
+            lines[line.id] = line
+        return lines
+
+    # returns the list of new views of the lines of the rows, reading each column for all rows at once
+    def views(self, rows):
+        rows = np.asarray(rows, dtype=np.intp)
+        node_ids = memoryview(self.node_ids)
+        nodes = [array('q', node_ids[start:end].tobytes())
+                 for (start, end) in zip(self.node_offsets[rows].tolist(), self.node_offsets[rows + 1].tolist())]
+        wkbs = ColumnFile.unpack_all(self.wkb_buffer, self.wkb_offsets, rows)
+        srs_wkbs = ColumnFile.unpack_all(self.srs_wkb_buffer, self.srs_wkb_offsets, rows)
+        views = []
+        for (i, (row, line_id, lat, lon, end_coords, length)) in enumerate(zip(
+                rows.tolist(), self.ids[rows].tolist(), self.lats[rows].tolist(), self.lons[rows].tolist(),
+                self.end_coords[rows].tolist(), self.lengths[rows].tolist())):
+            line = Line(line_id, None, self.types[row], self.names[row], self.refs[row], self.voltages[row],
+                        self.cables[row], nodes[i], self.tags[row], lat, lon, tuple(end_coords), length, wkbs[i])
+            line.srs_wkb = srs_wkbs[i]
+            views.append(line)
+        return views
+
+    # returns the total length of the lines of the rows
+    def length(self, rows):
+        return float(self.lengths[rows].sum())
+
+    # returns the lat, lon rows of the centroids of the lines of the rows
+    def points(self, rows):
+        return np.column_stack((self.lats[rows], self.lons[rows]))
@@ -0,0 +1,72 @@
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from shapely import wkb
+from shapely.geometry import LineString, Point
+
+from LineStore import LineStore
+
+
+class LineStoreUnitTest(unittest.TestCase):
+    @staticmethod
+    def create_row(_id, voltage, nodes, coordinates):
+        geom = LineString(coordinates)
+        # the geometry as imported, which differs from the projection of geom where osm2pgsql split the way
+        srs_geom = LineString([(1000 * x, 1000 * y) for (x, y) in coordinates[:2]])
+        return (_id, wkb.dumps(geom, srid=4326), wkb.dumps(srs_geom, srid=3857), 'line', 'a,b', None, voltage, None,
+                nodes, ['power', 'line'],
+                wkb.dumps(Point(coordinates[0]), srid=4326), wkb.dumps(Point(coordinates[-1]), srid=4326),
+                geom.centroid.y, geom.centroid.x, 1000.0 * _id)
+
+    def setUp(self):
+        self.store = LineStore.from_rows(
+            [LineStoreUnitTest.create_row(1, '380000', [10, 11, 12], [(0, 0), (1, 0), (2, 0)]),
+             LineStoreUnitTest.create_row(2, '220000', [12, 13], [(2, 0), (2, 1)]),
+             LineStoreUnitTest.create_row(3, None, [13, 14], [(2, 1), (3, 1)]),
+             LineStoreUnitTest.create_row(4, '380000,220000', [14, 15], [(3, 1), (4, 1)])])
+
+    def test_voltage_level_rows(self):
+        self.assertEqual([0, 3], self.store.voltage_level_rows('380000').tolist())
+        self.assertEqual([0, 1, 3], self.store.voltage_level_rows('220000|380000').tolist())
+        self.assertEqual([], self.store.voltage_level_rows('110000').tolist())
+        self.assertEqual([], LineStore.from_rows([]).voltage_level_rows('380000').tolist())
+
+    def test_lines(self):
+        rows = self.store.voltage_level_rows('380000')
+        lines = self.store.lines(rows)
+        self.assertEqual([1, 4], list(lines.keys()))
+        self.assertEqual('380000;220000', lines[4].voltage)
+        self.assertEqual('a;b', lines[1].name)
+        self.assertEqual(12, lines[1].last_node())
+        self.assertTrue(lines[1].end_point(12).equals(Point(2, 0)))
+        self.assertTrue(lines[1].geom.equals(LineString([(0, 0), (1, 0), (2, 0)])))
+        self.assertTrue(lines[1].srs_geom.equals(LineString([(0, 0), (1000, 0)])))
+        # the geometry and end points are created once
+        self.assertIs(lines[1].srs_geom, lines[1].srs_geom)
+        self.assertIs(lines[1].end_point(12), lines[1].end_point(12))
+        self.assertEqual(5000.0, self.store.length(rows))
+        self.assertEqual([[0, 1], [1, 3.5]], self.store.points(rows).tolist())
+
+    def test_save_and_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            self.store.save(directory, 'lines')
+            store = LineStore.load(directory, 'lines')
+            # the arrays are mapped from the files instead of read
+            self.assertIsInstance(store.ids.base, np.memmap)
+            self.assertIsInstance(store.wkb_buffer.base, np.memmap)
+            self.assertEqual([0, 3], store.voltage_level_rows('380000').tolist())
+            for row in range(len(self.store)):
+                (expected, line) = (self.store.line(row), store.line(row))
+                self.assertEqual(expected.serialize(), line.serialize())
+                self.assertEqual(expected.end_coords, line.end_coords)
+                self.assertEqual(expected.srs_wkb, line.srs_wkb)
+            self.assertEqual(0, len(LineStore.from_rows([]).lines([])))
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
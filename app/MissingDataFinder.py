@@ -0,0 +1,186 @@
+import json
+import logging
+from itertools import chain
+from os import remove
+from os.path import getsize
+from subprocess import call
+
+from CSVWriter import CSVWriter
+from LineStore import LineStore
+from RegionQueries import RegionQueries
+from Station import Station
+from Util import Util
+
+
+class MissingDataFinder:
+    line_types = ['line', 'cable', 'minor_line']
+    # station types and the types sharing their voltage estimate
+    station_types = {'substation': 'substation', 'sub_station': 'substation', 'station': 'station',
+                     'plant': 'plant', 'generator': 'plant'}
+
+    # finds the lines of a region lacking voltage or cables and the stations lacking voltage or a connection to a
+    # line, estimates their voltage and cables by the values common in the region and writes them to
+    # lines_missing_data.json and stations_missing_data.json - the statistics are gathered in one scan over the
+    # lines and one over the polygons, lines and stations are written one by one as they are fetched
+    # conn - database connection, with the boundary of the region loaded into the BoundaryTable if any
+    # batch_size - number of rows transferred at a time by server side cursors
+    # topology_tables - whether the tables of sql/transnet_topology.sql are built
+    # destdir - directory of the output files
+    def __init__(self, conn, batch_size, topology_tables, destdir):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.topology_tables = topology_tables
+        self.destdir = destdir
+
+    # where_clause, where_clause_station - conditions of the region on lines l and polygons p
+    # region_lines - LineStore of the lines of Transnet.fetch_region for the same region, or None - the ones lacking
+    #  cables are taken from it instead of being queried again
+    # voltage_levels - voltage levels region_lines were fetched for
+    def find(self, where_clause, where_clause_station, region_lines=None, voltage_levels=None):
+        line_estimates = MissingDataFinder.line_estimates(self.query_all(
+            '''SELECT l.power, l.voltage, l.cables, GROUPING(l.voltage) = 0 AS of_voltage, count(*) AS num
+            FROM planet_osm_line l
+            WHERE l.power IN ('line', 'cable', 'minor_line') AND %s
+            GROUP BY GROUPING SETS ((l.power, l.voltage), (l.power, l.cables))''' % where_clause))
+        num_lines = self.write_json('lines_missing_data',
+                                    self.missing_lines(where_clause, line_estimates, region_lines, voltage_levels))
+        logging.info('Found %d lines with missing data', num_lines)
+
+        station_estimates = MissingDataFinder.station_estimates(self.query_all(
+            '''SELECT p.power, p.voltage, count(*) AS num
+            FROM planet_osm_polygon p
+            WHERE p.power IN ('substation', 'sub_station', 'station', 'plant', 'generator') AND %s
+            GROUP BY p.power, p.voltage''' % where_clause_station))
+        num_stations = self.write_json('stations_missing_data',
+                                       self.missing_stations(where_clause, where_clause_station, station_estimates))
+        logging.info('Found %d stations with missing data', num_stations)
+
+    def query_all(self, sql):
+        cur = self.conn.cursor()
+        try:
+            cur.execute(sql)
+            return cur.fetchall()
+        finally:
+            cur.close()
+
+    @staticmethod
+    def parse_values(value):
+        return [CSVWriter.try_parse_int(x) for x in str(value).strip().split(';')]
+
+    # returns the estimates of the voltage and cables of each line type, the values of more than 30 lines of the type
+    # joined by ';'
+    # counts - power, voltage, cables, whether the count is of the voltage or else of the cables, number of lines
+    @staticmethod
+    def line_estimates(counts):
+        voltages = dict((line_type, set()) for line_type in MissingDataFinder.line_types)
+        cables = dict((line_type, set()) for line_type in MissingDataFinder.line_types)
+        for (power, voltage, cables_value, of_voltage, num) in counts:
+            value = voltage if of_voltage else cables_value
+            if num > 30 and value:
+                (voltages if of_voltage else cables)[power].update(MissingDataFinder.parse_values(value))
+        return dict((line_type, (';'.join([str(x) for x in voltages[line_type]]),
+                                 ';'.join([str(x) for x in cables[line_type]])))
+                    for line_type in MissingDataFinder.line_types)
+
+    # returns the estimate of the voltage of each station type, the voltages of more than 30 stations of the type
+    # or the types sharing its estimate joined by ';'
+    # counts - power, voltage, number of stations
+    @staticmethod
+    def station_estimates(counts):
+        voltages = dict((station_type, set()) for station_type in MissingDataFinder.station_types.values())
+        for (power, voltage, num) in counts:
+            if num > 30 and voltage:
+                voltages[MissingDataFinder.station_types[power]].update(MissingDataFinder.parse_values(voltage))
+        return dict((station_type, ';'.join([str(x) for x in voltages[estimate_type]]))
+                    for (station_type, estimate_type) in MissingDataFinder.station_types.items())
+
+    # yields the serialized lines lacking voltage or cables
+    def missing_lines(self, where_clause, line_estimates, region_lines, voltage_levels):
+        line_ids = set()
+        condition = '''l.osm_id >= 0 AND %s
+                        AND (l.voltage IS NULL OR l.cables IS NULL) AND %s''' \
+                    % (RegionQueries.is_line('l'), where_clause)
+        if region_lines is not None:
+            for row in range(len(region_lines)):
+                if region_lines.cables[row] is None and region_lines.types[row] in line_estimates:
+                    missing_line = region_lines.line(row)
+                    if missing_line.id in line_ids:
+                        continue
+                    line_ids.add(missing_line.id)
+                    missing_line.add_missing_data_estimation(*line_estimates[missing_line.type])
+                    yield missing_line.serialize()
+            condition += " AND (l.voltage IS NULL OR NOT l.voltage ~ '%s')" % voltage_levels
+
+        # the lines of each batch are stored as the lines of the region are
+        for rows in Util.stream_batches(self.conn, RegionQueries.lines(self.topology_tables, condition),
+                                        self.batch_size):
+            batch_lines = LineStore.from_rows(rows)
+            for row in range(len(batch_lines)):
+                if batch_lines.types[row] not in line_estimates or int(batch_lines.ids[row]) in line_ids:
+                    continue
+                missing_line = batch_lines.line(row)
+                line_ids.add(missing_line.id)
+                missing_line.add_missing_data_estimation(*line_estimates[missing_line.type])
+                yield missing_line.serialize()
+
+    # yields the serialized stations lacking voltage or a connection to a line
+    def missing_stations(self, where_clause, where_clause_station, station_estimates):
+        if self.topology_tables:
+            connected = '''EXISTS (SELECT 1 FROM transnet_station_lines i, transnet_lines l
+                                   WHERE i.station_id = p.osm_id AND i.line_id = l.osm_id AND i.intersecting
+                                   AND %s)''' % where_clause
+        else:
+            connected = '''EXISTS (SELECT 1 FROM planet_osm_line l
+                                   WHERE l.osm_id >= 0 AND %s AND %s
+                                   AND st_intersects(l.way, p.way))''' % (RegionQueries.is_line('l'), where_clause)
+        # OFFSET 0 keeps the planner from inlining the subquery, which would test the connection twice
+        sql = '''SELECT s.osm_id,
+                   ST_AsEWKB(st_transform(s.way, 4326)) AS geom,
+                   s.power AS power_type,
+                   s.name,
+                   s.ref,
+                   s.voltage,
+                   s.tags,
+                   ST_Y(ST_Transform(ST_Centroid(s.way), 4326)) AS lat,
+                   ST_X(ST_Transform(ST_Centroid(s.way), 4326)) AS lon,
+                   s.missing_connection
+                 FROM (SELECT p.*,
+                         NOT (p.osm_id >= 0 AND p.power ~ 'substation|station|sub_station|plant|generator' AND %s)
+                           AS missing_connection
+                       FROM planet_osm_polygon p
+                       WHERE p.power IN ('substation', 'sub_station', 'station', 'plant', 'generator') AND %s
+                       OFFSET 0) s
+                 WHERE s.missing_connection OR s.voltage IS NULL''' % (connected, where_clause_station)
+
+        station_ids = set()
+        for (osm_id, geom, power_type, name, ref, voltage, tags, lat, lon,
+             missing_connection) in chain.from_iterable(Util.stream_batches(self.conn, sql, self.batch_size)):
+            if osm_id in station_ids:
+                continue
+            station_ids.add(osm_id)
+            station = Station(osm_id, None, power_type, name, ref,
+                              voltage.replace(',', ';').replace('/', ';') if voltage else None,
+                              None, tags, lat, lon, geom)
+            if missing_connection:
+                station.add_missing_connection()
+            station.add_missing_data_estimation(voltage=station_estimates[power_type])
+            yield station.serialize()
+
+    # writes the objects to <name>.json in the destination directory as a list formatted as json.dump with indent 4
+    # does, one object at a time, and splits files of 100MB or more into parts of 50MB - returns the number of objects
+    def write_json(self, name, objects):
+        path = '{0}/{1}.json'.format(self.destdir, name)
+        num_objects = 0
+        with open(path, 'w') as outfile:
+            outfile.write('[')
+            for obj in objects:
+                outfile.write(',\n    ' if num_objects else '\n    ')
+                outfile.write(json.dumps(obj, indent=4).replace('\n', '\n    '))
+                num_objects += 1
+            outfile.write('\n]' if num_objects else ']')
+
+        if getsize(path) / 1048576.0 >= 100:
+            return_code = call('split --bytes=50M {0} {1}/_{2}'.format(path, self.destdir, name), shell=True)
+            logging.info('Missing data file %s split return %s', name, return_code)
+            remove(path)
+        return num_objects
@@ -0,0 +1,43 @@
+import json
+import shutil
+import tempfile
+import unittest
+
+from MissingDataFinder import MissingDataFinder
+
+
+class MissingDataFinderUnitTest(unittest.TestCase):
+    def test_line_estimates(self):
+        counts = [('line', '380000', None, True, 40), ('line', '220000;110000', None, True, 31),
+                  ('line', '20000', None, True, 30), ('line', None, '3', False, 50), ('line', None, None, False, 90),
+                  ('cable', None, '6', False, 35)]
+        estimates = MissingDataFinder.line_estimates(counts)
+        self.assertEqual(set([380000, 220000, 110000]),
+                         set(int(x) for x in estimates['line'][0].split(';')))
+        self.assertEqual('3', estimates['line'][1])
+        self.assertEqual(('', '6'), estimates['cable'])
+        self.assertEqual(('', ''), estimates['minor_line'])
+
+    def test_station_estimates(self):
+        counts = [('substation', '380000', 40), ('sub_station', '110000', 50), ('plant', '20000', 31),
+                  ('station', '220000', 10)]
+        estimates = MissingDataFinder.station_estimates(counts)
+        self.assertEqual(set([380000, 110000]), set(int(x) for x in estimates['sub_station'].split(';')))
+        self.assertEqual(estimates['substation'], estimates['sub_station'])
+        self.assertEqual('20000', estimates['generator'])
+        self.assertEqual('', estimates['station'])
+
+    def test_write_json(self):
+        destdir = tempfile.mkdtemp()
+        try:
+            finder = MissingDataFinder(None, 1, False, destdir)
+            for objects in [[], [{'id': 1, 'nodes': [1, 2], 'tags': 'a'}, {'id': 2, 'nodes': []}]]:
+                self.assertEqual(len(objects), finder.write_json('missing', iter(objects)))
+                with open('{0}/missing.json'.format(destdir)) as infile:
+                    self.assertEqual(json.dumps(objects, indent=4), infile.read())
+        finally:
+            shutil.rmtree(destdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
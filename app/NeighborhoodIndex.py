@@ -0,0 +1,50 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class NeighborhoodIndex:
+    # mean earth radius in meters
+    earth_radius = 6371008.8
+
+    # KD-tree over the centroids of components (stations or lines) for radius queries in meters
+    # components - the components to index
+    # chunk_size - number of centers answered by one batched tree query
+    def __init__(self, components, chunk_size=1000):
+        self.components = list(components)
+        self.chunk_size = chunk_size
+        centroids = [component.geom.centroid for component in self.components]
+        self.points = NeighborhoodIndex.to_cartesian(np.array([c.x for c in centroids], dtype=float),
+                                                     np.array([c.y for c in centroids], dtype=float))
+        self.tree = cKDTree(self.points) if len(self.components) else None
+
+    # converts longitudes and latitudes in degrees to cartesian coordinates on the earth sphere in meters
+    @staticmethod
+    def to_cartesian(lons, lats):
+        lons = np.radians(lons)
+        lats = np.radians(lats)
+        return np.column_stack((NeighborhoodIndex.earth_radius * np.cos(lats) * np.cos(lons),
+                                NeighborhoodIndex.earth_radius * np.cos(lats) * np.sin(lons),
+                                NeighborhoodIndex.earth_radius * np.sin(lats)))
+
+    # yields for each center component the dict of components whose centroid is within the given great circle
+    # distance in meters of the center's centroid, in the order of the indexed components
+    def close_components(self, center_components, radius):
+        center_components = list(center_components)
+        # great circle distance to the length of the chord through the sphere
+        chord = 2 * NeighborhoodIndex.earth_radius * np.sin(min(radius / (2 * NeighborhoodIndex.earth_radius),
+                                                                np.pi / 2))
+        for start in range(0, len(center_components), self.chunk_size):
+            chunk = center_components[start:start + self.chunk_size]
+            if self.tree is None:
+                for _ in chunk:
+                    yield dict()
+                continue
+            centroids = [component.geom.centroid for component in chunk]
+            points = NeighborhoodIndex.to_cartesian(np.array([c.x for c in centroids], dtype=float),
+                                                    np.array([c.y for c in centroids], dtype=float))
+            for indices in self.tree.query_ball_point(points, chord):
+                close_components = dict()
+                for index in sorted(indices):
+                    component = self.components[index]
+                    close_components[component.id] = component
+                yield close_components
@@ -0,0 +1,41 @@
+import math
+import unittest
+
+from shapely.geometry import Point
+
+from NeighborhoodIndex import NeighborhoodIndex
+from Station import Station
+
+
+class NeighborhoodIndexUnitTest(unittest.TestCase):
+    @staticmethod
+    def create_station(_id, lon, lat):
+        return Station(_id, Point(lon, lat), 'substation', None, None, '380000', None, None, lat, lon, None)
+
+    # returns the station at the great circle distance in meters east of the station at 0, 0
+    @staticmethod
+    def station_at(_id, distance):
+        return NeighborhoodIndexUnitTest.create_station(_id, math.degrees(distance / NeighborhoodIndex.earth_radius),
+                                                        0.0)
+
+    def test_radius_boundary(self):
+        center = NeighborhoodIndexUnitTest.create_station(1, 0.0, 0.0)
+        stations = [center, NeighborhoodIndexUnitTest.station_at(2, 999.9),
+                    NeighborhoodIndexUnitTest.station_at(3, 1000.1), NeighborhoodIndexUnitTest.station_at(4, 300000.0)]
+        index = NeighborhoodIndex(stations)
+        self.assertEqual([1, 2], list(next(index.close_components([center], 1000))))
+        self.assertEqual([1, 2, 3], list(next(index.close_components([center], 1000.2))))
+        self.assertEqual([1], list(next(index.close_components([center], 0))))
+        # radii beyond half the circumference cover the whole sphere
+        self.assertEqual([1, 2, 3, 4], list(next(index.close_components([center], 1e9))))
+
+    def test_chunks(self):
+        stations = [NeighborhoodIndexUnitTest.station_at(i, 400.0 * i) for i in range(10)]
+        expected = list(NeighborhoodIndex(stations).close_components(stations, 1000))
+        self.assertEqual([[0, 1, 2], [0, 1, 2, 3], [0, 1, 2, 3, 4]], [list(close) for close in expected[:3]])
+        self.assertEqual(expected, list(NeighborhoodIndex(stations, 3).close_components(stations, 1000)))
+        self.assertEqual([dict(), dict()], list(NeighborhoodIndex([]).close_components(stations[:2], 1000)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import pickle
+from multiprocessing import Pool
+
+import pyproj
+
+from ComponentPartitioner import ComponentPartitioner
+from RelationInference import RelationInference
+
+
+# searches the relations of a batch of components of one voltage level in a worker process
+# task - pickled tuple of the stations, lines and start station ids of the batch, the station id of a single station
+#  inference or None, whether to cover the searches within the batch, and the close_nodes, sweep and radius settings
+# returns the searches of RelationInference.search_relations_of_scopes by ids, so that they can be resolved to the
+#  stations and lines of the parent process
+def search_voltage_level(task):
+    (stations, lines, substation_ids, ssid, cover, close_nodes, sweep, radius) = pickle.loads(task)
+    relation_inference = RelationInference(stations, lines, close_nodes, pyproj.Geod(ellps='WGS84'))
+    if ssid is not None:
+        scopes = [relation_inference.scope(stations[ssid], stations, lines)]
+    elif sweep:
+        scopes = relation_inference.region_scopes(substation_ids)
+    else:
+        scopes = relation_inference.neighborhood_scopes(substation_ids, radius)
+    searches = []
+    for (station, start_searches) in relation_inference.search_relations_of_scopes(scopes, cover):
+        searches.append((station.id, [(line.id, [[member.id for member in relation] for relation in relations])
+                                      for (line, relations) in start_searches]))
+    return searches
+
+
+class ParallelInference:
+    # infers voltage levels and the connected components of their line graphs concurrently in a pool of worker
+    # processes - the workers only search the relations, the covered lines and connections of the stations are
+    # recorded in the parent process in the order of the voltage levels, start stations and start lines, so that
+    # the circuits and station state match the ones of a sequential inference
+    # workers - number of worker processes
+    # close_nodes, sweep, radius - inference settings as of Transnet
+    def __init__(self, workers, close_nodes, sweep, radius):
+        self.close_nodes = close_nodes
+        self.sweep = sweep
+        self.radius = radius
+        # several batches per worker, so that workers finishing early take over
+        self.num_batches = workers * 4
+        # ids of the lines of the voltage levels submitted so far
+        self.submitted_line_ids = set()
+        self.pool = Pool(workers)
+
+    # submits the inference of a voltage level and returns the pending search to pass to circuits - the components
+    # of a region are inferred in batches, a single station inference is submitted as a whole
+    # ssid - id of the single station to infer from, None to infer from all substations
+    def search(self, voltage_level, substations, generators, lines, ssid):
+        stations = substations.copy()
+        stations.update(generators)
+        if ssid is None:
+            start_station_ids = list(substations.keys())
+            batches = ComponentPartitioner(stations, lines, self.close_nodes).batches(self.num_batches)
+        else:
+            start_station_ids = [ssid]
+            batches = [(stations, lines)]
+        results = []
+        for (batch_stations, batch_lines) in batches:
+            # lines of several voltage levels may be covered by an earlier one, otherwise the worker already leaves
+            # out what is covered within the batch
+            cover = not any(line_id in self.submitted_line_ids for line_id in batch_lines)
+            # the stations are pickled right away, as their state changes while earlier voltage levels are merged
+            task = pickle.dumps((batch_stations, batch_lines,
+                                 [station_id for station_id in batch_stations if station_id in substations], ssid,
+                                 cover, self.close_nodes, self.sweep, self.radius), pickle.HIGHEST_PROTOCOL)
+            results.append(self.pool.apply_async(search_voltage_level, (task,)))
+        self.submitted_line_ids.update(lines.keys())
+        return voltage_level, stations, lines, start_station_ids, results
+
+    # waits for the search of a voltage level and returns its circuits - searches have to be passed in the order
+    # of the voltage levels
+    # noinspection PyMethodMayBeStatic
+    def circuits(self, search):
+        (voltage_level, stations, lines, start_station_ids, results) = search
+        start_searches_by_station = dict()
+        for result in results:
+            for (station_id, start_searches) in result.get():
+                if station_id not in start_searches_by_station:
+                    start_searches_by_station[station_id] = []
+                start_searches_by_station[station_id].extend(start_searches)
+
+        # start lines are searched in the iteration order of lines, whatever batch they belong to
+        line_order = dict((line_id, position) for (position, line_id) in enumerate(lines))
+        searches = []
+        for station_id in start_station_ids:
+            if station_id not in start_searches_by_station:
+                continue
+            start_searches = sorted(start_searches_by_station[station_id], key=lambda s: line_order[s[0]])
+            searches.append((stations[station_id],
+                             [(lines[line_id], [[stations[relation[0]]] + [lines[member_id] for member_id in
+                                                                           relation[1:-1]] + [stations[relation[-1]]]
+                                                for relation in relations])
+                              for (line_id, relations) in start_searches]))
+        return RelationInference.cover_searches(searches, voltage_level)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def terminate(self):
+        self.pool.terminate()
+        self.pool.join()
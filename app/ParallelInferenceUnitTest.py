@@ -0,0 +1,53 @@
+import unittest
+
+import pyproj
+
+from InferenceBenchmark import InferenceBenchmark
+from ParallelInference import ParallelInference
+from RelationInference import RelationInference
+
+
+class ParallelInferenceUnitTest(unittest.TestCase):
+    # the lines of the grid are inferred for two voltage levels, so that the second one finds its lines covered by
+    # the first
+    voltage_levels = ['380000', '220000']
+
+    @staticmethod
+    def summary(stations, circuits):
+        return ([[member.id for member in circuit.members] for circuit in circuits],
+                dict((station.id, (list(station.covered_line_ids), station.connected_stations))
+                     for station in stations.values()))
+
+    def sequential(self):
+        benchmark = InferenceBenchmark(60, 600, 7)
+        circuits = []
+        for voltage_level in ParallelInferenceUnitTest.voltage_levels:
+            relation_inference = RelationInference(benchmark.stations, benchmark.lines, False,
+                                                   pyproj.Geod(ellps='WGS84'))
+            circuits.extend(relation_inference.create_relations_of_region(list(benchmark.stations.keys()),
+                                                                          voltage_level))
+        return ParallelInferenceUnitTest.summary(benchmark.stations, circuits)
+
+    @staticmethod
+    def parallel(workers):
+        benchmark = InferenceBenchmark(60, 600, 7)
+        parallel_inference = ParallelInference(workers, False, True, 300000)
+        try:
+            searches = [parallel_inference.search(voltage_level, benchmark.stations, dict(), benchmark.lines, None)
+                        for voltage_level in ParallelInferenceUnitTest.voltage_levels]
+            circuits = []
+            for search in searches:
+                circuits.extend(parallel_inference.circuits(search))
+        finally:
+            parallel_inference.close()
+        return ParallelInferenceUnitTest.summary(benchmark.stations, circuits)
+
+    def test_worker_count_invariance(self):
+        expected = self.sequential()
+        self.assertTrue(expected[0])
+        for workers in [1, 2, 3]:
+            self.assertEqual(expected, ParallelInferenceUnitTest.parallel(workers))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import logging
+import re
+import struct
+
+import pyproj
+from shapely.geometry import box
+from shapely.ops import transform
+from shapely.prepared import prep
+from shapely.strtree import STRtree
+
+from Util import Util
+from WkbDecoder import WkbDecoder
+
+try:
+    import osmium
+except ImportError:
+    osmium = None
+
+
+class PowerWayReader(osmium.SimpleHandler if osmium is not None else object):
+    # collects the ways tagged power=* of an OSM file with the locations of their nodes
+    def __init__(self):
+        osmium.SimpleHandler.__init__(self)
+        # tuples of way id, node ids, coordinates and tags as (key, value) pairs in their order
+        self.ways = []
+        self.num_incomplete = 0
+        self.wkb_factory = osmium.geom.WKBFactory()
+
+    def way(self, w):
+        if 'power' not in w.tags:
+            return
+        try:
+            # the coordinates are taken from the WKB the factory builds of the node locations, which is faster than
+            # reading the location of each node, including repeated nodes as osm2pgsql does
+            wkb = bytes(bytearray.fromhex(self.wkb_factory.create_linestring(w, osmium.geom.use_nodes.ALL)))
+        except osmium.InvalidLocationError:
+            # osm2pgsql drops ways of nodes missing in the extract as well
+            self.num_incomplete += 1
+            return
+        values = struct.unpack_from('<%dd' % (2 * struct.unpack_from('<I', wkb, 5)[0]), wkb, 9)
+        self.ways.append((w.id, [node.ref for node in w.nodes], list(zip(values[::2], values[1::2])),
+                          [(tag.k, tag.v) for tag in w.tags]))
+
+
+class PbfSource:
+    # columns of util/power.style, osm2pgsql -k keeps the other tags of polygons in their hstore tags column
+    style_columns = ['power', 'cables', 'voltage', 'wires', 'name', 'ref', 'generator:output:electricity',
+                     'plant:output:electricity']
+
+    # reads the lines and stations of the regions modeled from an OSM PBF file, e.g. the power_extract.pbf of
+    # bash/prepare_pbf.sh, instead of the osm2pgsql import - the power ways of the file are read once with the
+    # locations of their nodes kept in a node location store, and batches selects from them in memory the rows the
+    # queries of Transnet.fetch_region select from the database, with the geometries as EWKB
+    # pbf - path of the OSM file
+    # close_nodes - whether stations within 100m of a line are connected to it, as of Transnet
+    def __init__(self, pbf, close_nodes):
+        if osmium is None:
+            raise ImportError('Reading OSM files needs pyosmium (pip install osmium)')
+        self.pbf = pbf
+        self.close_nodes = close_nodes
+        # rows of the lines and polygons as of the queries, each with its geometry in EPSG:3857
+        self.lines = None
+        self.polygons = None
+
+    # reads the ways of the file into lines and polygons as osm2pgsql would import them - closed ways are polygons,
+    # as power is a polygon tag of the style, other ways are lines
+    def read(self):
+        reader = PowerWayReader()
+        reader.apply_file(self.pbf, locations=True)
+        logging.info('Read %d power ways from %s, %d of them incomplete', len(reader.ways) + reader.num_incomplete,
+                     self.pbf, reader.num_incomplete)
+
+        geod = pyproj.Geod(ellps='WGS84')
+        lines = []
+        polygons = []
+        for (osm_id, nodes, coords, tag_pairs) in reader.ways:
+            tags = dict(tag_pairs)
+            srs_coords = [Util.to_mercator(x, y) for (x, y) in coords]
+            if len(nodes) >= 4 and nodes[0] == nodes[-1] and tags.get('area') != 'no':
+                hstore = ', '.join('"%s"=>"%s"' % (k.replace('\\', '\\\\').replace('"', '\\"'),
+                                                   v.replace('\\', '\\\\').replace('"', '\\"'))
+                                   for (k, v) in tag_pairs if k not in PbfSource.style_columns)
+                polygons.append((osm_id, Util.to_ewkb(coords, 'polygon', 4326), tags['power'], tags.get('name'),
+                                 tags.get('ref'), tags.get('voltage'), tags.get('plant:output:electricity'),
+                                 tags.get('generator:output:electricity'), hstore,
+                                 Util.to_ewkb(srs_coords, 'polygon', 3857)))
+            elif len(nodes) >= 2 and re.search('line|cable|minor_line', tags['power']):
+                lines.append((osm_id, Util.to_ewkb(coords, 'linestring', 4326),
+                              Util.to_ewkb(srs_coords, 'linestring', 3857), tags['power'], tags.get('name'),
+                              tags.get('ref'), tags.get('voltage'), tags.get('cables'), nodes,
+                              [x for tag in tag_pairs for x in tag],
+                              Util.to_ewkb(coords[0], 'point', 4326), Util.to_ewkb(coords[-1], 'point', 4326),
+                              geod.line_length([x for (x, y) in coords], [y for (x, y) in coords])))
+
+        # the centroids are taken in EPSG:3857 as by the queries
+        self.lines = []
+        for (row, srs_geom) in zip(lines, WkbDecoder.decode([row[2] for row in lines])):
+            (lon, lat) = Util.from_mercator(*srs_geom.centroid.coords[0])
+            self.lines.append((row[:12] + (lat, lon) + row[12:], srs_geom))
+        self.polygons = []
+        for (row, srs_polygon) in zip(polygons, WkbDecoder.decode([row[9] for row in polygons])):
+            (lon, lat) = Util.from_mercator(*srs_polygon.centroid.coords[0])
+            self.polygons.append((row[:9] + (lat, lon), srs_polygon))
+        logging.info('Found %d lines and %d polygons', len(self.lines), len(self.polygons))
+
+    # returns the batches of the rows of the lines, substations and generators of the region as the queries of
+    # Transnet.fetch_region give them, of at most batch_size rows each
+    # boundary - boundary of the region in EPSG:4326, None to take the region within 300km of the station ssid
+    def batches(self, boundary, ssid, voltage_levels, batch_size):
+        if self.lines is None:
+            self.read()
+
+        if boundary is not None:
+            in_region = prep(transform(Util.to_mercator, boundary)).intersects
+        else:
+            station_polygons = [srs_polygon for (row, srs_polygon) in self.polygons if row[0] == int(ssid)]
+            in_region = lambda srs_geom: any(srs_geom.distance(p) <= 300000 for p in station_polygons)
+
+        voltage_pattern = re.compile(voltage_levels)
+        line_rows = []
+        srs_lines = []
+        for (row, srs_geom) in self.lines:
+            voltage = row[6]
+            if voltage is not None and voltage_pattern.search(voltage) and in_region(srs_geom):
+                line_rows.append(row)
+                srs_lines.append(srs_geom)
+
+        line_ids_by_geom_id = dict((id(srs_geom), row[0]) for (row, srs_geom) in zip(line_rows, srs_lines))
+        tree = STRtree(srs_lines) if srs_lines else None
+        distance = 100 if self.close_nodes else 0
+        substation_rows = []
+        generator_rows = []
+        for ((osm_id, geom, power, name, ref, voltage, output1, output2, tags, lat, lon),
+             srs_polygon) in self.polygons:
+            is_substation = re.search('substation|station|sub_station', power) and (
+                not voltage or voltage_pattern.search(voltage))
+            is_generator = re.search('plant|generator', power)
+            if tree is None or not (is_substation or is_generator):
+                continue
+            (min_x, min_y, max_x, max_y) = srs_polygon.bounds
+            line_ids = [line_ids_by_geom_id[id(srs_geom)] for srs_geom in
+                        tree.query(box(min_x - distance, min_y - distance, max_x + distance, max_y + distance))
+                        if (srs_geom.distance(srs_polygon) < distance if distance
+                            else srs_geom.intersects(srs_polygon))]
+            if not line_ids:
+                continue
+            if is_substation:
+                substation_rows.append((osm_id, geom, power, name, ref, voltage, tags, lat, lon, line_ids))
+            if is_generator:
+                generator_rows.append((osm_id, geom, power, name, ref, voltage, output1, output2, tags, lat, lon,
+                                       line_ids))
+
+        return [[rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+                for rows in [line_rows, substation_rows, generator_rows]]
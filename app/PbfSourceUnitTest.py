@@ -0,0 +1,59 @@
+import unittest
+from os.path import abspath, dirname, join
+
+from shapely import wkb
+from shapely.geometry import box
+
+from PbfSource import PbfSource, osmium
+
+
+@unittest.skipIf(osmium is None, 'needs pyosmium')
+class PbfSourceUnitTest(unittest.TestCase):
+    # hand written OSM file of a 380kV line with substations at 0m, about 70m and about 170m and a plant
+    fixture = join(dirname(abspath(__file__)), 'fixtures', 'pbf_source.osm')
+
+    # returns the lines, substations and generators rows of the fixture as batches gives them
+    @staticmethod
+    def fetch(close_nodes):
+        return [[row for batch in batches for row in batch] for batches in
+                PbfSource(PbfSourceUnitTest.fixture, close_nodes).batches(box(9.9, 49.9, 10.1, 50.1), None,
+                                                                          '380000', 2)]
+
+    def test_lines(self):
+        (lines, substations, generators) = PbfSourceUnitTest.fetch(False)
+        # the closed way 11 is a line as of area=no, the closed way 12 a polygon, the line 13 of another voltage
+        self.assertEqual([10, 11], [row[0] for row in lines])
+        (osm_id, geom, srs_geom, power, name, ref, voltage, cables, nodes, tags, first_node, last_node, lat, lon,
+         length) = lines[0]
+        self.assertEqual(('line', 'Line 10', None, '380000', '3', [1, 2, 3]),
+                         (power, name, ref, voltage, cables, nodes))
+        self.assertEqual(['power', 'line', 'voltage', '380000', 'cables', '3', 'name', 'Line 10'], tags)
+        self.assertEqual('LineString', wkb.loads(bytes(geom)).geom_type)
+        self.assertEqual([(10.0, 50.0), (10.02, 50.0)],
+                         [wkb.loads(bytes(first_node)).coords[0], wkb.loads(bytes(last_node)).coords[0]])
+        self.assertAlmostEqual(50.0, lat, places=6)
+        self.assertAlmostEqual(10.01, lon, places=6)
+        self.assertAlmostEqual(1433.9, length, delta=1)
+        self.assertEqual(('cable', [1, 4, 5, 1]), (lines[1][3], lines[1][8]))
+        self.assertEqual('LineString', wkb.loads(bytes(lines[1][1])).geom_type)
+
+    def test_stations(self):
+        (lines, substations, generators) = PbfSourceUnitTest.fetch(False)
+        # the substations 30 and 40 are not on a line
+        self.assertEqual([(20, 'substation', 'Substation 20', '380000', '"operator"=>"TSO"', [10])],
+                         [(row[0], row[2], row[3], row[5], row[6], row[9]) for row in substations])
+        self.assertEqual('Polygon', wkb.loads(bytes(substations[0][1])).geom_type)
+        self.assertAlmostEqual(50.0, substations[0][7], places=6)
+        self.assertAlmostEqual(10.02, substations[0][8], places=6)
+        self.assertEqual([(50, 'plant', '100 MW', None, [10])],
+                         [(row[0], row[2], row[6], row[7], row[11]) for row in generators])
+
+    def test_close_nodes(self):
+        (lines, substations, generators) = PbfSourceUnitTest.fetch(True)
+        # the substation 30 is within 100m of the line, the substation 40 is not
+        self.assertEqual([(20, [10]), (30, [10])], [(row[0], row[9]) for row in substations])
+        self.assertEqual([(50, [10])], [(row[0], row[11]) for row in generators])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -40,7 +40,7 @@ class PolyParser:
 
             elif in_ring:
                 # we are in a ring and picking up new coordinates.
-                ring.append(map(float, line.split()))
+                ring.append([float(value) for value in line.split()])
 
             elif not in_ring and line.strip() == 'END':
                 # we are at the end of the whole polygon.
@@ -0,0 +1,217 @@
+import logging
+import sys
+import time
+from array import array
+from optparse import OptionParser
+
+import numpy as np
+from shapely.prepared import prep
+from shapely.vectorized import contains
+
+from PolyParser import PolyParser
+
+try:
+    import osmium
+except ImportError:
+    osmium = None
+
+root = logging.getLogger()
+root.setLevel(logging.INFO)
+
+
+class PowerExtractor:
+    # extracts the power data of a region from an OSM file in two passes over it, as the osmosis filters of
+    # prepare_db.sh did in three passes and two merges - the extract holds the ways tagged power=* and the member ways
+    # of the relations tagged route=power with a node within the boundary with all of their nodes, of which the ones
+    # tagged power=* keep their tags, the other nodes tagged power=* within the boundary, the relations tagged
+    # power=* or route=power with a member in the extract and all member ways of the ones tagged route=power with
+    # their nodes, as of completeRelations and completeWays of osmosis
+    # the first pass reads the ways and relations only to find the ids of the ways to read, the second the nodes and
+    # these ways
+    # the locations of all nodes of the file are kept in the node location storage of osmium while reading, the ways
+    # and relations of the extract are collected and written after the nodes once the file has been read, so that the
+    # extract is sorted as osm2pgsql expects - the memory needed besides the node location storage grows with the
+    # extract instead of the file
+    # boundary - boundary of the region, None to extract the power data of the whole file
+    # location_storage - node location storage of osmium, e.g. dense_file_array,<file> to keep the locations of a
+    #  continent or the planet in a file instead of memory
+    def __init__(self, boundary, location_storage):
+        if osmium is None:
+            raise ImportError('Extracting from OSM files needs pyosmium (pip install osmium)')
+        self.location_storage = location_storage
+        self.boundary = prep(boundary) if boundary is not None else None
+        # most of the nodes tested are far outside of the boundary and rejected by its bounds
+        self.bounds = boundary.bounds if boundary is not None else None
+
+    # whether the node at lon, lat is within the bounds of the boundary
+    def within_bounds(self, lon, lat):
+        if self.bounds is None:
+            return True
+        (min_x, min_y, max_x, max_y) = self.bounds
+        return min_x <= lon <= max_x and min_y <= lat <= max_y
+
+    # returns whether each of the nodes at the coordinates, an array of lon, lat rows, is within the boundary
+    def inside(self, coords):
+        if self.boundary is None:
+            return np.ones(len(coords), dtype=bool)
+        (min_x, min_y, max_x, max_y) = self.bounds
+        (lons, lats) = (coords[:, 0], coords[:, 1])
+        candidates = (lons >= min_x) & (lons <= max_x) & (lats >= min_y) & (lats <= max_y)
+        if candidates.any():
+            candidates[candidates] = contains(self.boundary, lons[candidates], lats[candidates])
+        return candidates
+
+    # whether any of the nodes at the coordinates, an array of lon, lat rows, is within the boundary
+    def within(self, coords):
+        return bool(self.inside(coords).any())
+
+    # returns the ids of the nodes of the way, refs, which are in the file and an array of their lon, lat rows
+    @staticmethod
+    def locate(way, refs, wkb_factory):
+        try:
+            # the coordinates are taken from the WKB of the way, which is faster than reading the location of each node
+            coords = np.frombuffer(bytearray.fromhex(wkb_factory.create_linestring(way, osmium.geom.use_nodes.ALL)),
+                                   dtype='<f8', offset=9).reshape(-1, 2)
+        except (osmium.InvalidLocationError, RuntimeError):
+            # the way has nodes missing in the file or less than two nodes
+            located = [(node.ref, node.lon, node.lat) for node in way.nodes if node.location.valid()]
+            refs = [ref for (ref, lon, lat) in located]
+            coords = np.array([(lon, lat) for (ref, lon, lat) in located], dtype='<f8').reshape(-1, 2)
+        return refs, coords
+
+    # whether the sorted ids contain the id
+    @staticmethod
+    def contains(ids, id_):
+        i = np.searchsorted(ids, id_)
+        return i < len(ids) and ids[i] == id_
+
+    # returns the sorted ids of the ways tagged power=* and the sorted ids of the member ways of the relations tagged
+    # route=power of the OSM file source
+    @staticmethod
+    def way_ids(source):
+        (power_way_ids, member_way_ids) = (array('q'), array('q'))
+        processor = osmium.FileProcessor(source, osmium.osm.WAY | osmium.osm.RELATION) \
+            .with_filter(osmium.filter.KeyFilter('power', 'route'))
+        for obj in processor:
+            if obj.is_way():
+                if 'power' in obj.tags:
+                    power_way_ids.append(obj.id)
+            elif obj.tags.get('route') == 'power':
+                member_way_ids.extend(member.ref for member in obj.members if member.type == 'w')
+        return [np.unique(np.frombuffer(ids, dtype=np.int64) if ids else np.zeros(0, np.int64))
+                for ids in (power_way_ids, member_way_ids)]
+
+    # writes the power data of the OSM file source within the boundary to the OSM file destination
+    def extract(self, source, destination):
+        start = time.time()
+        (power_way_ids, member_way_ids) = PowerExtractor.way_ids(source)
+        wkb_factory = osmium.geom.WKBFactory()
+        # tags of the power nodes within the bounds of the boundary by id, the nodes of ways crossing the boundary
+        # keep their tags as well - most of them are towers with the same tags, which are kept once
+        node_tags = dict()
+        distinct_tags = dict()
+        # ids and lon, lat pairs of the power nodes within the bounds of the boundary
+        power_node_ids = array('q')
+        power_node_coords = array('d')
+        # ids and lon, lat pairs of the nodes of the ways extracted which are in the file, with duplicates
+        node_ids = array('q')
+        node_coords = array('d')
+        ways = []
+        way_ids = set()
+        # the member ways of relations tagged route=power without a node within the boundary by id, which are
+        # extracted if the relation is
+        member_ways = dict()
+        relations = []
+
+        processor = osmium.FileProcessor(source).with_locations(self.location_storage) \
+            .with_filter(osmium.filter.KeyFilter('power').enable_for(osmium.osm.NODE)) \
+            .with_filter(osmium.filter.IdFilter(np.union1d(power_way_ids, member_way_ids).tolist())
+                         .enable_for(osmium.osm.WAY)) \
+            .with_filter(osmium.filter.KeyFilter('power', 'route').enable_for(osmium.osm.RELATION))
+        for obj in processor:
+            if obj.is_node():
+                (lon, lat) = (obj.location.lon, obj.location.lat)
+                if self.within_bounds(lon, lat):
+                    tags = tuple((tag.k, tag.v) for tag in obj.tags)
+                    node_tags[obj.id] = distinct_tags.setdefault(tags, tags)
+                    power_node_ids.append(obj.id)
+                    power_node_coords.extend((lon, lat))
+            elif obj.is_way():
+                refs = [node.ref for node in obj.nodes]
+                (located_refs, coords) = PowerExtractor.locate(obj, refs, wkb_factory)
+                if not located_refs:
+                    continue
+                way = (obj.id, refs, [(tag.k, tag.v) for tag in obj.tags])
+                if not self.within(coords):
+                    if PowerExtractor.contains(member_way_ids, obj.id):
+                        member_ways[obj.id] = (way, located_refs, coords)
+                    continue
+                ways.append(way)
+                way_ids.add(obj.id)
+                node_ids.extend(located_refs)
+                node_coords.frombytes(coords.tobytes())
+            elif obj.is_relation():
+                if 'power' not in obj.tags and obj.tags.get('route') != 'power':
+                    continue
+                relations.append((obj.id, [(member.type, member.ref, member.role) for member in obj.members],
+                                  [(tag.k, tag.v) for tag in obj.tags]))
+        read_seconds = time.time() - start
+
+        # the power nodes within the boundary are extracted without a way as well
+        power_node_coords = (np.frombuffer(power_node_coords) if power_node_coords else np.zeros(0)).reshape(-1, 2)
+        inside = self.inside(power_node_coords)
+        node_ids.frombytes(np.frombuffer(power_node_ids, dtype=np.int64)[inside].tobytes() if power_node_ids else b'')
+        node_coords.frombytes(power_node_coords[inside].tobytes())
+        # the nodes of relations are extracted with the ways only
+        extracted_node_ids = np.unique(np.frombuffer(node_ids, dtype=np.int64) if node_ids else np.zeros(0, np.int64))
+        relations = [(relation_id, members, tags) for (relation_id, members, tags) in relations
+                     if any(ref in way_ids for (member_type, ref, role) in members if member_type == 'w') or
+                     any(PowerExtractor.contains(extracted_node_ids, ref) for (member_type, ref, role) in members
+                         if member_type == 'n')]
+        for (relation_id, members, tags) in relations:
+            if ('route', 'power') not in tags:
+                continue
+            for (member_type, ref, role) in members:
+                if member_type == 'w' and ref in member_ways:
+                    (way, located_refs, coords) = member_ways.pop(ref)
+                    ways.append(way)
+                    node_ids.extend(located_refs)
+                    node_coords.frombytes(coords.tobytes())
+        ways.sort(key=lambda way: way[0])
+        (node_ids, first) = np.unique(np.frombuffer(node_ids, dtype=np.int64) if node_ids else np.zeros(0, np.int64),
+                                      return_index=True)
+        node_coords = (np.frombuffer(node_coords) if node_coords else np.zeros(0)).reshape(-1, 2)[first].tolist()
+        writer = osmium.SimpleWriter(destination, overwrite=True)
+        try:
+            for (node_id, (lon, lat)) in zip(node_ids.tolist(), node_coords):
+                writer.add_node(osmium.osm.mutable.Node(id=node_id, location=(lon, lat),
+                                                        tags=node_tags.get(node_id, ())))
+            for (way_id, refs, tags) in ways:
+                writer.add_way(osmium.osm.mutable.Way(id=way_id, nodes=refs, tags=tags))
+            for (relation_id, members, tags) in relations:
+                writer.add_relation(osmium.osm.mutable.Relation(id=relation_id, members=members, tags=tags))
+        finally:
+            writer.close()
+        root.info('Extracted %d nodes, %d ways and %d relations from %s to %s, reading took %.1f s, writing %.1f s',
+                  len(node_ids), len(ways), len(relations), source, destination, read_seconds,
+                  time.time() - start - read_seconds)
+
+
+if __name__ == '__main__':
+    parser = OptionParser()
+    parser.add_option("-i", "--input", action="store", dest="input",
+                      help="OSM file to extract the power data from, e.g. a dump of a country")
+    parser.add_option("-p", "--poly", action="store", dest="poly",
+                      help="poly file of the boundary of the region to extract, the whole file if not given")
+    parser.add_option("-o", "--output", action="store", dest="output",
+                      help="OSM file to write the extract to, e.g. power_extract.pbf")
+    parser.add_option("-x", "--locations", action="store", dest="locations", default="flex_mem",
+                      help="node location storage of osmium, e.g. dense_file_array,<file> for continents, "
+                           "default flex_mem")
+    (options, args) = parser.parse_args()
+    if not options.input or not options.output:
+        parser.error('The input and output files are required')
+
+    root.addHandler(logging.StreamHandler(sys.stdout))
+    PowerExtractor(PolyParser.poly_to_polygon(options.poly) if options.poly else None,
+                   options.locations).extract(options.input, options.output)
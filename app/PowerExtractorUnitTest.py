@@ -0,0 +1,81 @@
+import shutil
+import tempfile
+import unittest
+from os.path import abspath, dirname, join
+
+import numpy as np
+from shapely.geometry import Polygon
+
+from PolyParser import PolyParser
+from PowerExtractor import PowerExtractor, osmium
+
+
+class PowerExtractorUnitTest(unittest.TestCase):
+    fixtures = join(dirname(abspath(__file__)), 'fixtures')
+
+    # returns the type, id, tags and location, node ids or members of the objects of the OSM file
+    @staticmethod
+    def objects(path):
+        objects = []
+        for obj in osmium.FileProcessor(path):
+            if obj.is_node():
+                data = (obj.location.lon, obj.location.lat)
+            elif obj.is_way():
+                data = [node.ref for node in obj.nodes]
+            else:
+                data = [(member.type, member.ref, member.role) for member in obj.members]
+            objects.append((obj.type_str(), obj.id, dict(obj.tags), data))
+        return objects
+
+    def test_contains(self):
+        ids = np.array([3, 5, 8], dtype=np.int64)
+        self.assertTrue(PowerExtractor.contains(ids, 5))
+        self.assertFalse(PowerExtractor.contains(ids, 4))
+        self.assertFalse(PowerExtractor.contains(ids, 9))
+
+    @unittest.skipIf(osmium is None, 'needs pyosmium')
+    def test_extract(self):
+        directory = tempfile.mkdtemp()
+        try:
+            source = '{0}/source.osm.pbf'.format(directory)
+            writer = osmium.SimpleWriter(source)
+            for (node_id, lon, tags) in [(1, 0.5, {'power': 'tower'}), (2, 1.7, {'power': 'tower'}), (3, 2.5, {}),
+                                         (4, 0.6, {'highway': 'crossing'}), (5, 3.5, {'power': 'tower'})]:
+                writer.add_node(osmium.osm.mutable.Node(id=node_id, location=(lon, 0.5), tags=tags))
+            # a line crossing the boundary, a road within it, which is extracted as a member of the relation 1, and a
+            # line outside of it - node 2 is outside of the boundary but within its bounds
+            writer.add_way(osmium.osm.mutable.Way(id=1, nodes=[1, 2, 3], tags={'power': 'line'}))
+            writer.add_way(osmium.osm.mutable.Way(id=2, nodes=[4, 1], tags={'highway': 'residential'}))
+            writer.add_way(osmium.osm.mutable.Way(id=3, nodes=[3, 5], tags={'power': 'line'}))
+            writer.add_relation(osmium.osm.mutable.Relation(id=1, members=[('w', 1, ''), ('w', 2, '')],
+                                                            tags={'type': 'route', 'route': 'power'}))
+            writer.add_relation(osmium.osm.mutable.Relation(id=2, members=[('w', 3, '')],
+                                                            tags={'type': 'route', 'route': 'power'}))
+            writer.add_relation(osmium.osm.mutable.Relation(id=3, members=[('w', 1, '')],
+                                                            tags={'type': 'route', 'route': 'bus'}))
+            writer.close()
+
+            destination = '{0}/power_extract.osm.pbf'.format(directory)
+            PowerExtractor(Polygon([(0, 0), (2, 0), (0, 2)]), 'flex_mem').extract(source, destination)
+            extract = [(obj.type_str(), obj.id, dict(obj.tags)) for obj in osmium.FileProcessor(destination)]
+            self.assertEqual([('n', 1, {'power': 'tower'}), ('n', 2, {'power': 'tower'}), ('n', 3, {}), ('n', 4, {}),
+                              ('w', 1, {'power': 'line'}), ('w', 2, {'highway': 'residential'}),
+                              ('r', 1, {'type': 'route', 'route': 'power'})], extract)
+        finally:
+            shutil.rmtree(directory)
+
+    # not skipped without pyosmium, as the extract replaces the osmosis filters
+    def test_extract_as_osmosis(self):
+        directory = tempfile.mkdtemp()
+        try:
+            destination = '{0}/power_extract.osm.pbf'.format(directory)
+            boundary = PolyParser.poly_to_polygon(join(self.fixtures, 'power_extractor.poly'))
+            PowerExtractor(boundary, 'flex_mem').extract(join(self.fixtures, 'power_extractor.osm'), destination)
+            self.assertEqual(PowerExtractorUnitTest.objects(join(self.fixtures, 'power_extractor_osmosis.osm')),
+                             PowerExtractorUnitTest.objects(destination))
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
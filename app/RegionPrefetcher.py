@@ -0,0 +1,82 @@
+import logging
+import time
+from multiprocessing.pool import ThreadPool
+
+from psycopg2.pool import ThreadedConnectionPool
+
+from BoundaryTable import BoundaryTable
+from PolyParser import PolyParser
+from WkbDecoder import WkbDecoder
+
+
+class RegionPrefetcher:
+    # fetches the lines and stations of regions ahead in threads, each on a database connection of a pool of its own,
+    # while the region fetched before is modeled - the threads spend their time waiting for the database, which
+    # releases the interpreter to the modeling, so that queries and processing overlap instead of taking turns
+    # fetch_region - function returning the region of a condition on the lines, read by a connection for voltage
+    #  levels within a boundary, as Transnet.fetch_region
+    # password, connection - database connection settings as of Transnet
+    # depth - number of regions fetched ahead at most besides the one to model next
+    def __init__(self, fetch_region, password, connection, depth):
+        self.fetch_region = fetch_region
+        self.depth = depth
+        # connections are opened by the fetches as needed
+        self.connections = ThreadedConnectionPool(0, depth + 1, password=password, **connection)
+        self.threads = ThreadPool(depth + 1)
+        # pending fetches by key
+        self.fetches = dict()
+
+        self.num_regions = 0
+        self.fetch_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    # whether fewer than depth regions are fetched ahead besides the one to model next
+    def has_capacity(self):
+        return len(self.fetches) <= self.depth
+
+    def is_submitted(self, key):
+        return key in self.fetches
+
+    # starts fetching the region within the boundary of the poly file for the voltage levels
+    def submit(self, key, poly, voltage_levels):
+        self.fetches[key] = self.threads.apply_async(self.fetch, (poly, voltage_levels))
+
+    # returns the region of key as fetch_region does, waiting for its fetch to finish
+    def get(self, key):
+        fetch = self.fetches.pop(key)
+        start = time.time()
+        try:
+            (region, fetch_seconds) = fetch.get()
+        finally:
+            wait_seconds = time.time() - start
+            self.wait_seconds += wait_seconds
+        self.num_regions += 1
+        self.fetch_seconds += fetch_seconds
+        logging.info('Fetched region of %s ahead in %.1f s, waited %.1f s for it', key, fetch_seconds, wait_seconds)
+        return region
+
+    # runs in a thread of the pool, returns the region and the seconds taken to fetch it
+    def fetch(self, poly, voltage_levels):
+        start = time.time()
+        conn = self.connections.getconn()
+        try:
+            WkbDecoder.register(conn)
+            boundary = PolyParser.poly_to_polygon(poly)
+            BoundaryTable.load(conn.cursor(), boundary)
+            region = self.fetch_region(BoundaryTable.intersects('l.way'), conn, voltage_levels, boundary)
+            return region, time.time() - start
+        finally:
+            # ends the read only transaction, a failed query would abort the next fetches on the connection otherwise
+            conn.rollback()
+            self.connections.putconn(conn)
+
+    # logs how much of the fetching overlapped with the processing and releases threads and connections - regions
+    # fetched ahead but not taken are discarded
+    def close(self):
+        self.threads.terminate()
+        self.threads.join()
+        self.connections.closeall()
+        overlap_seconds = max(self.fetch_seconds - self.wait_seconds, 0.0)
+        logging.info('Prefetched %d regions: fetching took %.1f s, waiting for it %.1f s, %.0f%% of the fetching '
+                     'overlapped with modeling', self.num_regions, self.fetch_seconds, self.wait_seconds,
+                     100.0 * overlap_seconds / self.fetch_seconds if self.fetch_seconds else 0.0)
@@ -0,0 +1,81 @@
+import logging
+import time
+import unittest
+
+from RegionPrefetcher import RegionPrefetcher
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class FakePool:
+    def __init__(self):
+        self.closed = False
+
+    def closeall(self):
+        self.closed = True
+
+
+class RegionPrefetcherUnitTest(unittest.TestCase):
+    def setUp(self):
+        self.handler = ListHandler()
+        logging.getLogger().addHandler(self.handler)
+        logging.getLogger().setLevel(logging.INFO)
+
+    def tearDown(self):
+        logging.getLogger().removeHandler(self.handler)
+
+    def test_lifecycle(self):
+        # the pool opens no connection before the first fetch
+        prefetcher = RegionPrefetcher(None, None, {'database': 'transnet_test'}, 1)
+        prefetcher.connections = FakePool()
+        # the fetches take 2 s as measured in their thread, while the modeling waits for them briefly
+        prefetcher.fetch = lambda poly, voltage_levels: ((poly, voltage_levels), 2.0)
+        self.assertTrue(prefetcher.has_capacity())
+        prefetcher.submit('austria', 'austria.poly', '380000')
+        prefetcher.submit('germany', 'germany.poly', '380000')
+        self.assertFalse(prefetcher.has_capacity())
+        self.assertTrue(prefetcher.is_submitted('germany'))
+
+        self.assertEqual(('austria.poly', '380000'), prefetcher.get('austria'))
+        self.assertFalse(prefetcher.is_submitted('austria'))
+        self.assertTrue(prefetcher.has_capacity())
+        time.sleep(0.1)
+        self.assertEqual(('germany.poly', '380000'), prefetcher.get('germany'))
+        prefetcher.submit('france', 'france.poly', '380000')
+        prefetcher.close()
+
+        self.assertTrue(prefetcher.connections.closed)
+        self.assertEqual(2, prefetcher.num_regions)
+        self.assertEqual(4.0, prefetcher.fetch_seconds)
+        self.assertLess(prefetcher.wait_seconds, 1.0)
+        self.assertIn('Prefetched 2 regions: fetching took 4.0 s, waiting for it %.1f s, %.0f%% of the fetching '
+                      'overlapped with modeling' % (prefetcher.wait_seconds,
+                                                    100.0 * (4.0 - prefetcher.wait_seconds) / 4.0),
+                      self.handler.messages)
+
+    def test_failed_fetch(self):
+        prefetcher = RegionPrefetcher(None, None, {'database': 'transnet_test'}, 1)
+        prefetcher.connections = FakePool()
+
+        def fetch(poly, voltage_levels):
+            raise IOError('No such poly file {0}'.format(poly))
+
+        prefetcher.fetch = fetch
+        prefetcher.submit('austria', 'austria.poly', '380000')
+        self.assertRaises(IOError, prefetcher.get, 'austria')
+        self.assertFalse(prefetcher.is_submitted('austria'))
+        prefetcher.close()
+        self.assertEqual(0, prefetcher.num_regions)
+        self.assertIn('Prefetched 0 regions: fetching took 0.0 s, waiting for it %.1f s, 0%% of the fetching '
+                      'overlapped with modeling' % prefetcher.wait_seconds, self.handler.messages)
+
+
+if __name__ == '__main__':
+    unittest.main()
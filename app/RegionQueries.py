@@ -0,0 +1,92 @@
+class RegionQueries:
+    # builds the queries of the equipment of a region, independent of a Transnet instance and of a database
+    # connection so that they are built and checked without either
+    def __init__(self):
+        pass
+
+    # the conditions on the power tag of lines, substations and generators, which are the predicates of the partial
+    # indexes of sql/transnet_indexes.sql - the planner uses a partial index only where it proves the predicate from
+    # the conditions of the query, for a regular expression only by the same operator with the same pattern, so the
+    # queries take the conditions from here and the patterns must not change without the indexes, not even to an
+    # equivalent pattern or an IN list
+    @staticmethod
+    def is_line(alias):
+        return "%s.power ~ 'line|cable|minor_line'" % alias
+
+    @staticmethod
+    def is_substation(alias):
+        return "%s.power ~ 'substation|station|sub_station'" % alias
+
+    @staticmethod
+    def is_generator(alias):
+        return "%s.power ~ 'plant|generator'" % alias
+
+    # returns the condition that line l passes closer than 100 meters to station p, as st_intersects(l.way, p.way)
+    # OR st_distance(l.way, p.way) < 100 did - ST_DWithin lets the gist indexes find the candidates but includes a
+    # distance of exactly 100 meters, which the st_distance check excludes
+    @staticmethod
+    def is_close():
+        return 'ST_DWithin(l.way, p.way, 100) AND st_distance(l.way, p.way) < 100'
+
+    # returns the query of the lines matching the condition on planet_osm_line l, with their geometry and end points
+    # built from planet_osm_nodes as create_line and create_point do - the nodes of all lines are joined and
+    # aggregated in one set based query instead of two function calls and subqueries per line, or read from
+    # transnet_lines if built - the columns are the ones LineStore unpacks, the lines are ordered as the condition
+    # selects them
+    # topology_tables - whether the tables of sql/transnet_topology.sql are built
+    @staticmethod
+    def lines(topology_tables, condition):
+        if topology_tables:
+            return '''SELECT l.osm_id AS id,
+                      ST_AsEWKB(l.geom) AS geom,
+                      ST_AsEWKB(l.way) AS srs_geom,
+                      l.power AS type,
+                      l.name,
+                      l.ref,
+                      l.voltage,
+                      l.cables,
+                      l.nodes,
+                      l.tags,
+                      ST_AsEWKB(l.first_node_geom) AS first_node_geom,
+                      ST_AsEWKB(l.last_node_geom) AS last_node_geom,
+                      l.lat,
+                      l.lon,
+                      l.spheric_length
+                    FROM transnet_lines l
+                    WHERE %s''' % condition
+        return '''WITH lines AS (
+                    SELECT row_number() OVER () AS row_id, l.osm_id, l.way, l.power, l.name, l.ref, l.voltage,
+                      l.cables, w.nodes, w.tags
+                    FROM planet_osm_line l, planet_osm_ways w
+                    WHERE l.osm_id = w.id AND %s),
+                  line_nodes AS (
+                    SELECT u.row_id, u.ordinality, u.ordinality = array_length(u.nodes, 1) AS is_last,
+                      ST_SetSRID(ST_MakePoint(n.lon / 100.0, n.lat / 100.0), 3857) AS point
+                    FROM (SELECT row_id, nodes, node, ordinality
+                          FROM lines, unnest(lines.nodes) WITH ORDINALITY AS w(node, ordinality)) u,
+                      planet_osm_nodes n
+                    WHERE n.id = u.node),
+                  line_geoms AS (
+                    SELECT row_id,
+                      st_makeline(array_agg(point ORDER BY ordinality)) AS geom,
+                      (array_agg(point) FILTER (WHERE ordinality = 1))[1] AS first_point,
+                      (array_agg(point) FILTER (WHERE is_last))[1] AS last_point
+                    FROM line_nodes
+                    GROUP BY row_id)
+                SELECT l.osm_id AS id,
+                  ST_AsEWKB(st_transform(g.geom, 4326)) AS geom,
+                  ST_AsEWKB(l.way) AS srs_geom,
+                  l.power AS type,
+                  l.name,
+                  l.ref,
+                  l.voltage,
+                  l.cables,
+                  l.nodes,
+                  l.tags,
+                  ST_AsEWKB(st_transform(g.first_point, 4326)) AS first_node_geom,
+                  ST_AsEWKB(st_transform(g.last_point, 4326)) AS last_node_geom,
+                  ST_Y(ST_Transform(ST_Centroid(l.way),4326)) AS lat,
+                  ST_X(ST_Transform(ST_Centroid(l.way),4326)) AS lon,
+                  st_length(st_transform(l.way, 4326), TRUE) AS spheric_length
+                FROM lines l LEFT JOIN line_geoms g ON g.row_id = l.row_id
+                ORDER BY l.row_id''' % condition
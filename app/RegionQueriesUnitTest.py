@@ -0,0 +1,110 @@
+import re
+import unittest
+from os.path import dirname, join
+
+from BoundaryTable import BoundaryTable
+from RegionQueries import RegionQueries
+
+
+class RegionQueriesUnitTest(unittest.TestCase):
+    # columns LineStore unpacks the rows of the line query into
+    line_columns = ['id', 'geom', 'srs_geom', 'type', 'name', 'ref', 'voltage', 'cables', 'nodes', 'tags',
+                    'first_node_geom', 'last_node_geom', 'lat', 'lon', 'spheric_length']
+
+    def setUp(self):
+        self.condition = "l.voltage ~ '380000' AND %s" % BoundaryTable.intersects('l.way')
+
+    # returns the parts of the sql separated by the separator outside of parentheses and quotes
+    @staticmethod
+    def split(sql, separator):
+        parts = ['']
+        depth = 0
+        quoted = False
+        for char in sql:
+            if char == "'":
+                quoted = not quoted
+            elif not quoted and char == '(':
+                depth += 1
+            elif not quoted and char == ')':
+                depth -= 1
+            if char == separator and depth == 0 and not quoted:
+                parts.append('')
+            else:
+                parts[-1] += char
+        return parts
+
+    # returns the sql outside of parentheses, with the content of the parentheses left out
+    @staticmethod
+    def top_level(sql):
+        text = ''
+        depth = 0
+        for char in sql:
+            if char == ')':
+                depth -= 1
+            if depth == 0:
+                text += char
+            if char == '(':
+                depth += 1
+        return ' '.join(text.split())
+
+    # returns the names of the columns of the outermost select of the sql
+    @staticmethod
+    def select_columns(sql):
+        select = sql[sql.rindex('SELECT l.osm_id AS id'):]
+        select_list = re.split(r'\sFROM\s', select, 1)[0][len('SELECT'):]
+        return [item.split()[-1].split('.')[-1] for item in RegionQueriesUnitTest.split(select_list, ',')]
+
+    # returns the common table expressions of the sql by their name
+    @staticmethod
+    def ctes(sql):
+        expressions = dict()
+        for part in RegionQueriesUnitTest.split(sql[:sql.rindex('SELECT l.osm_id AS id')].strip()[len('WITH'):],
+                                                ','):
+            (name, body) = part.split(' AS ', 1)
+            body = body.strip()
+            expressions[name.strip()] = ' '.join(body[1:-1].split())
+        return expressions
+
+    def test_lines(self):
+        sql = RegionQueries.lines(False, self.condition)
+        self.assertEqual(0, sql.count('(') - sql.count(')'))
+        self.assertEqual(RegionQueriesUnitTest.line_columns, RegionQueriesUnitTest.select_columns(sql))
+        ctes = RegionQueriesUnitTest.ctes(sql)
+        self.assertEqual(['line_geoms', 'line_nodes', 'lines'], sorted(ctes.keys()))
+        # the condition selects the lines, before their nodes are joined
+        self.assertTrue(ctes['lines'].endswith('WHERE l.osm_id = w.id AND %s' % self.condition))
+        self.assertNotIn(self.condition, sql[sql.rindex('SELECT l.osm_id AS id'):])
+        # the points of a line are aggregated in the order of its nodes, one row per line
+        self.assertIn('st_makeline(array_agg(point ORDER BY ordinality)) AS geom', ctes['line_geoms'])
+        self.assertTrue(ctes['line_geoms'].endswith('FROM line_nodes GROUP BY row_id'))
+        self.assertIn('WITH ORDINALITY AS w(node, ordinality)', ctes['line_nodes'])
+        # the lines lacking nodes are kept and returned in the order the condition selects them
+        self.assertTrue(RegionQueriesUnitTest.top_level(sql).endswith(
+            'FROM lines l LEFT JOIN line_geoms g ON g.row_id = l.row_id ORDER BY l.row_id'))
+        # the geometries of all lines are built by a single statement instead of a function call per line
+        self.assertNotIn('create_line', sql)
+        self.assertNotIn('create_point', sql)
+
+    def test_lines_of_topology_tables(self):
+        sql = RegionQueries.lines(True, self.condition)
+        self.assertEqual(RegionQueriesUnitTest.line_columns, RegionQueriesUnitTest.select_columns(sql))
+        self.assertTrue(RegionQueriesUnitTest.top_level(sql).endswith(
+            'FROM transnet_lines l WHERE %s' % RegionQueriesUnitTest.top_level(self.condition)))
+        self.assertNotIn('planet_osm_ways', sql)
+
+    # the conditions of the queries are the predicates of the partial indexes, as the planner matches them
+    def test_index_predicates(self):
+        with open(join(dirname(__file__), '..', 'sql', 'transnet_indexes.sql')) as indexes_file:
+            predicates = set(re.findall(r'WHERE (.*);', indexes_file.read()))
+        self.assertEqual(set([RegionQueries.is_line(''), RegionQueries.is_substation(''),
+                              RegionQueries.is_generator('')]), set('.' + predicate for predicate in predicates))
+        self.assertEqual("l.power ~ 'line|cable|minor_line'", RegionQueries.is_line('l'))
+
+    def test_is_close(self):
+        # ST_DWithin includes a distance of exactly 100 meters, the query does not
+        self.assertIn('ST_DWithin(l.way, p.way, 100)', RegionQueries.is_close())
+        self.assertIn('st_distance(l.way, p.way) < 100', RegionQueries.is_close())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,310 @@
+import logging
+
+from Circuit import Circuit
+from CloseNodeMatcher import CloseNodeMatcher
+from LineIndex import LineIndex
+from NeighborhoodIndex import NeighborhoodIndex
+from Station import Station
+from StationIndex import StationIndex
+
+root = logging.getLogger()
+
+
+class RelationInference:
+    # infers the circuits between the stations of one region and voltage level
+    # stations - dict of all stations of the region and voltage level
+    # lines - dict of all lines of the region and voltage level
+    # close_nodes - whether lines starting close to a station are connected to it
+    # geod - pyproj.Geod used to measure the distance of close nodes
+    def __init__(self, stations, lines, close_nodes, geod):
+        self.stations = stations
+        self.lines = lines
+        self.close_nodes = close_nodes
+        # build the station and line indices once for the whole region and voltage level
+        self.station_index = StationIndex(stations)
+        self.line_index = LineIndex(lines)
+        self.close_station_ids = dict()
+        if close_nodes:
+            # stations closer than 50 meters to each line end point, matched in one batch
+            end_points = dict()
+            for line in lines.values():
+                for node_id in [line.first_node(), line.last_node()]:
+                    end_points[node_id] = line.end_point(node_id)
+            self.close_station_ids = CloseNodeMatcher(self.station_index, geod).match(end_points, 50)
+        self.covered_nodes = None
+
+    # infers the circuits starting at the given station
+    # close_stations, close_lines - the stations and lines to consider, default to all of the region
+    def create_relations(self, station, voltage, close_stations=None, close_lines=None):
+        # root.info('\nStart inference for Substation %s', str(ssid))
+        relations = self.infer_relations(station, close_stations if close_stations is not None else self.stations,
+                                         close_lines if close_lines is not None else self.lines)
+        return self.to_circuits(relations, voltage)
+
+    # infers the circuits of all given substations in a single sweep over the line graph of the region - the lines
+    # starting at each station are determined in one pass over all lines instead of one pass per substation
+    # substation_ids - the stations to start the inference from
+    def create_relations_of_region(self, substation_ids, voltage):
+        return self.create_relations_of_scopes(self.region_scopes(substation_ids), voltage)
+
+    # infers the circuits of all given substations within the neighborhood of radius meters around each of them
+    def create_relations_of_neighborhoods(self, substation_ids, voltage, radius):
+        return self.create_relations_of_scopes(self.neighborhood_scopes(substation_ids, radius), voltage)
+
+    def create_relations_of_scopes(self, scopes, voltage):
+        circuits = []
+        for (station, start_lines, stations, lines, line_order) in scopes:
+            relations = self.infer_relations_from(station, start_lines, stations, lines, line_order)
+            circuits.extend(self.to_circuits(relations, voltage))
+        return circuits
+
+    # yields the start station of each inference of the sweep with its start lines, the stations and lines it may
+    # reach and the order of these lines
+    def region_scopes(self, substation_ids):
+        line_order = dict((line_id, position) for (position, line_id) in enumerate(self.lines))
+        start_lines_by_station = self.start_lines_by_station()
+        for substation_id in substation_ids:
+            yield (self.stations[substation_id], start_lines_by_station.get(substation_id, []), self.stations,
+                   self.lines, line_order)
+
+    # yields the inference scopes of the given substations restricted to their neighborhood - the neighborhoods of
+    # all substations are answered by batched KD-tree queries
+    def neighborhood_scopes(self, substation_ids, radius):
+        substation_ids = list(substation_ids)
+        center_stations = [self.stations[substation_id] for substation_id in substation_ids]
+        close_stations = NeighborhoodIndex(self.stations.values()).close_components(center_stations, radius)
+        close_lines = NeighborhoodIndex(self.lines.values()).close_components(center_stations, radius)
+        for station in center_stations:
+            yield self.scope(station, next(close_stations), next(close_lines))
+
+    # returns the inference scope of a station within the given stations and lines
+    def scope(self, station, stations, lines):
+        # find lines that cross the station's area - note that
+        #  the end point of the line has to be within the substation for valid crossing
+        start_lines = []
+        for line in lines.values():
+            node_to_continue_id = self.node_to_continue(line, station)
+            if node_to_continue_id:
+                start_lines.append((line, node_to_continue_id))
+        # lines adjacent to a node are continued in the iteration order of lines
+        line_order = dict((line_id, position) for (position, line_id) in enumerate(lines))
+        return station, start_lines, stations, lines, line_order
+
+    # searches the relations of every start line of the given scopes without looking at covered line ids - the
+    # search of a start line does not depend on them, so searches can run apart from the stations' state and be
+    # covered later by cover_searches
+    # cover - whether to leave out the start lines and relations covered within the scopes, which is only the same
+    #  as covering them later if the stations have no lines of the scopes covered yet
+    # returns a list of (station, [(start line, relations found from it)])
+    def search_relations_of_scopes(self, scopes, cover=False):
+        searches = []
+        for (station, start_lines, stations, lines, line_order) in scopes:
+            start_searches = []
+            for (line, node_to_continue_id) in start_lines:
+                if cover and not self.cover_start_line(station, line):
+                    continue
+                relations = self.infer_relation(stations, lines, line_order, station, line, node_to_continue_id)
+                start_searches.append((line, self.cover_relations(relations) if cover else relations))
+            searches.append((station, start_searches))
+        return searches
+
+    # turns searches into circuits exactly as if the relations had been inferred right away, recording the covered
+    # lines and connections in the stations of the searches
+    @staticmethod
+    def cover_searches(searches, voltage):
+        circuits = []
+        for (station, start_searches) in searches:
+            relations = []
+            for (line, line_relations) in start_searches:
+                if RelationInference.cover_start_line(station, line):
+                    relations.extend(RelationInference.cover_relations(line_relations))
+            circuits.extend(RelationInference.to_circuits(relations, voltage))
+        return circuits
+
+    @staticmethod
+    def to_circuits(relations, voltage):
+        circuits = []
+        for relation in relations:
+            # at least two end points + one line
+            if RelationInference.num_subs_in_relation(relation) == 2 and len(relation) >= 3:
+                first_line = relation[1]
+                station1 = relation[0]
+                station2 = relation[-1]
+                station1.add_connected_station(station2.id, voltage)
+                station2.add_connected_station(station1.id, voltage)
+                circuit = Circuit(relation, voltage, first_line.name, first_line.ref)
+                circuits.append(circuit)
+
+        return circuits
+
+    # maps the id of each station to the lines starting at it, each with the node to continue from, in the order of
+    # lines - candidate stations of a line are the ones at or close to its end points
+    def start_lines_by_station(self):
+        start_lines_by_station = dict()
+        for line in self.lines.values():
+            candidate_stations = []
+            for node_id in [line.first_node(), line.last_node()]:
+                candidate_stations.extend(self.station_index.intersecting_stations(line.end_point(node_id)))
+                candidate_stations.extend(self.stations[station_id]
+                                          for station_id in self.close_station_ids.get(node_id, []))
+            candidate_station_ids = set()
+            for station in candidate_stations:
+                if station.id in candidate_station_ids:
+                    continue
+                candidate_station_ids.add(station.id)
+                node_to_continue_id = self.node_to_continue(line, station)
+                if node_to_continue_id:
+                    if station.id not in start_lines_by_station:
+                        start_lines_by_station[station.id] = []
+                    start_lines_by_station[station.id].append((line, node_to_continue_id))
+        return start_lines_by_station
+
+    # inferences circuits around a given station
+    # station - represents the station to infer circuits for
+    # stations - dict of all possibly connected stations
+    # lines - dict of all lines that could connect stations
+    def infer_relations(self, station, stations, lines):
+        return self.infer_relations_from(*self.scope(station, stations, lines))
+
+    # returns the node to continue with if the line starts at the station, None otherwise
+    def node_to_continue(self, line, station):
+        node_to_continue_id = None
+        # here it checks to find the intersecting lines and station, if no intersecting found then looks for line
+        # nodes with distance less than 50 meters
+        if line.end_point(line.first_node()).intersects(station.geom):
+            node_to_continue_id = line.last_node()
+        elif line.end_point(line.last_node()).intersects(station.geom):
+            node_to_continue_id = line.first_node()
+        if station.id in self.close_station_ids.get(line.first_node(), []):
+            node_to_continue_id = line.last_node()
+        elif station.id in self.close_station_ids.get(line.last_node(), []):
+            node_to_continue_id = line.first_node()
+        return node_to_continue_id
+
+    # start_lines - the lines starting at the station with their node to continue
+    # line_order - position of each line in lines
+    def infer_relations_from(self, station, start_lines, stations, lines, line_order):
+        relations = []
+        for (line, node_to_continue_id) in start_lines:
+            if self.cover_start_line(station, line):
+                relations.extend(self.cover_relations(self.infer_relation(stations, lines, line_order, station, line,
+                                                                          node_to_continue_id)))
+        return relations
+
+    # returns whether a circuit may start with the line at the station and marks the line as covered there
+    @staticmethod
+    def cover_start_line(station, line):
+        if line.id in station.covered_line_ids:
+            root.debug('Relation with %s at %s already covered', str(line), str(station))
+            return False
+        root.debug('%s', str(station))
+        root.debug('%s', str(line))
+        station.covered_line_ids.append(line.id)
+        return True
+
+    # returns the relations whose last line is not yet covered at their end station and marks it as covered there
+    @staticmethod
+    def cover_relations(relations):
+        covered_relations = []
+        for relation in relations:
+            (from_line, station) = relation[-2:]
+            if from_line.id in station.covered_line_ids:
+                root.debug('Relation with %s at %s already covered', str(from_line), str(station))
+                continue
+            station.covered_line_ids.append(from_line.id)
+            covered_relations.append(relation)
+        return covered_relations
+
+    # depth-first search for the relations that continue the given start line up to another station, whether their
+    # last line is already covered there is left to cover_relations - paths are kept as parent linked segments
+    # (member, parent segment), the member list is only built once a path closes at another station
+    # stations - all known stations
+    # lines - all lines that could connect stations
+    # line_order - position of each line in lines
+    def infer_relation(self, stations, lines, line_order, start_station, start_line, node_to_continue_id):
+        relations = []
+        self.covered_nodes = set(start_line.nodes)
+        self.covered_nodes.remove(node_to_continue_id)
+        path = (start_line, (start_station, None))
+        frames = []
+        frame = self.continue_path(stations, lines, line_order, relations, start_station, path, node_to_continue_id,
+                                   start_line)
+        if frame:
+            frames.append(frame)
+        while frames:
+            (path, node_to_continue_coords, from_line, covering_lines) = frames[-1]
+            line = next(covering_lines, None)
+            if line is None:
+                frames.pop()
+                continue
+            if line.id == from_line.id:
+                continue
+            root.debug('%s', str(line))
+            # points intersect where their coordinates are equal
+            if line.end_coords[:2] == node_to_continue_coords:
+                new_node_to_continue_id = line.last_node()
+            else:
+                new_node_to_continue_id = line.first_node()
+            if new_node_to_continue_id in self.covered_nodes:
+                if root.isEnabledFor(logging.DEBUG):
+                    root.debug('Encountered loop - stopping inference at line (%s): %s', str(line.id),
+                               self.to_overpass_string(self.to_relation((line, path))))
+                self.covered_nodes.update(line.nodes)
+                continue
+            self.covered_nodes.update(line.nodes)
+            self.covered_nodes.remove(new_node_to_continue_id)
+            frame = self.continue_path(stations, lines, line_order, relations, start_station, (line, path),
+                                       new_node_to_continue_id, line)
+            if frame:
+                frames.append(frame)
+        return relations
+
+    # checks whether the path ends at a station at the node to continue - a path closing at another station is
+    # added to relations, otherwise the search frame for the lines covering the node to continue is returned
+    def continue_path(self, stations, lines, line_order, relations, start_station, path, node_to_continue_id,
+                      from_line):
+        node_to_continue = from_line.end_point(node_to_continue_id)
+        # here also check for intersection
+        station_id = self.station_index.intersecting_station_id(node_to_continue, stations)
+        if station_id and station_id == start_station.id:  # if node to continue is at the starting station --> LOOP
+            if root.isEnabledFor(logging.DEBUG):
+                root.debug('Encountered loop: %s', self.to_overpass_string(self.to_relation(path)))
+            return None
+        elif station_id and station_id != start_station.id:
+            # if a node is within another station --> FOUND THE 2nd ENDPOINT
+            station = stations[station_id]
+            root.debug('%s', str(station))
+            relations.append(self.to_relation((station, path)))
+            root.debug('Could obtain relation')
+            return None
+
+        # no endpoints encountered - handle line subsection
+        # at first find all lines that cover the node to continue
+        covering_lines = [line for line in self.line_index.lines_at(node_to_continue_id, node_to_continue)
+                          if line.id in lines]
+        covering_lines.sort(key=lambda l: line_order[l.id])
+        return path, from_line.end_coords_of(node_to_continue_id), from_line, iter(covering_lines)
+
+    @staticmethod
+    def to_relation(path):
+        relation = []
+        while path is not None:
+            (member, path) = path
+            relation.append(member)
+        relation.reverse()
+        return relation
+
+    @staticmethod
+    def to_overpass_string(relation):
+        overpass = ''
+        for member in relation:
+            overpass += 'way(' + str(member.id) + ');(._;>;);out;'
+        return overpass
+
+    @staticmethod
+    def num_subs_in_relation(relation):
+        num_stations = 0
+        for way in relation:
+            if isinstance(way, Station):
+                num_stations += 1
+        return num_stations
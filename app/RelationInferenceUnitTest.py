@@ -0,0 +1,85 @@
+import unittest
+
+import pyproj
+from shapely.geometry import LineString, box
+
+from InferenceBenchmark import InferenceBenchmark
+from Line import Line
+from RelationInference import RelationInference
+from Station import Station
+
+
+class RelationInferenceUnitTest(unittest.TestCase):
+    @staticmethod
+    def create_station(_id, x, y):
+        geom = box(x - 0.01, y - 0.01, x + 0.01, y + 0.01)
+        return Station(_id, geom, 'substation', None, None, '380000', None, None, y, x, None)
+
+    @staticmethod
+    def create_line(_id, nodes, coordinates):
+        geom = LineString(coordinates)
+        return Line(_id, geom, 'line', None, None, '380000', '3', nodes, None, geom.centroid.y,
+                    geom.centroid.x, coordinates[0] + coordinates[-1], geom.length, None)
+
+    # stations 1 to 4 on a small grid - a direct line and a parallel one between 1 and 2, a path of two sections
+    # from 2 to 3 with a branch to 4 at their joint, and a line from 3 ending nowhere
+    @staticmethod
+    def create_fixture():
+        stations = dict((station.id, station) for station in [
+            RelationInferenceUnitTest.create_station(1, 10.0, 50.0),
+            RelationInferenceUnitTest.create_station(2, 10.5, 50.0),
+            RelationInferenceUnitTest.create_station(3, 11.0, 50.0),
+            RelationInferenceUnitTest.create_station(4, 10.75, 50.5)])
+        lines = dict((line.id, line) for line in [
+            RelationInferenceUnitTest.create_line(10, [100, 101], [(10.0, 50.0), (10.5, 50.0)]),
+            RelationInferenceUnitTest.create_line(11, [102, 103], [(10.0, 50.005), (10.5, 50.005)]),
+            RelationInferenceUnitTest.create_line(12, [101, 104], [(10.5, 50.0), (10.75, 50.0)]),
+            RelationInferenceUnitTest.create_line(13, [104, 105], [(10.75, 50.0), (11.0, 50.0)]),
+            RelationInferenceUnitTest.create_line(14, [104, 106], [(10.75, 50.0), (10.75, 50.5)]),
+            RelationInferenceUnitTest.create_line(15, [105, 107], [(11.0, 50.0), (11.5, 50.2)])])
+        return stations, lines
+
+    # infers the circuits of the stations one after another with the inference of a single station
+    @staticmethod
+    def per_station(stations, lines):
+        relation_inference = RelationInference(stations, lines, False, pyproj.Geod(ellps='WGS84'))
+        circuits = []
+        for station_id in stations:
+            circuits.extend(relation_inference.create_relations(stations[station_id], '380000'))
+        return circuits
+
+    @staticmethod
+    def summary(stations, circuits):
+        return ([[member.id for member in circuit.members] for circuit in circuits],
+                dict((station.id, (list(station.covered_line_ids), station.connected_stations))
+                     for station in stations.values()))
+
+    def assert_same_inference(self, create):
+        (stations, lines) = create()
+        expected = RelationInferenceUnitTest.summary(stations, RelationInferenceUnitTest.per_station(stations, lines))
+        (stations, lines) = create()
+        relation_inference = RelationInference(stations, lines, False, pyproj.Geod(ellps='WGS84'))
+        circuits = relation_inference.create_relations_of_region(list(stations.keys()), '380000')
+        self.assertEqual(expected, RelationInferenceUnitTest.summary(stations, circuits))
+        (stations, lines) = create()
+        relation_inference = RelationInference(stations, lines, False, pyproj.Geod(ellps='WGS84'))
+        circuits = relation_inference.create_relations_of_neighborhoods(list(stations.keys()), '380000', 1000000)
+        self.assertEqual(expected, RelationInferenceUnitTest.summary(stations, circuits))
+        return expected
+
+    def test_fixture(self):
+        (circuits, states) = self.assert_same_inference(RelationInferenceUnitTest.create_fixture)
+        self.assertEqual([[1, 10, 2], [1, 11, 2], [2, 12, 13, 3], [2, 12, 14, 4]], circuits)
+        self.assertEqual({'380000': set([1, 3, 4])}, states[2][1])
+
+    def test_synthetic_grid(self):
+        def create():
+            benchmark = InferenceBenchmark(60, 600, 7)
+            return benchmark.stations, benchmark.lines
+
+        (circuits, states) = self.assert_same_inference(create)
+        self.assertEqual(14, len(circuits))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import logging
+from glob import glob
+from os import getpid, makedirs, rename
+from os.path import exists, getmtime
+from shutil import rmtree
+
+from LineStore import LineStore
+from StationStore import StationStore
+
+
+class SnapshotCache:
+    # version of the layout of the snapshots, changed with the queries of Transnet.fetch_region or the rows they give
+    format_version = 3
+    # names of the stores of a region in the files of a snapshot
+    store_names = ('lines', 'substations', 'generators')
+
+    # keeps the stores of the regions fetched on disk, so that reruns for a region map them from files instead of
+    # querying the database - a snapshot is a directory holding the columns of the stores of a region as of
+    # ColumnFile, which the stores wrap as they are, with the geometries as fetched, and is named by the key of the
+    # region and the fingerprint of the import it was read from
+    # directory - directory of the snapshot directories
+    def __init__(self, directory):
+        self.directory = directory
+        if not exists(directory):
+            makedirs(directory)
+
+    # returns the key of the snapshot of a region - the queries of Transnet.fetch_region are given by the region, the
+    # voltage levels and the connection of lines and stations with or without --closenodes, but differ in the tables
+    # read, so that snapshots of the topology tables are read without them and the other way round
+    # boundary - boundary of the region, None for the region around the station ssid
+    @staticmethod
+    def key(boundary, ssid, voltage_levels, close_nodes):
+        key = hashlib.sha1()
+        key.update(str(SnapshotCache.format_version).encode('utf-8'))
+        key.update((boundary.wkt if boundary is not None else 'ssid %s' % ssid).encode('utf-8'))
+        key.update(voltage_levels.encode('utf-8'))
+        key.update(b'close nodes' if close_nodes else b'intersecting')
+        return key.hexdigest()
+
+    # returns a fingerprint of the import the connection reads and its description - the import is told by the
+    # latest of transnet_updates, which prepare_db.sh writes after the import and DiffUpdater with every update
+    # imports without it, e.g. of an older prepare_db.sh, are told by the number and the largest osm id of their
+    # lines and polygons, which miss the changes keeping both, e.g. of tags
+    @staticmethod
+    def fingerprint(conn):
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT current_database(), to_regclass('transnet_updates') IS NOT NULL")
+            (database, has_updates) = cur.fetchone()
+            update = None
+            if has_updates:
+                cur.execute('''SELECT update_id, change_file, applied_at FROM transnet_updates
+                            ORDER BY update_id DESC LIMIT 1''')
+                update = cur.fetchone()
+            if update is not None:
+                description = 'database %s as of update %s of %s applied at %s' % ((database,) + tuple(update))
+            else:
+                logging.warning('Database %s has no transnet_updates of prepare_db.sh, its snapshots are told apart '
+                                'by the number and the largest osm id of the lines and polygons only', database)
+                cur.execute('''SELECT (SELECT count(*) FROM planet_osm_line),
+                              (SELECT max(osm_id) FROM planet_osm_line),
+                              (SELECT count(*) FROM planet_osm_polygon),
+                              (SELECT max(osm_id) FROM planet_osm_polygon)''')
+                description = 'database %s of %s lines up to osm id %s and %s polygons up to osm id %s' % (
+                    (database,) + tuple(cur.fetchone()))
+            return hashlib.sha1(description.encode('utf-8')).hexdigest()[:16], description
+        finally:
+            cur.close()
+
+    # returns the LineStore of the lines and the StationStores of the substations and generators of a region - from
+    # the snapshot of the import if there is one, else as fetched, writing the snapshot
+    # conn - connection to query, None to read the latest snapshot of the region without a database, which logs the
+    #  import and the fingerprint the snapshot was written of
+    # key - key of the region as of key
+    # topology_tables - whether the region is fetched from the tables of sql/transnet_topology.sql, kept with the
+    #  snapshot
+    # fetch - function returning the stores of the region from the database
+    def region(self, conn, key, topology_tables, fetch):
+        if conn is None:
+            paths = sorted(glob('{0}/{1}-*.snapshot'.format(self.directory, key)), key=getmtime)
+            if not paths:
+                raise IOError('No snapshot of the region in {0}'.format(self.directory))
+            if len(paths) > 1:
+                logging.warning('Found %d snapshots of the region, reading the latest written', len(paths))
+            path = paths[-1]
+        else:
+            (fingerprint, description) = SnapshotCache.fingerprint(conn)
+            path = '{0}/{1}-{2}.snapshot'.format(self.directory, key, fingerprint)
+            if not exists(path):
+                region = fetch()
+                logging.info('Writing snapshot %s of %s', path, description)
+                metadata = {'format_version': SnapshotCache.format_version, 'topology_tables': topology_tables,
+                            'fingerprint': fingerprint, 'import': description}
+                SnapshotCache.write(path, metadata, region)
+                return region
+        (metadata, region) = SnapshotCache.read(path)
+        logging.info('Reading snapshot %s of the %s tables of %s, fingerprint %s', path,
+                     'topology' if metadata['topology_tables'] else 'planet_osm', metadata['import'],
+                     metadata['fingerprint'])
+        return region
+
+    # writes the metadata and the stores of the region to the snapshot directory at path - the directory is written
+    # under a name of its own and moved into place once complete, replacing the snapshots of former imports, and
+    # kept if another process moved its snapshot into place before
+    @staticmethod
+    def write(path, metadata, region):
+        temp_path = '{0}.{1}.tmp'.format(path, getpid())
+        makedirs(temp_path)
+        try:
+            with open('{0}/metadata.json'.format(temp_path), 'w') as metadata_file:
+                json.dump(metadata, metadata_file)
+            for (name, store) in zip(SnapshotCache.store_names, region):
+                store.save(temp_path, name)
+            for former_path in glob('{0}-*.snapshot'.format(path.rsplit('-', 1)[0])):
+                if former_path != path:
+                    rmtree(former_path, ignore_errors=True)
+            rename(temp_path, path)
+        except OSError:
+            if not exists(path):
+                raise
+            logging.info('Snapshot %s was written by another process', path)
+        finally:
+            if exists(temp_path):
+                rmtree(temp_path)
+
+    # returns the metadata of the snapshot at path and the stores of its region, which map the arrays of its files
+    @staticmethod
+    def read(path):
+        with open('{0}/metadata.json'.format(path)) as metadata_file:
+            metadata = json.load(metadata_file)
+        (lines, substations, generators) = SnapshotCache.store_names
+        return metadata, (LineStore.load(path, lines), StationStore.load(path, substations),
+                          StationStore.load(path, generators))
@@ -0,0 +1,130 @@
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from os import listdir, makedirs
+
+import numpy as np
+from shapely import wkb
+from shapely.geometry import LineString, Point, box
+
+from LineStore import LineStore
+from SnapshotCache import SnapshotCache
+from StationStore import StationStore
+
+
+class SnapshotCacheUnitTest(unittest.TestCase):
+    # answers the queries of the fingerprint with the rows given in their order
+    class FakeConnection:
+        def __init__(self, rows):
+            self.rows = list(rows)
+            self.statements = []
+
+        def cursor(self):
+            return self
+
+        def execute(self, sql, params=None):
+            self.statements.append(sql)
+
+        def fetchone(self):
+            return self.rows.pop(0)
+
+        def close(self):
+            pass
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_key(self):
+        key = SnapshotCache.key(box(0, 0, 1, 1), None, '220000|380000', False)
+        self.assertEqual(key, SnapshotCache.key(box(0, 0, 1, 1), None, '220000|380000', False))
+        self.assertNotEqual(key, SnapshotCache.key(box(0, 0, 2, 1), None, '220000|380000', False))
+        self.assertNotEqual(key, SnapshotCache.key(box(0, 0, 1, 1), None, '380000', False))
+        self.assertNotEqual(key, SnapshotCache.key(box(0, 0, 1, 1), None, '220000|380000', True))
+        self.assertNotEqual(SnapshotCache.key(None, 1, '380000', False), SnapshotCache.key(None, 2, '380000', False))
+
+    def test_fingerprint(self):
+        applied_at = datetime(2026, 10, 1, 12)
+        (fingerprint, description) = SnapshotCache.fingerprint(SnapshotCacheUnitTest.FakeConnection(
+            [('austria', True), (3, 'changes.osc.gz', applied_at)]))
+        self.assertEqual('database austria as of update 3 of changes.osc.gz applied at 2026-10-01 12:00:00',
+                         description)
+        self.assertEqual(fingerprint, SnapshotCache.fingerprint(SnapshotCacheUnitTest.FakeConnection(
+            [('austria', True), (3, 'changes.osc.gz', applied_at)]))[0])
+        # another update, import or database
+        for rows in [[('austria', True), (4, 'changes.osc.gz', applied_at)],
+                     [('austria', True), (1, 'power_extract.pbf', applied_at)],
+                     [('germany', True), (3, 'changes.osc.gz', applied_at)]]:
+            self.assertNotEqual(fingerprint, SnapshotCache.fingerprint(SnapshotCacheUnitTest.FakeConnection(rows))[0])
+
+    def test_fingerprint_without_updates(self):
+        conn = SnapshotCacheUnitTest.FakeConnection([('austria', False), (10, 110, 5, 205)])
+        (fingerprint, description) = SnapshotCache.fingerprint(conn)
+        self.assertEqual('database austria of 10 lines up to osm id 110 and 5 polygons up to osm id 205', description)
+        self.assertNotIn('transnet_updates', conn.statements[-1])
+        self.assertNotEqual(fingerprint, SnapshotCache.fingerprint(SnapshotCacheUnitTest.FakeConnection(
+            [('austria', False), (11, 111, 5, 205)]))[0])
+        # a table of updates without any
+        self.assertEqual(description, SnapshotCache.fingerprint(SnapshotCacheUnitTest.FakeConnection(
+            [('austria', True), None, (10, 110, 5, 205)]))[1])
+
+    # returns the stores of a region of a line and a substation
+    @staticmethod
+    def create_region():
+        line = LineString([(10, 50), (10.1, 50)])
+        line_row = (1, wkb.dumps(line, srid=4326), wkb.dumps(line, srid=3857), 'line', None, None, '380000', '3',
+                    [1, 2], ['power', 'line'], wkb.dumps(Point(10, 50)), wkb.dumps(Point(10.1, 50)), 50.0, 10.05,
+                    7000.0)
+        station_row = (2, wkb.dumps(box(10, 50, 10.01, 50.01), srid=4326), 'substation', 'a', None, '380000', None,
+                       50.005, 10.005, [1])
+        return (LineStore.from_rows([line_row]), StationStore.from_rows([station_row]),
+                StationStore.from_rows([]))
+
+    def assertRegionEqual(self, expected, region):
+        self.assertEqual(expected[0].line(0).serialize(), region[0].line(0).serialize())
+        self.assertEqual(expected[1].station(0).serialize(), region[1].station(0).serialize())
+        self.assertEqual([0], region[1].connected_rows(np.array([1])).tolist())
+        self.assertEqual(0, len(region[2]))
+
+    def test_region(self):
+        cache = SnapshotCache(self.directory)
+        key = SnapshotCache.key(None, 1, '380000', False)
+        makedirs('{0}/{1}-former.snapshot'.format(self.directory, key))
+        rows = [('austria', True), (3, 'changes.osc.gz', datetime(2026, 10, 1, 12))]
+        region = SnapshotCacheUnitTest.create_region()
+        self.assertIs(region, cache.region(SnapshotCacheUnitTest.FakeConnection(rows), key, True, lambda: region))
+        (fingerprint, description) = SnapshotCache.fingerprint(SnapshotCacheUnitTest.FakeConnection(rows))
+        # the snapshot of the former import is replaced
+        self.assertEqual(['{0}-{1}.snapshot'.format(key, fingerprint)], listdir(self.directory))
+
+        def fetch():
+            raise AssertionError('Fetched the region of a snapshot')
+
+        read_region = cache.region(SnapshotCacheUnitTest.FakeConnection(rows), key, True, fetch)
+        self.assertIsInstance(read_region[0].wkb_buffer.base, np.memmap)
+        self.assertRegionEqual(region, read_region)
+        # offline
+        self.assertRegionEqual(region, cache.region(None, key, False, fetch))
+        (metadata, read_region) = SnapshotCache.read('{0}/{1}-{2}.snapshot'.format(self.directory, key,
+                                                                                  fingerprint))
+        self.assertEqual({'format_version': SnapshotCache.format_version, 'topology_tables': True,
+                          'fingerprint': fingerprint, 'import': description}, metadata)
+
+    def test_region_offline_without_snapshot(self):
+        cache = SnapshotCache(self.directory)
+        self.assertRaises(IOError, cache.region, None, SnapshotCache.key(None, 1, '380000', False), False, None)
+
+    def test_write_by_another_process(self):
+        path = '{0}/key-fingerprint.snapshot'.format(self.directory)
+        SnapshotCache.write(path, {'topology_tables': False}, SnapshotCacheUnitTest.create_region())
+        # the snapshot moved into place by another process is kept
+        SnapshotCache.write(path, {'topology_tables': True}, SnapshotCacheUnitTest.create_region())
+        self.assertEqual(['key-fingerprint.snapshot'], listdir(self.directory))
+        self.assertFalse(SnapshotCache.read(path)[0]['topology_tables'])
+
+
+if __name__ == '__main__':
+    unittest.main()
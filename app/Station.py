@@ -2,17 +2,16 @@ from Way import Way
 
 
 class Station(Way):
-    # all starting lines for which a circuit has already been extracted
-    covered_line_ids = None
-    # remember the connection to a station: map starting line to station
-    nominal_power = None  # only used by generators
-    # for validation purposes
-    connected_stations = None
-
-    def __init__(self, _id, geom, _type, name, ref, voltage, nodes, tags, lat, lon, raw_geom):
-        Way.__init__(self, _id, geom, _type, name, ref, voltage, nodes, tags, lat, lon, raw_geom)
+    __slots__ = ('covered_line_ids', 'connected_stations', 'nominal_power', 'missing_voltage_estimate',
+                 'missing_connection')
+
+    def __init__(self, _id, geom, _type, name, ref, voltage, nodes, tags, lat, lon, wkb):
+        Way.__init__(self, _id, geom, _type, name, ref, voltage, nodes, tags, lat, lon, wkb)
+        # all starting lines for which a circuit has already been extracted
         self.covered_line_ids = []
+        # for validation purposes
         self.connected_stations = dict()
+        # only used by generators
         self.nominal_power = None
 
         self.missing_voltage_estimate = None
@@ -39,7 +38,7 @@ class Station(Way):
             'type': self.type,
             'name': str(self.name),
             'voltage': str(self.voltage),
-            'nodes': self.nodes,
+            'nodes': self.nodes.tolist() if self.nodes is not None else None,
             'tags': str(self.tags),
             'lat': str(self.lat),
             'lon': str(self.lon),
@@ -0,0 +1,59 @@
+from math import cos, radians
+
+from shapely.geometry import box
+from shapely.prepared import prep
+from shapely.strtree import STRtree
+
+from Way import Way
+
+
+class StationIndex:
+    # spatial index over the station polygons of one region and voltage level
+    # stations - dict of all stations that may be hit by a line end point
+    def __init__(self, stations):
+        self.stations = stations
+        self.prepared_by_geom_id = dict()
+        Way.decode(stations.values())
+        geoms = []
+        for station in stations.values():
+            geoms.append(station.geom)
+            self.prepared_by_geom_id[id(station.geom)] = (station, prep(station.geom))
+        self.tree = STRtree(geoms) if geoms else None
+
+    # returns the stations whose polygon intersects the given node
+    def intersecting_stations(self, node):
+        hits = []
+        if self.tree is None:
+            return hits
+        for geom in self.tree.query(node):
+            station, prepared_geom = self.prepared_by_geom_id[id(geom)]
+            if prepared_geom.intersects(node):
+                hits.append(station)
+        return hits
+
+    # returns the id of the station that intersects the node - mirrors a linear scan over stations in their
+    # iteration order, so that overlapping station polygons resolve to the same station as before
+    # stations - the stations to consider, defaults to all indexed stations
+    def intersecting_station_id(self, node, stations=None):
+        if stations is None:
+            stations = self.stations
+        hits = set(station.id for station in self.intersecting_stations(node) if station.id in stations)
+        if not hits:
+            return None
+        if len(hits) == 1:
+            return hits.pop()
+        for station in stations.values():
+            if station.id in hits:
+                return station.id
+        return None
+
+    # returns the stations whose bounding box lies within about the given distance in meters of the node - a
+    # superset of the stations whose polygon is within that geodesic distance
+    def stations_near(self, node, distance):
+        if self.tree is None:
+            return []
+        # one degree of latitude spans at least 110 km, one degree of longitude that times the cosine of latitude
+        lat_delta = distance / 110000.0
+        lon_delta = lat_delta / max(cos(radians(node.y)), 0.001)
+        envelope = box(node.x - lon_delta, node.y - lat_delta, node.x + lon_delta, node.y + lat_delta)
+        return [self.prepared_by_geom_id[id(geom)][0] for geom in self.tree.query(envelope)]
@@ -0,0 +1,36 @@
+import unittest
+
+from shapely.geometry import Point, box
+
+from Station import Station
+from StationIndex import StationIndex
+
+
+class StationIndexUnitTest(unittest.TestCase):
+    @staticmethod
+    def create_station(_id, geom):
+        return Station(_id, geom, 'substation', None, None, '380000', None, None, geom.centroid.y,
+                       geom.centroid.x, None)
+
+    def test_intersecting_station_id(self):
+        station1 = StationIndexUnitTest.create_station(1, box(0, 0, 1, 1))
+        station2 = StationIndexUnitTest.create_station(2, box(5, 5, 6, 6))
+        stations = {station1.id: station1, station2.id: station2}
+        station_index = StationIndex(stations)
+        self.assertEqual(1, station_index.intersecting_station_id(Point(0.5, 0.5)))
+        self.assertEqual(2, station_index.intersecting_station_id(Point(6, 6)))
+        self.assertIsNone(station_index.intersecting_station_id(Point(3, 3)))
+
+    def test_intersecting_station_id_within_scope(self):
+        station1 = StationIndexUnitTest.create_station(1, box(0, 0, 2, 2))
+        station2 = StationIndexUnitTest.create_station(2, box(1, 1, 3, 3))
+        stations = {station1.id: station1, station2.id: station2}
+        station_index = StationIndex(stations)
+        # overlapping stations resolve in the iteration order of the given stations
+        self.assertEqual(list(stations.keys())[0], station_index.intersecting_station_id(Point(1.5, 1.5)))
+        self.assertEqual(2, station_index.intersecting_station_id(Point(1.5, 1.5), {station2.id: station2}))
+        self.assertIsNone(station_index.intersecting_station_id(Point(0.5, 0.5), {station2.id: station2}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import numpy as np
+
+from ColumnFile import ColumnFile
+from Station import Station
+
+
+class StationStore:
+    # columnar store of the substations or generators of a region as fetched by Transnet.fetch_region - the ids and
+    # centroids of the stations and the ids of the lines connected to them are kept in numpy arrays, so that the
+    # stations of a voltage level are selected on the arrays, their geometries packed into a numpy array with the
+    # offsets of each station, their other attributes in lists by row
+    # Station views are created on demand and kept, as stations collect the state of the inference of all voltage
+    # levels
+    # the columns are saved to and loaded from the files of a snapshot as they are, the arrays memory mapped
+    # columns - dict of the columns by name, as of from_rows or ColumnFile.load
+    def __init__(self, columns):
+        self.columns = columns
+        self.ids = columns['ids']
+        self.lats = columns['lats']
+        self.lons = columns['lons']
+        # the ids of the lines of all stations with the row of their station
+        self.line_ids = columns['line_ids']
+        self.line_rows = columns['line_rows']
+        self.types = columns['types']
+        self.names = columns['names']
+        self.refs = columns['refs']
+        self.voltages = columns['voltages']
+        self.tags = columns['tags']
+        self.nominal_powers = columns['nominal_powers']
+        self.wkb_buffer = columns['wkb_buffer']
+        self.wkb_offsets = columns['wkb_offsets']
+        self.views = dict()
+
+    # returns the store of the substation rows of the queries of Transnet.fetch_region, or of the generator rows if
+    # parse_power is given
+    # parse_power - function returning the nominal power of a generator tagged with the output, None if not parsed
+    @staticmethod
+    def from_rows(rows, parse_power=None):
+        ids = []
+        lats = []
+        lons = []
+        line_ids = []
+        line_counts = []
+        types = []
+        names = []
+        refs = []
+        voltages = []
+        tags = []
+        wkbs = []
+        nominal_powers = []
+        for row in rows:
+            if parse_power is not None:
+                (osm_id, geom, power_type, name, ref, voltage, output1, output2, station_tags, lat, lon,
+                 station_line_ids) = row
+                nominal_powers.append(parse_power(output1) if output1 is not None else parse_power(output2))
+            else:
+                (osm_id, geom, power_type, name, ref, voltage, station_tags, lat, lon, station_line_ids) = row
+                nominal_powers.append(None)
+            ids.append(osm_id)
+            lats.append(lat)
+            lons.append(lon)
+            line_ids.extend(station_line_ids)
+            line_counts.append(len(station_line_ids))
+            types.append(power_type)
+            names.append(name)
+            refs.append(ref)
+            voltages.append(voltage.replace(',', ';').replace('/', ';') if voltage else None)
+            tags.append(station_tags)
+            wkbs.append(geom)
+        (wkb_buffer, wkb_offsets) = ColumnFile.pack_bytes(wkbs)
+        return StationStore({
+            'ids': np.array(ids, dtype=np.int64),
+            'lats': np.array(lats, dtype=float),
+            'lons': np.array(lons, dtype=float),
+            'line_ids': np.array(line_ids, dtype=np.int64),
+            'line_rows': np.repeat(np.arange(len(ids)), line_counts),
+            'types': types,
+            'names': names,
+            'refs': refs,
+            'voltages': voltages,
+            'tags': tags,
+            'nominal_powers': nominal_powers,
+            'wkb_buffer': wkb_buffer,
+            'wkb_offsets': wkb_offsets})
+
+    # writes the columns to the files of the store of the name in the directory
+    def save(self, directory, name):
+        ColumnFile.save(directory, name, self.columns)
+
+    # returns the store of the name saved to the directory
+    @staticmethod
+    def load(directory, name):
+        return StationStore(ColumnFile.load(directory, name))
+
+    def __len__(self):
+        return len(self.ids)
+
+    # returns the rows of the stations connected to any of the lines, in the order of the rows
+    # line_ids - array of the ids of the lines
+    def connected_rows(self, line_ids):
+        connected = np.bincount(self.line_rows[np.isin(self.line_ids, line_ids)], minlength=len(self.ids)) > 0
+        return np.flatnonzero(connected)
+
+    # returns the view of the station of the row
+    def station(self, row):
+        if row not in self.views:
+            station = Station(int(self.ids[row]), None, self.types[row], self.names[row], self.refs[row],
+                              self.voltages[row], None, self.tags[row], float(self.lats[row]), float(self.lons[row]),
+                              ColumnFile.unpack_bytes(self.wkb_buffer, self.wkb_offsets, row))
+            station.nominal_power = self.nominal_powers[row]
+            self.views[row] = station
+        return self.views[row]
+
+    # returns the lat, lon rows of the centroids of the stations of the rows
+    def points(self, rows):
+        return np.column_stack((self.lats[rows], self.lons[rows]))
@@ -0,0 +1,53 @@
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from shapely import wkb
+from shapely.geometry import box
+
+from StationStore import StationStore
+
+
+class StationStoreUnitTest(unittest.TestCase):
+    @staticmethod
+    def create_row(_id, line_ids, output=None):
+        geom = box(_id, 0, _id + 1, 1)
+        return (_id, wkb.dumps(geom, srid=4326), 'plant', None, None, '380000/220000', output, None, None,
+                geom.centroid.y, geom.centroid.x, line_ids)
+
+    def test_connected_rows(self):
+        store = StationStore.from_rows([StationStoreUnitTest.create_row(1, [10, 11], '5 MW'),
+                              StationStoreUnitTest.create_row(2, []),
+                              StationStoreUnitTest.create_row(3, [11, 12])],
+                             lambda output: float(output.split()[0]) * 1000000 if output else None)
+        self.assertEqual([0, 2], store.connected_rows(np.array([11])).tolist())
+        self.assertEqual([2], store.connected_rows(np.array([12, 13])).tolist())
+        self.assertEqual([], store.connected_rows(np.array([], dtype=np.int64)).tolist())
+        station = store.station(0)
+        self.assertIs(station, store.station(0))
+        self.assertEqual(5000000.0, station.nominal_power)
+        self.assertEqual('380000;220000', station.voltage)
+        self.assertEqual([[0.5, 1.5]], store.points([0]).tolist())
+
+    def test_save_and_load(self):
+        store = StationStore.from_rows([StationStoreUnitTest.create_row(1, [10, 11], '5 MW'),
+                                        StationStoreUnitTest.create_row(2, [])],
+                                       lambda output: float(output.split()[0]) * 1000000 if output else None)
+        directory = tempfile.mkdtemp()
+        try:
+            store.save(directory, 'generators')
+            loaded = StationStore.load(directory, 'generators')
+            self.assertIsInstance(loaded.line_ids.base, np.memmap)
+            self.assertEqual([0], loaded.connected_rows(np.array([11])).tolist())
+            for row in range(len(store)):
+                (expected, station) = (store.station(row), loaded.station(row))
+                self.assertEqual(expected.serialize(), station.serialize())
+                self.assertEqual(expected.nominal_power, station.nominal_power)
+                self.assertTrue(station.geom.equals(expected.geom))
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
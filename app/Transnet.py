@@ -3,6 +3,8 @@ import logging
 import sys
 import urllib
 from datetime import datetime
+from itertools import chain
+from multiprocessing import Pool
 from optparse import OptionParser
 from os import makedirs, remove
 from os import walk
@@ -11,29 +13,76 @@ from os.path import exists
 from os.path import join
 from subprocess import call
 
+import numpy as np
 import psycopg2
 import pyproj
-from shapely import wkb, wkt
-from shapely.geometry import MultiPoint, LinearRing
+from shapely import wkt
+from shapely.geometry import MultiPoint, Point
 
+from BoundaryTable import BoundaryTable
 from CSVWriter import CSVWriter
 from CimWriter import CimWriter
-from Circuit import Circuit
+from CircuitDeduplicator import CircuitDeduplicator
 from InferenceValidator import InferenceValidator
-from Line import Line
+from LineStore import LineStore
 from LoadEstimator import LoadEstimator
+from MissingDataFinder import MissingDataFinder
+from ParallelInference import ParallelInference
+from PbfSource import PbfSource
 from Plotter import Plotter
 from PolyParser import PolyParser
-from Station import Station
+from RegionPrefetcher import RegionPrefetcher
+from RegionQueries import RegionQueries
+from RelationInference import RelationInference
+from SnapshotCache import SnapshotCache
+from StationStore import StationStore
+from Util import Util
+from WkbDecoder import WkbDecoder
 
 root = logging.getLogger()
 root.setLevel(logging.DEBUG)
 
+# Transnet instance of a country worker process
+country_transnet = None
+
+
+def init_country_worker(transnet):
+    global country_transnet
+    country_transnet = transnet
+    # the connection inherited from the parent process is left to it, the tasks open one of their own when needed
+    country_transnet.conn = None
+    country_transnet.cur = None
+    # the processes of a pool cannot start a pool of their own
+    country_transnet.workers = 1
+    country_transnet.prefetch = 0
+
+
+# models one country in a worker process, returns the country and the error message if modeling failed
+def model_country_in_worker(task):
+    (continent_name, country, voltage_levels) = task
+    try:
+        if country_transnet.conn is None and not country_transnet.offline:
+            country_transnet.connect()
+        country_transnet.model_country(continent_name, country, voltage_levels)
+        return country, None
+    except Exception as ex:
+        # a failed query aborts the transaction, the next country starts over with a new connection - it is opened
+        # by the next task, so that a failure to reconnect is reported for that country instead of ending the worker
+        if country_transnet.conn is not None:
+            try:
+                country_transnet.conn.close()
+            except Exception as close_ex:
+                root.debug('Closing the connection after the failure of %s failed: %s', country, str(close_ex))
+            country_transnet.conn = None
+            country_transnet.cur = None
+        return country, str(ex)
+
 
 class Transnet:
     def __init__(self, _database, _user, _host, _port, _password, _ssid, _poly, _bpoly, _verbose, _validate,
                  _topology, _voltage_levels, _load_estimation, _destdir, _continent, _whole_planet, _find_missing_data,
-                 _close_nodes, _overpass):
+                 _close_nodes, _overpass, _sweep, _radius, _workers, _jobs, _batch_size, _prefetch, _cache, _offline,
+                 _pbf):
         self.length_all = 0
         self.all_lines = dict()
         self.all_stations = dict()
@@ -54,14 +103,47 @@ class Transnet:
         self.find_missing_data = _find_missing_data
         self.close_nodes = _close_nodes
         self.overpass = _overpass
+        self.sweep = _sweep
+        self.radius = _radius
+        self.workers = _workers
+        self.jobs = _jobs
+        self.batch_size = _batch_size
+        self.prefetch = _prefetch
+        self.snapshot_cache = SnapshotCache(_cache) if _cache else None
+        # lines and stations read from an OSM file instead of the database
+        self.pbf_source = PbfSource(_pbf, _close_nodes) if _pbf else None
+        # regions are read from the snapshot cache or the OSM file only, without connecting to the database
+        self.offline = _offline or self.pbf_source is not None
+        if _offline and not self.snapshot_cache:
+            raise ValueError('Running offline needs the snapshot cache (-C)')
+        if self.offline:
+            if self.validate or self.find_missing_data:
+                root.warning('Evaluation and finding missing data need the database, both are skipped offline')
+            self.validate = False
+            self.find_missing_data = False
+            self.prefetch = 0
+        # region fetched by the last modeling, kept for find_missing_data_for_country
+        self.region = None
 
         self.connection = {'database': _database, 'user': _user, 'host': _host, 'port': _port}
-        self.conn = psycopg2.connect(password=_password, **self.connection)
-        self.cur = self.conn.cursor()
+        self.password = _password
+        self.connect()
 
-        self.covered_nodes = None
         self.geod = pyproj.Geod(ellps='WGS84')
 
+    def connect(self):
+        if self.offline:
+            self.conn = None
+            self.cur = None
+            self.topology_tables = False
+            return
+        self.conn = psycopg2.connect(password=self.password, **self.connection)
+        WkbDecoder.register(self.conn)
+        self.cur = self.conn.cursor()
+        # tables of sql/transnet_topology.sql, read instead of the planet_osm_* tables if built for the import
+        self.cur.execute("SELECT to_regclass('transnet_station_lines') IS NOT NULL")
+        self.topology_tables = self.cur.fetchone()[0]
+
     # noinspection PyMethodMayBeStatic
     def prepare_poly_country(self, continent_name, country):
         if not exists('../data/{0}/{1}/'.format(continent_name, country)):
@@ -91,130 +173,9 @@ class Transnet:
             download_string = 'http://download.geofabrik.de/{0}.poly'.format(continent_name)
         urllib.URLopener().retrieve(download_string, '../data/planet/{0}/pfile.poly'.format(continent_name))
 
-    def reset_params(self):
-        self.covered_nodes = None
-
     def create_relations(self, stations, lines, _ssid, voltage):
-        # root.info('\nStart inference for Substation %s', str(ssid))
-        relations = []
-        relations.extend(self.infer_relations(stations, lines, stations[_ssid]))
-
-        circuits = []
-        for relation in relations:
-            # at least two end points + one line
-            if self.num_subs_in_relation(relation) == 2 and len(relation) >= 3:
-                first_line = relation[1]
-                station1 = relation[0]
-                station2 = relation[-1]
-                station1.add_connected_station(station2.id, voltage)
-                station2.add_connected_station(station1.id, voltage)
-                circuit = Circuit(relation, voltage, first_line.name, first_line.ref)
-                circuits.append(circuit)
-
-        return circuits
-
-    # inferences circuits around a given station
-    # station - represents the station to infer circuits for
-    # stations - dict of all possibly connected stations
-    # lines - list of all lines that could connect stations
-    def infer_relations(self, stations, lines, station):
-        # find lines that cross the station's area - note that
-        #  the end point of the line has to be within the substation for valid crossing
-        relations = []
-        for line in lines.values():
-            node_to_continue_id = None
-            # here it checks to find the intersecting lines and station, if no intersecting found then looks for line
-            # nodes with distance less than 50 meters
-            if self.node_intersect_with_any_station(line.end_point_dict[line.first_node()], [station]):
-                node_to_continue_id = line.last_node()
-            elif self.node_intersect_with_any_station(line.end_point_dict[line.last_node()], [station]):
-                node_to_continue_id = line.first_node()
-            if self.close_nodes and self.node_within_distance_any_station(line.end_point_dict[line.first_node()],
-                                                                          [station]):
-                node_to_continue_id = line.last_node()
-            elif self.close_nodes and self.node_within_distance_any_station(line.end_point_dict[line.last_node()],
-                                                                            [station]):
-                node_to_continue_id = line.first_node()
-
-            if node_to_continue_id:
-                self.covered_nodes = set(line.nodes)
-                self.covered_nodes.remove(node_to_continue_id)
-                if line.id in station.covered_line_ids:
-                    root.debug('Relation with %s at %s already covered', str(line), str(station))
-                    continue
-                root.debug('%s', str(station))
-                root.debug('%s', str(line))
-                station.covered_line_ids.append(line.id)
-                # init new circuit
-                # here we have the beginning of the relation which is one station with one line connected to it
-                relation = [station, line]
-                relations.extend(
-                    self.infer_relation(stations, lines, relation, node_to_continue_id, line))
-        return relations
-
-    # recursive function that infers electricity circuits
-    # circuit - sorted member array
-    # line - line of circuit
-    # stations - all known stations
-    def infer_relation(self, stations, lines, relation, node_to_continue_id, from_line):
-        relation = list(relation)  # make a copy
-        start_station = relation[0]
-        # here also check for intersection
-        station_id = self.node_intersect_with_any_station(
-            from_line.end_point_dict[node_to_continue_id], stations.values())
-        if not station_id and self.close_nodes:
-            self.node_within_distance_any_station(
-                from_line.end_point_dict[node_to_continue_id], stations.values())
-        if station_id and station_id == start_station.id:  # if node to continue is at the starting station --> LOOP
-            root.debug('Encountered loop: %s', self.to_overpass_string(relation))
-            return []
-        elif station_id and station_id != start_station.id:
-            # if a node is within another station --> FOUND THE 2nd ENDPOINT
-            station = stations[station_id]
-            root.debug('%s', str(station))
-            if from_line.id in station.covered_line_ids:
-                root.debug('Relation with %s at %s already covered', str(from_line), str(station))
-                return []
-            station.covered_line_ids.append(from_line.id)
-            relation.append(station)
-            root.debug('Could obtain relation')
-            return [list(relation)]
-
-        # no endpoints encountered - handle line subsection
-        # at first find all lines that cover the node to continue
-        relations = []
-        for line in lines.values():
-            if from_line.end_point_dict[node_to_continue_id].intersects(line.geom):
-                if line.id == from_line.id:
-                    continue
-                root.debug('%s', str(line))
-                if from_line.end_point_dict[node_to_continue_id].intersects(line.end_point_dict[line.first_node()]):
-                    new_node_to_continue_id = line.last_node()
-                else:
-                    new_node_to_continue_id = line.first_node()
-                if new_node_to_continue_id in self.covered_nodes:
-                    relation.append(line)
-                    root.debug('Encountered loop - stopping inference at line (%s): %s', str(line.id),
-                               self.to_overpass_string(relation))
-                    relation.remove(line)
-                    self.covered_nodes.update(line.nodes)
-                    continue
-                relation_copy = list(relation)
-                relation_copy.append(line)
-                self.covered_nodes.update(line.nodes)
-                self.covered_nodes.remove(new_node_to_continue_id)
-                relations.extend(self.infer_relation(stations, lines, relation_copy, new_node_to_continue_id, line))
-
-        # if not relations:
-        #     root.debug('Could not obtain circuit')
-        return relations
-
-    # noinspection PyMethodMayBeStatic
-    def to_overpass_string(self, relation):
-        overpass = ''
-        for member in relation:
-            overpass += 'way(' + str(member.id) + ');(._;>;);out;'
-        return overpass
+        relation_inference = RelationInference(stations, lines, self.close_nodes, self.geod)
+        return relation_inference.create_relations(stations[_ssid], voltage)
 
     # noinspection PyMethodMayBeStatic
     def circuit_to_overpass_string(self, circuit):
@@ -223,48 +184,6 @@ class Transnet:
             overpass += 'way(' + str(member.id) + ');(._;>;);out;'
         return overpass
 
-    # returns if node is in station
-    # noinspection PyMethodMayBeStatic
-    def node_intersect_with_any_station(self, node, stations):
-        for station in stations:
-            if node.intersects(station.geom):
-                return station.id
-        return None
-
-    # returns if node is within curtain distance
-    def node_within_distance_any_station(self, node, stations):
-        for station in stations:
-            distance = self.get_node_station_ditance(node, station)
-            if distance and distance < 50:
-                return station.id
-        return None
-
-    def get_node_station_ditance(self, node, station):
-        pol_ext = LinearRing(station.geom.exterior.coords)
-        touch_node = pol_ext.interpolate(pol_ext.project(node))
-        angle1, angle2, distance = self.geod.inv(touch_node.coords.xy[0], touch_node.coords.xy[1],
-                                                 node.coords.xy[0], node.coords.xy[1])
-        if distance and len(distance):
-            return distance[0]
-        return None
-
-    # noinspection PyMethodMayBeStatic
-    def num_subs_in_relation(self, relation):
-        num_stations = 0
-        for way in relation:
-            if isinstance(way, Station):
-                num_stations += 1
-        return num_stations
-
-    # noinspection PyMethodMayBeStatic
-    def get_close_components(self, components, center_component):
-        close_components = dict()
-        for component in components:
-            distance = center_component.geom.centroid.distance(component.geom.centroid)
-            if distance <= 300000:
-                close_components[component.id] = component
-        return close_components
-
     # noinspection PyMethodMayBeStatic
     def parse_power(self, power_string):
         if not power_string:
@@ -298,29 +217,21 @@ class Transnet:
     def create_relations_of_region(self, substations, generators, lines, voltage):
         stations = substations.copy()
         stations.update(generators)
-        circuits = []
-        for substation_id in substations.keys():
-            close_stations_dict = self.get_close_components(stations.values(), stations[substation_id])
-            close_lines_dict = self.get_close_components(lines.values(), stations[substation_id])
-            circuits.extend(self.create_relations(close_stations_dict, close_lines_dict, substation_id, voltage))
-        return circuits
+        relation_inference = RelationInference(stations, lines, self.close_nodes, self.geod)
+        if self.sweep:
+            return relation_inference.create_relations_of_region(substations.keys(), voltage)
+        return relation_inference.create_relations_of_neighborhoods(substations.keys(), voltage, self.radius)
 
+    # returns the circuits not seen before by the deduplicator, which is passed the circuits of a model as they are
+    # inferred, e.g. those of each voltage level
     # noinspection PyMethodMayBeStatic
-    def remove_duplicates(self, circuits):
+    def remove_duplicates(self, circuits, circuit_deduplicator):
         root.info('Remove duplicates from %s circuits', str(len(circuits)))
-        covered_connections = []
-        filtered_circuits = []
         total_line_length = 0
         for circuit in circuits:
-            station1 = circuit.members[0]
-            station2 = circuit.members[-1]
             for line in circuit.members[1:-1]:
                 total_line_length += line.length
-            if str(station1.id) + str(station2.id) + str(circuit.voltage) in covered_connections \
-                    or str(station2.id) + str(station1.id) + str(circuit.voltage) in covered_connections:
-                continue
-            covered_connections.append(str(station1.id) + str(station2.id) + str(circuit.voltage))
-            filtered_circuits.append(circuit)
+        filtered_circuits = circuit_deduplicator.filter(circuits)
         root.info('%s circuits remain', str(len(filtered_circuits)))
         root.info('Line length with duplicates is %s meters', str(total_line_length))
         return filtered_circuits
@@ -377,11 +288,13 @@ class Transnet:
             for country in continent_json:
                 self.prepare_poly_country(continent_name, country)
                 boundary = PolyParser.poly_to_polygon('../data/{0}/{1}/pfile.poly'.format(continent_name, country))
-                where_clause = "st_intersects(l.way, st_transform(st_geomfromtext('" + boundary.wkt + "',4269),3857))"
+                BoundaryTable.load(self.cur, boundary)
+                where_clause = BoundaryTable.intersects('l.way')
                 query = '''SELECT DISTINCT(voltage) AS voltage, count(*)
                             AS num FROM planet_osm_line  l WHERE %s
                             GROUP BY voltage ORDER BY num DESC''' % where_clause
                 continent_json[country]['voltages'] = self.get_voltages_from_query(query=query)
+                continent_json[country]['lines'] = self.count_lines(where_clause)
             continent_file.seek(0)
             continent_file.write(json.dumps(continent_json, indent=4))
             continent_file.truncate()
@@ -417,6 +330,12 @@ class Transnet:
                     voltages_string += '|' + str(voltage)
         return voltages_string
 
+    def count_lines(self, where_clause):
+        query = '''SELECT count(*) FROM planet_osm_line l
+                    WHERE %s AND %s''' % (RegionQueries.is_line('l'), where_clause)
+        self.cur.execute(query)
+        return self.cur.fetchone()[0]
+
     def export_to_json(self, all_circuits):
         try:
             with open('{0}/relations.json'.format(self.destdir), 'w') as outfile:
@@ -431,100 +350,63 @@ class Transnet:
         except Exception as ex:
             root.error(ex.message)
 
-    def inference_for_voltage(self, voltage_level, where_clause, length_found_lines, equipment_points, all_substations,
+    def inference_for_voltage(self, voltage_level, region, length_found_lines, equipment_points, all_substations,
                               all_generators, boundary):
-        root.info('Infer net for voltage level %sV', voltage_level)
+        (length_found_lines, equipment_points, generators, substations, lines) = self.fetch_voltage_level(
+            voltage_level, region, length_found_lines, equipment_points, all_substations, all_generators)
+        circuits = self.infer_voltage_level(voltage_level, substations, generators, lines, boundary)
+        return length_found_lines, equipment_points, generators, substations, circuits
 
-        substations = dict()
-        generators = dict()
-        lines = dict()
-
-        # create lines dictionary
-        sql = '''SELECT l.osm_id AS id,
-                st_transform(create_line(l.osm_id), 4326) AS geom,
-                l.way AS srs_geom, 
-                l.power AS type,
-                l.name,
-                l.ref, 
-                l.voltage, 
-                l.cables, 
-                w.nodes, 
-                w.tags,
-                st_transform(create_point(w.nodes[1]), 4326) AS first_node_geom,
-                st_transform(create_point(w.nodes[array_length(w.nodes, 1)]), 4326) AS last_node_geom,
-                ST_Y(ST_Transform(ST_Centroid(l.way),4326)) AS lat,
-                ST_X(ST_Transform(ST_Centroid(l.way),4326)) AS lon,
-                st_length(st_transform(l.way, 4326), TRUE) AS spheric_length
-                FROM planet_osm_line l, planet_osm_ways w
-                WHERE l.osm_id >= 0 
-                AND l.power ~ 'line|cable|minor_line'
-                AND l.voltage ~ '%s' 
-                AND l.osm_id = w.id AND %s''' % (voltage_level, where_clause)
-
-        self.cur.execute(sql)
-        result = self.cur.fetchall()
-        # noinspection PyShadowingBuiltins,PyShadowingBuiltins
-        for (id, geom, srs_geom, type, name, ref, voltage, cables, nodes, tags, first_node_geom, last_node_geom,
-             lat, lon, length) in result:
-            line = wkb.loads(geom, hex=True)
-            raw_geom = geom
-            srs_line = wkb.loads(srs_geom, hex=True)
-            length_found_lines += length
-            first_node = wkb.loads(first_node_geom, hex=True)
-            last_node = wkb.loads(last_node_geom, hex=True)
-            end_points_geom_dict = dict()
-            end_points_geom_dict[nodes[0]] = first_node
-            end_points_geom_dict[nodes[-1]] = last_node
-            lines[id] = Line(id, line, srs_line, type, name.replace(',', ';') if name else None,
-                             ref.replace(',', ';') if ref is not None else None,
-                             voltage.replace(',', ';').replace('/', ';') if voltage else None, cables,
-                             nodes, tags, lat, lon,
-                             end_points_geom_dict, length, raw_geom)
-            equipment_points.append((lat, lon))
-        root.info('Found %s lines', str(len(result)))
-
-        # create station dictionary by quering only ways
-        sql = '''SELECT DISTINCT(p.osm_id) AS id,
-                  st_transform(p.way, 4326) AS geom,
+    # fetches the lines of all voltage levels of the region and the substations and generators connected to them
+    # with one query each - stations come with the ids of the lines they are connected to, so that the voltage
+    # levels are told apart by fetch_voltage_level without querying the database again
+    # returns the LineStore of the lines and the StationStores of the substations and generators with the ids of
+    # their lines
+    # conn - connection to query, with the boundary of the region loaded into the BoundaryTable if any - None to read
+    #  the region from the snapshot cache or the OSM file only
+    # boundary - boundary loaded into the BoundaryTable, None if where_clause does not refer to it
+    # noinspection PyMethodMayBeStatic
+    def fetch_region(self, where_clause, conn, voltage_levels, boundary):
+        lines_sql = RegionQueries.lines(self.topology_tables, '''l.osm_id >= 0
+                AND %s
+                AND l.voltage ~ '%s' AND %s''' % (RegionQueries.is_line('l'), voltage_levels, where_clause))
+
+        # lines and stations are joined by the incidences of transnet_station_lines if built
+        if self.topology_tables:
+            stations_from = '''transnet_lines l, transnet_station_lines i, transnet_stations p
+                  WHERE i.line_id = l.osm_id AND i.station_id = p.osm_id'''
+            connection_clause = 'TRUE' if self.close_nodes else 'i.intersecting'
+        else:
+            stations_from = '''planet_osm_line l, planet_osm_polygon p
+                  WHERE l.osm_id >= 0 AND p.osm_id >= 0'''
+            if self.close_nodes:
+                connection_clause = RegionQueries.is_close()
+            else:
+                connection_clause = 'st_intersects(l.way, p.way)'
+
+        # create station list by quering only ways
+        substations_sql = '''SELECT p.osm_id AS id,
+                  ST_AsEWKB(st_transform(p.way, 4326)) AS geom,
                   p.power AS type, 
                   p.name, 
                   p.ref, 
                   p.voltage, 
                   p.tags,
                   ST_Y(ST_Transform(ST_Centroid(p.way),4326)) AS lat,
-                  ST_X(ST_Transform(ST_Centroid(p.way),4326)) AS lon
-                  FROM planet_osm_line l, planet_osm_polygon p
-                  WHERE l.osm_id >= 0 
-                  AND p.osm_id >= 0
-                  AND p.power ~ 'substation|station|sub_station' 
+                  ST_X(ST_Transform(ST_Centroid(p.way),4326)) AS lon,
+                  array_agg(l.osm_id) AS line_ids
+                  FROM %s
+                  AND %s
                   AND (p.voltage ~ '%s' OR (p.voltage = '') IS NOT FALSE)                   
-                  AND l.power ~ 'line|cable|minor_line' 
-                  AND l.voltage ~ '%s' AND %s''' % (self.voltage_levels, voltage_level, where_clause)
-
-        if self.close_nodes:
-            sql += ''' AND (st_intersects(l.way, p.way) OR st_distance(l.way, p.way) < 100)'''
-        else:
-            sql += ''' AND st_intersects(l.way, p.way)'''
-
-        self.cur.execute(sql)
-        result = self.cur.fetchall()
-        # noinspection PyShadowingBuiltins,PyShadowingBuiltins
-        for (id, geom, type, name, ref, voltage, tags, lat, lon) in result:
-            if id not in all_substations:
-                polygon = wkb.loads(geom, hex=True)
-                raw_geom = geom
-                substations[id] = Station(id, polygon, type, name, ref,
-                                          voltage.replace(',', ';').replace('/', ';') if voltage else None,
-                                          None, tags, lat, lon, raw_geom)
-                equipment_points.append((lat, lon))
-            else:
-                substations[id] = all_substations[id]
-
-        root.info('Found %s stations', str(len(equipment_points)))
+                  AND %s
+                  AND l.voltage ~ '%s' AND %s AND %s
+                  GROUP BY p.osm_id, p.way, p.power, p.name, p.ref, p.voltage, p.tags''' \
+              % (stations_from, RegionQueries.is_substation('p'), voltage_levels, RegionQueries.is_line('l'),
+                 voltage_levels, where_clause, connection_clause)
 
         # add power plants with area
-        sql = '''SELECT DISTINCT(p.osm_id) AS id,
-                st_transform(p.way, 4326) AS geom,
+        generators_sql = '''SELECT p.osm_id AS id,
+                ST_AsEWKB(st_transform(p.way, 4326)) AS geom,
                 p.power AS type,
                 p.name, 
                 p.ref, 
@@ -533,44 +415,87 @@ class Transnet:
                 p.\"generator:output:electricity\" AS output2,
                 p.tags, 
                 ST_Y(ST_Transform(ST_Centroid(p.way),4326)) AS lat,
-                ST_X(ST_Transform(ST_Centroid(p.way),4326)) AS lon
-                FROM planet_osm_line l, planet_osm_polygon p
-                WHERE l.osm_id >= 0 
-                AND p.osm_id >= 0 
-                AND p.power ~ 'plant|generator'               
-                AND l.power ~ 'line|cable|minor_line'
-                AND l.voltage ~ '%s' AND %s''' % (voltage_level, where_clause)
-
-        if self.close_nodes:
-            sql += ''' AND (st_intersects(l.way, p.way) OR st_distance(l.way, p.way) < 100)'''
+                ST_X(ST_Transform(ST_Centroid(p.way),4326)) AS lon,
+                array_agg(l.osm_id) AS line_ids
+                FROM %s
+                AND %s
+                AND %s
+                AND l.voltage ~ '%s' AND %s AND %s
+                GROUP BY p.osm_id, p.way, p.power, p.name, p.ref, p.voltage, p.\"plant:output:electricity\",
+                p.\"generator:output:electricity\", p.tags''' \
+              % (stations_from, RegionQueries.is_generator('p'), RegionQueries.is_line('l'), voltage_levels,
+                 where_clause, connection_clause)
+
+        queries = [lines_sql, substations_sql, generators_sql]
+        if self.pbf_source:
+            region = self.create_stores(self.pbf_source.batches(boundary, self.ssid, voltage_levels, self.batch_size))
+        elif self.snapshot_cache:
+            key = SnapshotCache.key(boundary, self.ssid, voltage_levels, self.close_nodes)
+            region = self.snapshot_cache.region(conn, key, self.topology_tables, lambda: self.create_stores(
+                [Util.stream_batches(conn, sql, self.batch_size) for sql in queries]))
         else:
-            sql += ''' AND st_intersects(l.way, p.way)'''
+            region = self.create_stores([Util.stream_batches(conn, sql, self.batch_size) for sql in queries])
+
+        (lines, substations, generators) = region
+        root.info('Found %s lines in the region', str(len(lines)))
+        root.info('Found %s stations in the region', str(len(substations)))
+        root.info('Found %s generators in the region', str(len(generators)))
+        return region
+
+    # returns the LineStore and the StationStores of the batches of the rows of the lines, substations and generators
+    def create_stores(self, batches):
+        (line_batches, substation_batches, generator_batches) = batches
+        return (LineStore.from_rows(chain.from_iterable(line_batches)),
+                StationStore.from_rows(chain.from_iterable(substation_batches)),
+                StationStore.from_rows(chain.from_iterable(generator_batches), self.parse_power))
+
+    # returns the lines of the voltage level of the region fetched by fetch_region and the substations and generators
+    # connected to them, as the queries of the single voltage level would - a line is of the voltage level if its
+    # voltage matches the voltage level as regular expression
+    # equipment_points - list of arrays of lat, lon rows, extended by the points of the lines and of the stations not
+    #  found before
+    # noinspection PyMethodMayBeStatic
+    def fetch_voltage_level(self, voltage_level, region, length_found_lines, equipment_points, all_substations,
+                            all_generators):
+        root.info('Infer net for voltage level %sV', voltage_level)
+        (region_lines, region_substations, region_generators) = region
+
+        line_rows = region_lines.voltage_level_rows(voltage_level)
+        lines = region_lines.lines(line_rows)
+        length_found_lines += region_lines.length(line_rows)
+        equipment_points.append(region_lines.points(line_rows))
+        root.info('Found %s lines', str(len(lines)))
+
+        line_ids = region_lines.ids[line_rows]
+        substations = Transnet.connected_stations(region_substations, line_ids, all_substations, equipment_points)
+        root.info('Found %s stations', str(len(substations)))
+        generators = Transnet.connected_stations(region_generators, line_ids, all_generators, equipment_points)
+        root.info('Found %s generators', str(len(generators)))
 
-        self.cur.execute(sql)
-        result = self.cur.fetchall()
-        # noinspection PyShadowingBuiltins,PyShadowingBuiltins
-        for (id, geom, type, name, ref, voltage, output1, output2, tags, lat, lon) in result:
-            if id not in all_generators:
-                polygon = wkb.loads(geom, hex=True)
-                raw_geom = geom
-                generators[id] = Station(id, polygon, type, name, ref,
-                                         voltage.replace(',', ';').replace('/', ';') if voltage else None,
-                                         None, tags, lat, lon, raw_geom)
-                generators[id].nominal_power = self.parse_power(
-                    output1) if output1 is not None else self.parse_power(output2)
-                equipment_points.append((lat, lon))
+        return length_found_lines, equipment_points, generators, substations, lines
+
+    # returns the stations of the StationStore connected to any of the lines by id, the ones found before as of
+    # found_stations, and adds the points of the others to equipment_points
+    @staticmethod
+    def connected_stations(region_stations, line_ids, found_stations, equipment_points):
+        stations = dict()
+        new_rows = []
+        for row in region_stations.connected_rows(line_ids).tolist():
+            station = region_stations.station(row)
+            if station.id not in found_stations:
+                stations[station.id] = station
+                new_rows.append(row)
             else:
-                generators[id] = all_generators[id]
-        root.info('Found %s generators', str(len(generators)))
+                stations[station.id] = found_stations[station.id]
+        equipment_points.append(region_stations.points(new_rows))
+        return stations
 
+    def infer_voltage_level(self, voltage_level, substations, generators, lines, boundary):
         if boundary:
-            circuits = self.create_relations_of_region(substations, generators, lines, voltage_level)
-        else:
-            stations = substations.copy()
-            stations.update(generators)
-            circuits = self.create_relations(stations, lines, self.ssid, voltage_level)
-
-        return length_found_lines, equipment_points, generators, substations, circuits
+            return self.create_relations_of_region(substations, generators, lines, voltage_level)
+        stations = substations.copy()
+        stations.update(generators)
+        return self.create_relations(stations, lines, self.ssid, voltage_level)
 
     def find_missing_data_for_country(self):
         root.info('Finding missing data')
@@ -579,241 +504,23 @@ class Transnet:
             makedirs(self.destdir)
 
         if self.poly:
-            boundary = PolyParser.poly_to_polygon(self.poly)
-            where_clause = "st_intersects(l.way, st_transform(st_geomfromtext('" + boundary.wkt + "',4269),3857))"
-            where_clause_station = "st_intersects(p.way, st_transform(st_geomfromtext('" + \
-                                   boundary.wkt + "',4269),3857))"
+            BoundaryTable.load(self.cur, PolyParser.poly_to_polygon(self.poly))
+            where_clause = BoundaryTable.intersects('l.way')
+            where_clause_station = BoundaryTable.intersects('p.way')
         elif self.bpoly:
-            boundary = wkt.loads(self.bpoly)
-            where_clause = "st_intersects(l.way, st_transform(st_geomfromtext('" + boundary.wkt + "',4269),3857))"
-            where_clause_station = "st_intersects(p.way, st_transform(st_geomfromtext('" + \
-                                   boundary.wkt + "',4269),3857))"
+            BoundaryTable.load(self.cur, wkt.loads(self.bpoly))
+            where_clause = BoundaryTable.intersects('l.way')
+            where_clause_station = BoundaryTable.intersects('p.way')
         else:
-            where_clause = "st_distance(l.way, (select way from planet_osm_polygon where osm_id = " + str(
-                self.ssid) + ")) <= 300000"
-            where_clause_station = "st_distance(p.way, (select way from planet_osm_polygon where osm_id = " + str(
-                self.ssid) + ")) <= 300000"
-
-        voltages_line = set()
-        voltages_cable = set()
-        voltages_minor_line = set()
-        line_voltage_query = '''SELECT DISTINCT(voltage) AS voltage, power as power_type, count(*) AS num
-                                          FROM planet_osm_line  l WHERE %s
-                                          GROUP BY power, voltage''' % where_clause
-        self.cur.execute(line_voltage_query)
-        result_voltages = self.cur.fetchall()
-        for (voltage, power_type, num) in result_voltages:
-            if num > 30 and voltage:
-                raw_voltages = [self.try_parse_int(x) for x in str(voltage).strip().split(';')]
-                if power_type == 'line':
-                    voltages_line = voltages_line.union(set(raw_voltages))
-                elif power_type == 'cable':
-                    voltages_cable = voltages_cable.union(set(raw_voltages))
-                elif power_type == 'minor_line':
-                    voltages_minor_line = voltages_minor_line.union(set(raw_voltages))
-
-        cables_line = set()
-        cables_cable = set()
-        cables_minor_line = set()
-        line_cables_query = '''SELECT DISTINCT(cables) AS cables, power as power_type, count(*) AS num
-                                                  FROM planet_osm_line  l WHERE %s
-                                                  GROUP BY power, cables''' % where_clause
-        self.cur.execute(line_cables_query)
-        result_cables = self.cur.fetchall()
-        for (cables, power_type, num) in result_cables:
-            if num > 30 and cables:
-                raw_cables = [self.try_parse_int(x) for x in str(cables).strip().split(';')]
-                if power_type == 'line':
-                    cables_line = cables_line.union(set(raw_cables))
-                elif power_type == 'cable':
-                    cables_cable = cables_cable.union(set(raw_cables))
-                elif power_type == 'minor_line':
-                    cables_minor_line = cables_minor_line.union(set(raw_cables))
-
-        voltages_line_str = ';'.join([str(x) for x in voltages_line])
-        cables_line_str = ';'.join([str(x) for x in cables_line])
-        voltages_cable_str = ';'.join([str(x) for x in voltages_cable])
-        cables_cable_str = ';'.join([str(x) for x in cables_cable])
-        voltages_minor_line_str = ';'.join([str(x) for x in voltages_minor_line])
-        cables_minor_line_str = ';'.join([str(x) for x in cables_minor_line])
-
-        lines = dict()
-
-        lines_sql = '''SELECT l.osm_id AS osm_id,
-                        st_transform(create_line(l.osm_id), 4326) AS geom,
-                        l.way AS srs_geom, l.power AS power_type,
-                        l.name, l.ref, l.voltage, l.cables, w.nodes, w.tags,
-                        st_transform(create_point(w.nodes[1]), 4326) AS first_node_geom,
-                        st_transform(create_point(w.nodes[array_length(w.nodes, 1)]), 4326) AS last_node_geom,
-                        ST_Y(ST_Transform(ST_Centroid(l.way),4326)) AS lat,
-                        ST_X(ST_Transform(ST_Centroid(l.way),4326)) AS lon,
-                        st_length(st_transform(l.way, 4326), TRUE) AS spheric_length
-                        FROM planet_osm_line l, planet_osm_ways w
-                        WHERE l.osm_id >= 0 AND l.power ~ 'line|cable|minor_line'
-                        AND (l.voltage IS NULL OR l.cables IS NULL) AND l.osm_id = w.id AND %s''' % where_clause
-
-        self.cur.execute(lines_sql)
-        lines_result = self.cur.fetchall()
-        for (osm_id, geom, srs_geom, power_type, name, ref, voltage, cables, nodes, tags, first_node_geom,
-             last_node_geom, lat, lon, length) in lines_result:
-            line = wkb.loads(geom, hex=True)
-            raw_geom = geom
-            srs_line = wkb.loads(srs_geom, hex=True)
-            first_node = wkb.loads(first_node_geom, hex=True)
-            last_node = wkb.loads(last_node_geom, hex=True)
-            end_points_geom_dict = dict()
-            end_points_geom_dict[nodes[0]] = first_node
-            end_points_geom_dict[nodes[-1]] = last_node
-            temp_line = Line(osm_id, line, srs_line, power_type, name.replace(',', ';') if name else None,
-                             ref.replace(',', ';') if ref is not None else None,
-                             voltage.replace(',', ';').replace('/', ';') if voltage else None, cables,
-                             nodes, tags, lat, lon,
-                             end_points_geom_dict, length, raw_geom)
-            if power_type == 'line':
-                temp_line.add_missing_data_estimation(voltage=voltages_line_str, cables=cables_line_str)
-            elif power_type == 'cable':
-                temp_line.add_missing_data_estimation(voltage=voltages_cable_str, cables=cables_cable_str)
-            elif power_type == 'minor_line':
-                temp_line.add_missing_data_estimation(voltage=voltages_minor_line_str, cables=cables_minor_line_str)
-
-            if power_type in ['line', 'cable', 'minor_line']:
-                lines[osm_id] = temp_line
-
-        with open('{0}/lines_missing_data.json'.format(self.destdir), 'w') as outfile:
-            json.dump([l.serialize() for osm_id, l in lines.iteritems()], outfile, indent=4)
-
-        file_size = self.convert_size_mega_byte(getsize('{0}/lines_missing_data.json'.format(self.destdir)))
-
-        if file_size >= 100:
-            command = 'split --bytes=50M {0}/lines_missing_data.json {0}/_lines_missing_data'.format(self.destdir)
-            return_code = call(command, shell=True)
-            root.info('Lines Missing Data file split return {0}'.format(return_code))
-            remove('{0}/lines_missing_data.json'.format(self.destdir))
-
-        stations_missing_connections_sql = '''SELECT DISTINCT
-                                              p.osm_id                                     AS osm_id,
-                                              st_transform(p.way, 4326)                    AS geom,
-                                              p.power                                      AS power_type,
-                                              p.name,
-                                              p.ref,
-                                              p.voltage,
-                                              p.tags,
-                                              ST_Y(ST_Transform(ST_Centroid(p.way), 4326)) AS lat,
-                                              ST_X(ST_Transform(ST_Centroid(p.way), 4326)) AS lon
-                                            FROM planet_osm_polygon p
-                                            WHERE %s
-                                            EXCEPT
-                                            SELECT DISTINCT
-                                              p.osm_id                                     AS osm_id,
-                                              st_transform(p.way, 4326)                    AS geom,
-                                              p.power                                      AS power_type,
-                                              p.name,
-                                              p.ref,
-                                              p.voltage,
-                                              p.tags,
-                                              ST_Y(ST_Transform(ST_Centroid(p.way), 4326)) AS lat,
-                                              ST_X(ST_Transform(ST_Centroid(p.way), 4326)) AS lon
-                                            FROM planet_osm_line l, planet_osm_polygon p
-                                            WHERE %s
-                                                  AND l.osm_id >= 0
-                                                  AND p.osm_id >= 0
-                                                  AND p.power ~ 'substation|station|sub_station|plant|generator'
-                                                  AND l.power ~ 'line|cable|minor_line'
-                                                  AND st_intersects(l.way, p.way);''' % \
-                                           (where_clause_station, where_clause)
-
-        stations_missing_voltage = '''SELECT DISTINCT
-                                      p.osm_id                                     AS osm_id,
-                                      st_transform(p.way, 4326)                    AS geom,
-                                      p.power                                      AS power_type,
-                                      p.name,
-                                      p.ref,
-                                      p.voltage,
-                                      p.tags,
-                                      ST_Y(ST_Transform(ST_Centroid(p.way), 4326)) AS lat,
-                                      ST_X(ST_Transform(ST_Centroid(p.way), 4326)) AS lon
-                                    FROM planet_osm_polygon p
-                                    WHERE %s
-                                    AND p.voltage IS NULL;''' % where_clause_station
-
-        stations_voltages = '''SELECT
-                              p.voltage AS voltage,
-                              p.power AS power_type,
-                              count(*) AS num
-                            FROM planet_osm_polygon p
-                            WHERE %s
-                            GROUP BY power, voltage;''' % where_clause_station
-
-        voltages_substations = set()
-        voltages_stations = set()
-        voltages_plant = set()
-        self.cur.execute(stations_voltages)
-        result_station_voltages = self.cur.fetchall()
-        for (voltage, power_type, num) in result_station_voltages:
-            if num > 30 and voltage:
-                raw_voltages = [self.try_parse_int(x) for x in str(voltage).strip().split(';')]
-                if power_type in ['substation', 'sub_station']:
-                    voltages_substations = voltages_substations.union(set(raw_voltages))
-                elif power_type == 'station':
-                    voltages_stations = voltages_stations.union(set(raw_voltages))
-                elif power_type in ['plant', 'generator']:
-                    voltages_plant = voltages_plant.union(set(raw_voltages))
-
-        voltages_substations_str = ';'.join([str(x) for x in voltages_substations])
-        voltages_stations_str = ';'.join([str(x) for x in voltages_stations])
-        voltages_plant_str = ';'.join([str(x) for x in voltages_plant])
-
-        stations_missing_data = dict()
-
-        self.cur.execute(stations_missing_connections_sql)
-        result_stations_missing_connection = self.cur.fetchall()
-        for (osm_id, geom, power_type, name, ref, voltage, tags, lat, lon) in result_stations_missing_connection:
-            if osm_id not in stations_missing_data:
-                polygon = wkb.loads(geom, hex=True)
-                raw_geom = geom
-                temp_station = Station(osm_id, polygon, power_type, name, ref,
-                                       voltage.replace(',', ';').replace('/', ';') if voltage else None,
-                                       None, tags, lat, lon, raw_geom)
-                temp_station.add_missing_connection()
-                if power_type in ['substation', 'sub_station']:
-                    temp_station.add_missing_data_estimation(voltage=voltages_substations_str)
-                elif power_type == 'station':
-                    temp_station.add_missing_data_estimation(voltage=voltages_stations_str)
-                elif power_type in ['plant', 'generator']:
-                    temp_station.add_missing_data_estimation(voltage=voltages_plant_str)
-
-                if power_type in ['substation', 'sub_station', 'station', 'plant', 'generator']:
-                    stations_missing_data[osm_id] = temp_station
-
-        self.cur.execute(stations_missing_voltage)
-        result_stations_missing_voltage = self.cur.fetchall()
-        for (osm_id, geom, power_type, name, ref, voltage, tags, lat, lon) in result_stations_missing_voltage:
-            if osm_id not in stations_missing_data:
-                polygon = wkb.loads(geom, hex=True)
-                raw_geom = geom
-                temp_station = Station(osm_id, polygon, power_type, name, ref,
-                                       voltage.replace(',', ';').replace('/', ';') if voltage else None,
-                                       None, tags, lat, lon, raw_geom)
-                if power_type in ['substation', 'sub_station']:
-                    temp_station.add_missing_data_estimation(voltage=voltages_substations_str)
-                elif power_type == 'station':
-                    temp_station.add_missing_data_estimation(voltage=voltages_stations_str)
-                elif power_type in ['plant', 'generator']:
-                    temp_station.add_missing_data_estimation(voltage=voltages_plant_str)
-
-                if power_type in ['substation', 'sub_station', 'station', 'plant', 'generator']:
-                    stations_missing_data[osm_id] = temp_station
-
-        with open('{0}/stations_missing_data.json'.format(self.destdir), 'w') as outfile:
-            json.dump([s.serialize() for osm_id, s in stations_missing_data.iteritems()], outfile, indent=4)
-
-        file_size = self.convert_size_mega_byte(getsize('{0}/stations_missing_data.json'.format(self.destdir)))
-
-        if file_size >= 100:
-            command = 'split --bytes=50M {0}/stations_missing_data.json {0}/_stations_missing_data'.format(self.destdir)
-            return_code = call(command, shell=True)
-            root.info('Stations Missing Data file split return {0}'.format(return_code))
-            remove('{0}/stations_missing_data.json'.format(self.destdir))
+            where_clause = "ST_DWithin(l.way, (select way from planet_osm_polygon where osm_id = " + str(
+                self.ssid) + "), 300000)"
+            where_clause_station = "ST_DWithin(p.way, (select way from planet_osm_polygon where osm_id = " + str(
+                self.ssid) + "), 300000)"
+
+        region_lines = self.region[0] if self.region is not None else None
+        self.region = None
+        MissingDataFinder(self.conn, self.batch_size, self.topology_tables, self.destdir).find(
+            where_clause, where_clause_station, region_lines, self.voltage_levels)
 
     def run(self):
         if self.whole_planet and self.chose_continent:
@@ -824,7 +531,6 @@ class Transnet:
                     self.poly = '../data/planet/{0}/pfile.poly'.format(continent)
                     self.destdir = '../../transnet-models/planet/{0}/'.format(continent)
                     if self.voltage_levels:
-                        self.reset_params()
                         self.modeling(continent)
                     if self.find_missing_data:
                         self.find_missing_data_for_country()
@@ -833,24 +539,92 @@ class Transnet:
         elif self.chose_continent:
             with open('meta/{0}.json'.format(continent)) as continent_file:
                 continent_json = json.load(continent_file)
-                for country in continent_json:
-                    try:
-                        self.voltage_levels = continent_json[country]['voltages']
-                        self.poly = '../data/{0}/{1}/pfile.poly'.format(continent, country)
-                        self.destdir = '../../transnet-models/{0}/{1}/'.format(continent, country)
-                        if self.voltage_levels:
-                            self.reset_params()
-                            self.modeling(country)
-                        if self.find_missing_data:
-                            self.find_missing_data_for_country()
-                    except Exception as ex:
-                        root.error(ex.message)
+                if self.jobs > 1:
+                    self.run_countries(continent, continent_json)
+                    return
+                prefetcher = None
+                if self.prefetch > 0:
+                    prefetcher = RegionPrefetcher(self.fetch_region, self.password, self.connection, self.prefetch)
+                countries = list(continent_json)
+                try:
+                    for (num_country, country) in enumerate(countries):
+                        if prefetcher:
+                            self.prefetch_countries(prefetcher, continent, continent_json, countries[num_country:])
+                        try:
+                            self.model_country(continent, country, continent_json[country]['voltages'], prefetcher)
+                        except Exception as ex:
+                            root.error(ex.message)
+                finally:
+                    if prefetcher:
+                        prefetcher.close()
         else:
             self.modeling(self.db_name)
             if self.find_missing_data:
                 self.find_missing_data_for_country()
 
-    def modeling(self, country_name):
+    # prefetcher - RegionPrefetcher the region of the country has been submitted to, None to fetch it here
+    def model_country(self, continent_name, country, voltage_levels, prefetcher=None):
+        self.voltage_levels = voltage_levels
+        self.region = None
+        self.poly = '../data/{0}/{1}/pfile.poly'.format(continent_name, country)
+        self.destdir = '../../transnet-models/{0}/{1}/'.format(continent_name, country)
+        if self.voltage_levels:
+            self.modeling(country, prefetcher.get(country) if prefetcher else None)
+        if self.find_missing_data:
+            self.find_missing_data_for_country()
+
+    # submits the regions of the next countries to model to the prefetcher, until it fetches as many ahead as it can
+    # countries - countries left to model, the one modeled next first
+    @staticmethod
+    def prefetch_countries(prefetcher, continent_name, continent_json, countries):
+        for country in countries:
+            if not prefetcher.has_capacity():
+                return
+            if continent_json[country]['voltages'] and not prefetcher.is_submitted(country):
+                prefetcher.submit(country, '../data/{0}/{1}/pfile.poly'.format(continent_name, country),
+                                  continent_json[country]['voltages'])
+
+    # models the countries of a continent in a pool of jobs processes, each with its own database connection -
+    # countries are scheduled largest first by their number of lines, so that no large country is started last
+    def run_countries(self, continent_name, continent_json):
+        country_sizes = dict()
+        for country in continent_json:
+            country_sizes[country] = continent_json[country].get('lines')
+            if country_sizes[country] is None and self.offline:
+                country_sizes[country] = 0
+            elif country_sizes[country] is None:
+                try:
+                    boundary = PolyParser.poly_to_polygon('../data/{0}/{1}/pfile.poly'.format(continent_name,
+                                                                                             country))
+                    BoundaryTable.load(self.cur, boundary)
+                    country_sizes[country] = self.count_lines(BoundaryTable.intersects('l.way'))
+                except Exception as ex:
+                    root.error('Could not count the lines of %s: %s', country, str(ex))
+                    self.conn.rollback()
+                    country_sizes[country] = 0
+        countries = sorted(continent_json, key=lambda c: country_sizes[c], reverse=True)
+        root.info('Model %s countries in %s jobs', str(len(countries)), str(self.jobs))
+
+        # the workers open connections of their own, the one of this process must not be inherited by them
+        if self.conn:
+            self.conn.close()
+        pool = Pool(self.jobs, initializer=init_country_worker, initargs=(self,))
+        tasks = [(continent_name, country, continent_json[country]['voltages']) for country in countries]
+        try:
+            for (num_done, (country, error)) in enumerate(pool.imap_unordered(model_country_in_worker, tasks)):
+                if error:
+                    root.error('Modeling %s failed: %s', country, error)
+                root.info('Finished %s (%s of %s countries)', country, str(num_done + 1), str(len(countries)))
+            pool.close()
+        except Exception:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            self.connect()
+
+    # region - region fetched ahead as of fetch_region, None to fetch it here
+    def modeling(self, country_name, region=None):
         # create dest dir
         if not exists(self.destdir):
             makedirs(self.destdir)
@@ -863,37 +637,71 @@ class Transnet:
         boundary = None
         if self.poly:
             boundary = PolyParser.poly_to_polygon(self.poly)
-            where_clause = "st_intersects(l.way, st_transform(st_geomfromtext('" + boundary.wkt + "',4269),3857))"
         elif self.bpoly:
             boundary = wkt.loads(self.bpoly)
-            where_clause = "st_intersects(l.way, st_transform(st_geomfromtext('" + boundary.wkt + "',4269),3857))"
+        if boundary:
+            if not self.offline:
+                BoundaryTable.load(self.cur, boundary)
+            where_clause = BoundaryTable.intersects('l.way')
         else:
-            where_clause = "st_distance(l.way, (select way from planet_osm_polygon where osm_id = " + str(
-                self.ssid) + ")) <= 300000"
-
-        # do inference for each voltage level
+            where_clause = "ST_DWithin(l.way, (select way from planet_osm_polygon where osm_id = " + str(
+                self.ssid) + "), 300000)"
+
+        # fetch the lines and stations of all voltage levels at once
+        if region is None:
+            if self.topology_tables:
+                root.info('Reading the topology tables of the import')
+            region = self.fetch_region(where_clause, self.conn, self.voltage_levels, boundary)
+        self.region = region if self.find_missing_data else None
+
+        # do inference for each voltage level, the duplicates of the circuits of earlier voltage levels are removed
+        # as the circuits of a voltage level are inferred
         all_circuits = []
+        circuit_deduplicator = CircuitDeduplicator()
         all_substations = dict()
         all_generators = dict()
         equipment_points = []
         length_found_lines = 0
 
-        for voltage_level in self.voltage_levels.split('|'):
-            (length_found_lines, equipment_points, generators, substations, circuits) = self.inference_for_voltage(
-                voltage_level, where_clause, length_found_lines, equipment_points,
-                all_substations, all_generators, boundary)
-            all_generators.update(generators)
-            all_substations.update(substations)
-            all_circuits.extend(circuits)
+        voltage_levels = self.voltage_levels.split('|')
+        if self.workers > 1:
+            # voltage levels are fetched one after another, they and the connected components of their line graphs
+            # are inferred concurrently - circuits are merged in the order of the voltage levels
+            parallel_inference = ParallelInference(self.workers, self.close_nodes, self.sweep, self.radius)
+            try:
+                searches = []
+                for voltage_level in voltage_levels:
+                    (length_found_lines, equipment_points, generators, substations, lines) = \
+                        self.fetch_voltage_level(voltage_level, region, length_found_lines, equipment_points,
+                                                 all_substations, all_generators)
+                    all_generators.update(generators)
+                    all_substations.update(substations)
+                    searches.append(parallel_inference.search(voltage_level, substations, generators, lines,
+                                                              None if boundary else self.ssid))
+                for search in searches:
+                    all_circuits.extend(self.remove_duplicates(parallel_inference.circuits(search),
+                                                               circuit_deduplicator))
+            except Exception:
+                parallel_inference.terminate()
+                raise
+            parallel_inference.close()
+        else:
+            for voltage_level in voltage_levels:
+                (length_found_lines, equipment_points, generators, substations, circuits) = self.inference_for_voltage(
+                    voltage_level, region, length_found_lines, equipment_points,
+                    all_substations, all_generators, boundary)
+                all_generators.update(generators)
+                all_substations.update(substations)
+                all_circuits.extend(self.remove_duplicates(circuits, circuit_deduplicator))
 
         root.info('Total length of all found lines is %s meters', str(length_found_lines))
-        equipments_multipoint = MultiPoint(equipment_points)
-        map_centroid = equipments_multipoint.centroid
+        equipment_points = np.concatenate(equipment_points) if equipment_points else np.zeros((0, 2))
+        # the centroid of the multipoint of the equipment is the mean of its points
+        map_centroid = Point(equipment_points.mean(axis=0)) if len(equipment_points) else MultiPoint().centroid
         logging.debug('Centroid lat:%lf, lon:%lf', map_centroid.x, map_centroid.y)
-        all_circuits = self.remove_duplicates(all_circuits)
         root.info('Inference took %s millies', str(datetime.now() - time))
 
-        transnet_instance.export_to_json(all_circuits)
+        self.export_to_json(all_circuits)
 
         partition_by_station_dict = None
         population_by_station_dict = None
@@ -907,7 +715,8 @@ class Transnet:
         if self.topology:
             root.info('Plot inferred transmission system topology')
             plotter = Plotter(self.voltage_levels)
-            plotter.plot_topology(all_circuits, equipments_multipoint, partition_by_station_dict, cities, self.destdir)
+            plotter.plot_topology(all_circuits, MultiPoint(equipment_points.tolist()), partition_by_station_dict,
+                                  cities, self.destdir)
 
         try:
             root.info('CSV generation started ...')
@@ -963,11 +772,11 @@ class Transnet:
         root.info('All power Planets count %s', len(self.all_power_planet))
         #####################################################
         if self.validate:
-            validator = InferenceValidator(self.cur)
+            validator = InferenceValidator(self.cur, self.batch_size)
             if boundary:
                 all_stations = all_substations.copy()
                 all_stations.update(all_generators)
-                validator.validate2(all_circuits, all_stations, boundary, self.voltage_levels)
+                validator.validate2(all_circuits, all_stations, self.voltage_levels)
             else:
                 validator.validate(self.ssid, all_circuits, None, self.voltage_levels)
 
@@ -1022,6 +831,34 @@ if __name__ == '__main__':
                       help="Include nodes close to station")
     parser.add_option("-o", "--overpass", action="store_true", dest="overpass",
                       help="Print overpass string")
+    parser.add_option("-w", "--sweep", action="store_true", dest="sweep",
+                      help="infer the circuits of a region in a single sweep over its line graph "
+                           "instead of per substation neighborhoods")
+    parser.add_option("-r", "--radius", action="store", dest="radius", type="float", default=300000,
+                      help="radius in meters of the neighborhood of stations and lines considered "
+                           "for the inference of a substation's circuits, default 300000")
+    parser.add_option("-W", "--workers", action="store", dest="workers", type="int", default=1,
+                      help="number of worker processes inferring voltage levels and connected components of "
+                           "their line graphs concurrently, default 1")
+    parser.add_option("-J", "--jobs", action="store", dest="jobs", type="int", default=1,
+                      help="number of countries of a continent modeled concurrently, each with its own database "
+                           "connection, default 1")
+    parser.add_option("-B", "--batchsize", action="store", dest="batch_size", type="int", default=10000,
+                      help="number of rows transferred at a time from the server side cursors of the line and "
+                           "station queries, default 10000")
+    parser.add_option("-A", "--prefetch", action="store", dest="prefetch", type="int", default=0,
+                      help="number of countries of a continent whose lines and stations are fetched ahead on "
+                           "database connections of their own while a country is modeled, default 0 (disabled)")
+    parser.add_option("-C", "--cache", action="store", dest="cache",
+                      help="directory of snapshots of the fetched lines and stations, read instead of the database "
+                           "by reruns for the same region, voltage levels and import")
+    parser.add_option("-O", "--offline", action="store_true", dest="offline", default=False,
+                      help="read the lines and stations from the latest snapshots of the cache (-C) without "
+                           "connecting to the database, logging the import and fingerprint of each snapshot read; "
+                           "evaluation and finding missing data are skipped")
+    parser.add_option("-i", "--pbf", action="store", dest="pbf",
+                      help="OSM PBF file, e.g. the power_extract.pbf of prepare_pbf.sh, to read the lines and "
+                           "stations from without a database; evaluation and finding missing data are skipped")
 
     (options, args) = parser.parse_args()
     # get connection data via command line or set to default values
@@ -1067,7 +904,11 @@ if __name__ == '__main__':
                                      _validate=validate, _topology=topology, _voltage_levels=voltage_levels,
                                      _load_estimation=load_estimation, _destdir=destdir, _continent=continent,
                                      _whole_planet=options.whole_planet, _find_missing_data=options.find_missing,
-                                     _close_nodes=options.close_nodes, _overpass=options.overpass)
+                                     _close_nodes=options.close_nodes, _overpass=options.overpass,
+                                     _sweep=options.sweep, _radius=options.radius, _workers=options.workers,
+                                     _jobs=options.jobs, _batch_size=options.batch_size,
+                                     _prefetch=options.prefetch, _cache=options.cache, _offline=options.offline,
+                                     _pbf=options.pbf)
         if options.prepare_json and continent:
             transnet_instance.prepare_continent_json(continent)
             if options.whole_planet:
@@ -1,7 +1,40 @@
+import itertools
+import struct
+from math import atan, degrees, exp, log, pi, radians, tan
+
+
 class Util:
+    # numbers the server side cursors of stream_rows, as open cursors of a connection need distinct names
+    cursor_numbers = itertools.count()
+    # radius of the sphere of EPSG:3857
+    earth_radius = 6378137.0
+
     def __init__(self):
         pass
 
+    # yields the rows of the query in lists of at most batch_size rows from a named server side cursor, which
+    # transfers one batch at a time, so that the rows buffered by the client do not depend on the size of the result
+    # set - this bounds the transfer only, consumers keep what they build of the rows, e.g. the stores of
+    # Transnet.fetch_region the lines and stations of the whole region
+    @staticmethod
+    def stream_batches(connection, sql, batch_size, parameters=None):
+        cursor = connection.cursor('transnet_stream_%d' % next(Util.cursor_numbers))
+        try:
+            cursor.execute(sql, parameters)
+            rows = cursor.fetchmany(batch_size)
+            while rows:
+                yield rows
+                rows = cursor.fetchmany(batch_size)
+        finally:
+            cursor.close()
+
+    # yields the rows of the query one by one, see stream_batches
+    @staticmethod
+    def stream_rows(connection, sql, batch_size, parameters=None):
+        for rows in Util.stream_batches(connection, sql, batch_size, parameters):
+            for row in rows:
+                yield row
+
     @staticmethod
     def have_common_voltage(vstring1, vstring2):
         if not vstring1 or not vstring2:
@@ -11,3 +44,25 @@ class Util:
                 if v1.strip() == v2.strip():
                     return True
         return False
+
+    # returns the EPSG:3857 coordinates of EPSG:4326 coordinates as osm2pgsql -E 3857 projects them
+    @staticmethod
+    def to_mercator(lon, lat):
+        return Util.earth_radius * radians(lon), Util.earth_radius * log(tan(pi / 4 + radians(lat) / 2))
+
+    # returns the EPSG:4326 coordinates of EPSG:3857 coordinates
+    @staticmethod
+    def from_mercator(x, y):
+        return degrees(x / Util.earth_radius), degrees(2 * atan(exp(y / Util.earth_radius)) - pi / 2)
+
+    # returns the EWKB of the point, line string or polygon ring of the coordinates as ST_AsEWKB gives it
+    @staticmethod
+    def to_ewkb(coords, geometry_type, srid):
+        if geometry_type == 'point':
+            return struct.pack('<BII2d', 1, 0x20000001, srid, coords[0], coords[1])
+        values = [value for coord in coords for value in coord]
+        if geometry_type == 'linestring':
+            header = struct.pack('<BIII', 1, 0x20000002, srid, len(coords))
+        else:
+            header = struct.pack('<BIIII', 1, 0x20000003, srid, 1, len(coords))
+        return header + struct.pack('<%dd' % len(values), *values)
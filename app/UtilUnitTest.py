@@ -0,0 +1,29 @@
+import unittest
+
+from shapely import wkb
+from shapely.geometry import LineString, Point, Polygon
+
+from Util import Util
+from WkbDecoder import WkbDecoder
+
+
+class UtilUnitTest(unittest.TestCase):
+    def test_to_ewkb(self):
+        coords = [(8.5, 47.3), (8.6, 47.4), (8.7, 47.35), (8.5, 47.3)]
+        for (geom, geometry_type) in [(Point(coords[0]), 'point'), (LineString(coords), 'linestring'),
+                                      (Polygon(coords), 'polygon')]:
+            ewkb = Util.to_ewkb(coords[0] if geometry_type == 'point' else coords, geometry_type, 4326)
+            self.assertEqual(wkb.dumps(geom, hex=True, srid=4326).upper(), WkbDecoder.to_hex(ewkb))
+            self.assertTrue(wkb.loads(ewkb).equals(geom))
+
+    def test_mercator(self):
+        (x, y) = Util.to_mercator(11.5, 48.1)
+        self.assertAlmostEqual(1280174.144, x, 3)
+        self.assertAlmostEqual(6123507.425, y, 3)
+        (lon, lat) = Util.from_mercator(x, y)
+        self.assertAlmostEqual(11.5, lon, 9)
+        self.assertAlmostEqual(48.1, lat, 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,16 +1,48 @@
-class Way:
-    def __init__(self, _id, geom, _type, name, ref, voltage, nodes, tags, lat, lon, raw_geom):
+from array import array
+
+from WkbDecoder import WkbDecoder
+
+
+class Way(object):
+    # continent runs hold millions of ways, which keep their attributes in slots instead of an instance dict and
+    # their geometry as the EWKB it was fetched as - the geometry is decoded on first use and kept from then on, as
+    # the indices look geometries up by their identity
+    __slots__ = ('id', 'type', 'name', 'ref', 'voltage', 'nodes', 'tags', 'lat', 'lon', 'wkb', '_geom')
+
+    # geom - geometry in WGS84, None to decode it from wkb when used
+    # wkb - EWKB bytes of the geometry in WGS84 as fetched, None if not fetched
+    def __init__(self, _id, geom, _type, name, ref, voltage, nodes, tags, lat, lon, wkb):
         self.id = _id
-        self.geom = geom
+        self._geom = geom
         self.type = _type
         self.name = name
         self.ref = ref
         self.voltage = voltage
-        self.nodes = nodes
+        # the node ids take 8 bytes each in an array instead of an int object and a pointer in a list, an array is
+        # shared, e.g. with a LineStore
+        self.nodes = array('q', nodes) if nodes is not None and not isinstance(nodes, array) else nodes
         self.tags = tags
         self.lat = lat
         self.lon = lon
-        self.raw_geom = raw_geom
+        self.wkb = wkb
+
+    @property
+    def geom(self):
+        if self._geom is None and self.wkb is not None:
+            self._geom = WkbDecoder.decode([self.wkb])[0]
+        return self._geom
+
+    # the hex string of the EWKB of the geometry, as the geometry type of the database returns it
+    @property
+    def raw_geom(self):
+        return WkbDecoder.to_hex(self.wkb) if self.wkb is not None else None
+
+    # decodes the geometries of the ways not decoded yet in one batch, before the geometries of all of them are used
+    @staticmethod
+    def decode(ways):
+        ways = [way for way in ways if way._geom is None and way.wkb is not None]
+        for (way, geom) in zip(ways, WkbDecoder.decode([way.wkb for way in ways])):
+            way._geom = geom
 
     def __str__(self):
         s = list('ID: ' + str(self.id) + ' Type: ' + self.type)
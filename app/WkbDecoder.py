@@ -0,0 +1,115 @@
+import binascii
+
+import numpy as np
+import psycopg2
+from shapely import wkb
+
+try:
+    # shapely 2 decodes an array of geometries in a single call
+    from shapely import from_wkb
+except ImportError:
+    from_wkb = None
+
+
+class WkbDecoder:
+    # decodes the geometry columns of batches of rows, which are queried as binary EWKB by ST_AsEWKB instead of the
+    # hex encoded EWKB text of the geometry type
+
+    # geometry types of parse, as in the WKB type codes
+    none = 0
+    unsupported = -1
+    point = 1
+    line_string = 2
+    polygon = 3
+
+    # casts bytea values to bytes, as the buffer objects psycopg2 returns otherwise take more memory than the EWKB
+    bytea_type = psycopg2.extensions.new_type(psycopg2.BINARY.values, 'BYTEA_AS_BYTES',
+                                              lambda value, cursor: bytes(psycopg2.BINARY(value, cursor))
+                                              if value is not None else None)
+
+    def __init__(self):
+        pass
+
+    # makes the connection return the EWKB of geometries as bytes
+    @staticmethod
+    def register(connection):
+        psycopg2.extensions.register_type(WkbDecoder.bytea_type, connection)
+
+    # returns the geometries of the EWKB bytes in their order, None for None - shapely 2 decodes them in one call,
+    # shapely 1 has no bulk constructor and builds each geometry in about the time wkb.loads decodes it, e.g. from
+    # the coordinates of parse, so it decodes them one by one
+    @staticmethod
+    def decode(values):
+        if from_wkb is not None:
+            return list(from_wkb(values))
+        return [wkb.loads(value) if value is not None else None for value in values]
+
+    # parses the EWKB bytes of 2D points, line strings and polygons of a single ring, of either byte order and with
+    # or without SRID, with numpy on the values joined into one buffer instead of value by value, for the callers
+    # which need the coordinates rather than geometries
+    # returns the geometry type of each value, none for None and unsupported for values of other types, the x, y
+    # rows of the coordinates of all values and the offsets of the coordinates of each value into them, the
+    # coordinates of value i are coords[offsets[i]:offsets[i + 1]]
+    @staticmethod
+    def parse(values):
+        sizes = np.array([len(value) if value is not None else 0 for value in values], dtype=np.int64)
+        data = np.frombuffer(b''.join(value for value in values if value is not None), dtype=np.uint8)
+        starts = np.cumsum(sizes) - sizes
+        # the header of 9 bytes, the SRID and a count of 4 bytes each are read from each value of at least 9 bytes
+        # and checked against its size below
+        geometry_types = np.full(len(sizes), WkbDecoder.none, dtype=np.int8)
+        geometry_types[sizes > 0] = WkbDecoder.unsupported
+        parsed = np.flatnonzero(sizes >= 9)
+        padded = np.concatenate((data, np.zeros(16, dtype=np.uint8)))
+        little_endian = data[starts[parsed]] == 1
+
+        def uint32_at(positions):
+            byte_values = padded[positions[:, None] + np.arange(4)].astype(np.uint32)
+            byte_values[~little_endian] = byte_values[~little_endian, ::-1]
+            return (byte_values << np.array([0, 8, 16, 24], dtype=np.uint32)).sum(axis=1, dtype=np.uint32)
+
+        type_flags = uint32_at(starts[parsed] + 1)
+        # the SRID follows the type if its flag is set, values with Z or M coordinates are not supported
+        header = starts[parsed] + np.where(type_flags & 0x20000000, 9, 5)
+        base_types = type_flags & ~np.uint32(0x20000000)
+        rings = uint32_at(header)
+        counts = uint32_at(header + np.where(base_types == WkbDecoder.polygon, 4, 0)).astype(np.int64)
+        counts[base_types == WkbDecoder.point] = 1
+        coords_start = header + np.select([base_types == WkbDecoder.line_string, base_types == WkbDecoder.polygon],
+                                          [4, 8], 0)
+        supported = (((base_types == WkbDecoder.point) | (base_types == WkbDecoder.line_string)
+                      | ((base_types == WkbDecoder.polygon) & (rings == 1)))
+                     & (coords_start + 16 * counts == starts[parsed] + sizes[parsed]))
+        parsed = parsed[supported]
+        counts = counts[supported]
+        coords_start = coords_start[supported]
+        little_endian = little_endian[supported]
+        geometry_types[parsed] = base_types[supported]
+
+        offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+        offsets[parsed + 1] = counts
+        offsets = np.cumsum(offsets)
+        # the 8 bytes of each coordinate, gathered for all values in one indexing operation
+        coordinate_counts = 2 * counts
+        coordinate_starts = np.repeat(coords_start - 8 * (np.cumsum(coordinate_counts) - coordinate_counts),
+                                      coordinate_counts)
+        coordinate_bytes = data[(coordinate_starts + 8 * np.arange(len(coordinate_starts)))[:, None]
+                                + np.arange(8)]
+        big_endian = np.repeat(~little_endian, coordinate_counts)
+        coordinate_bytes[big_endian] = coordinate_bytes[big_endian, ::-1]
+        coords = np.ascontiguousarray(coordinate_bytes).view('<f8').reshape(-1, 2)
+        return geometry_types, coords, offsets
+
+    # returns the x, y rows of the EWKB bytes of points, nan for values which are no points
+    @staticmethod
+    def points(values):
+        (geometry_types, coords, offsets) = WkbDecoder.parse(values)
+        points = np.full((len(geometry_types), 2), np.nan)
+        is_point = geometry_types == WkbDecoder.point
+        points[is_point] = coords[offsets[:-1][is_point]]
+        return points
+
+    # returns the binary EWKB value as the hex string of the geometry type, which is kept as raw geometry of ways
+    @staticmethod
+    def to_hex(value):
+        return binascii.hexlify(value).decode('ascii').upper()
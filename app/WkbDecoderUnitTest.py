@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+from shapely import wkb
+from shapely.geometry import LineString, MultiPoint, Point, box
+
+from WkbDecoder import WkbDecoder
+
+
+class WkbDecoderUnitTest(unittest.TestCase):
+    def test_decode(self):
+        line = LineString([(8.5, 47.3), (8.6, 47.4), (8.7, 47.35)])
+        point = Point(8.5, 47.3)
+        polygon = box(8, 47, 9, 48)
+        geometries = WkbDecoder.decode([wkb.dumps(line), wkb.dumps(point), None, wkb.dumps(polygon, srid=4326)])
+        self.assertTrue(geometries[0].equals(line))
+        self.assertTrue(geometries[1].equals(point))
+        self.assertIsNone(geometries[2])
+        self.assertTrue(geometries[3].equals(polygon))
+
+    def test_parse(self):
+        line = LineString([(8.5, 47.3), (8.6, 47.4), (8.7, 47.35)])
+        polygon = box(8, 47, 9, 48)
+        values = [wkb.dumps(line, srid=4326), None, wkb.dumps(Point(8.5, 47.3), big_endian=True),
+                  wkb.dumps(polygon, srid=3857, big_endian=True), wkb.dumps(MultiPoint([(1, 1), (2, 2)])),
+                  wkb.dumps(Point(1, 2, 3)), wkb.dumps(box(0, 0, 4, 4).difference(box(1, 1, 2, 2))),
+                  wkb.dumps(line)[:-8]]
+        (geometry_types, coords, offsets) = WkbDecoder.parse(values)
+        self.assertEqual([WkbDecoder.line_string, WkbDecoder.none, WkbDecoder.point, WkbDecoder.polygon]
+                         + [WkbDecoder.unsupported] * 4, geometry_types.tolist())
+        self.assertEqual([0, 3, 3, 4, 9, 9, 9, 9, 9], offsets.tolist())
+        self.assertEqual(list(line.coords), [tuple(xy) for xy in coords[0:3].tolist()])
+        self.assertEqual([8.5, 47.3], coords[3].tolist())
+        self.assertEqual(list(polygon.exterior.coords), [tuple(xy) for xy in coords[4:9].tolist()])
+
+    def test_parse_empty(self):
+        (geometry_types, coords, offsets) = WkbDecoder.parse([])
+        self.assertEqual(0, len(geometry_types))
+        self.assertEqual((0, 2), coords.shape)
+        self.assertEqual([0], offsets.tolist())
+
+    def test_points(self):
+        values = [wkb.dumps(Point(8.5, 47.3), srid=4326), wkb.dumps(Point(9.5, 48.3), big_endian=True),
+                  wkb.dumps(LineString([(0, 0), (1, 1)])), None]
+        points = WkbDecoder.points(values)
+        self.assertEqual([[8.5, 47.3], [9.5, 48.3]], points[:2].tolist())
+        self.assertTrue(np.isnan(points[2:]).all())
+
+    def test_to_hex(self):
+        point = Point(8.5, 47.3)
+        self.assertEqual(wkb.dumps(point, hex=True).upper(), WkbDecoder.to_hex(wkb.dumps(point)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,13 @@
+#!/bin/bash
+# applies the changes since the last update to the databases of the continents, preparing the ones not updated so far
+
+
+./update_db.sh ../configs/continents/africa.conf
+./update_db.sh ../configs/continents/asia.conf
+./update_db.sh ../configs/continents/russia.conf
+./update_db.sh ../configs/continents/australiaoceania.conf
+./update_db.sh ../configs/continents/centralamerica.conf
+./update_db.sh ../configs/continents/southamerica.conf
+./update_db.sh ../configs/continents/europe.conf
+./update_db.sh ../configs/continents/germany.conf
+./update_db.sh ../configs/continents/northamerica.conf
@@ -0,0 +1,19 @@
+#!/bin/bash
+# creates the indexes of the Transnet queries in a database imported by prepare_db.sh and captures the query plans
+# before and after in ../logs/$destdir
+
+if [ "$#" -ne 0 ]; then
+  # load the appropriate config file
+  source "$1"
+fi
+
+mkdir -p "../logs/$destdir"
+
+echo "1. capture query plans without indexes"
+psql -U $duser -d $dname -h localhost -v vlevels="$vlevels" -f ../sql/transnet_explain.sql > "../logs/$destdir/explain_before.txt"
+
+echo "2. create indexes"
+psql -U $duser -d $dname -h localhost -f ../sql/transnet_indexes.sql
+
+echo "3. capture query plans with indexes"
+psql -U $duser -d $dname -h localhost -v vlevels="$vlevels" -f ../sql/transnet_explain.sql > "../logs/$destdir/explain_after.txt"
@@ -0,0 +1,34 @@
+#!/bin/bash
+# extracts the power data of the region of a config file into ../data/$destdir/power_extract.pbf, which prepare_db.sh
+# imports into the database and Transnet reads without a database with -i
+
+if [ "$#" -ne 0 ]; then
+  # load the appropriate config file
+  source "$1"
+fi
+
+mkdir -p "../data/$destdir"
+
+if [ ! -z ${ddump_url+x} ]
+  then
+        echo "Downloading $ddump_url"
+        wget "$ddump_url" -O "../data/$destdir/ddump.pbf"
+        ddump="../data/$destdir/ddump.pbf"
+  else
+	echo "Using dump file $ddump"
+fi
+
+if [ ! -z ${pfile_url+x} ]
+  then
+        echo "Downloading $pfile_url"
+        wget "$pfile_url" -O "../data/$destdir/pfile.poly"
+        pfile="../data/$destdir/pfile.poly"
+  else
+	echo "Using poly file $pfile"
+fi
+
+echo "1. extract all power nodes, ways and relations in two passes"
+# the node locations of continents are better kept in a file, e.g. locations="dense_file_array,../data/$destdir/nodes.cache"
+python ../app/PowerExtractor.py -i "$ddump" -p "$pfile" -o "../data/$destdir/power_extract.pbf" -x "${locations:-flex_mem}"
+# the node locations kept in a file are not needed anymore
+case "$locations" in *_file_array,*) rm -f "${locations#*,}";; esac
@@ -0,0 +1,11 @@
+#!/bin/bash
+# builds the inference ready tables of sql/transnet_topology.sql in a database imported by prepare_db.sh - Transnet
+# reads them instead of joining lines and stations spatially on every run, rerun it after every new import
+
+if [ "$#" -ne 0 ]; then
+  # load the appropriate config file
+  source "$1"
+fi
+
+echo "1. build topology tables"
+psql -U $duser -d $dname -h localhost -f ../sql/transnet_topology.sql
@@ -0,0 +1,50 @@
+#!/bin/bash
+# applies the changes of the OSM data since the last update to the database of a config file with DiffUpdater instead
+# of importing the dump again - without updates applied so far, e.g. after prepare_db.sh, the database is prepared
+# with prepare_db.sh and the updates start at the dump
+# the changes are downloaded from the replication server of the dump, e.g. http://download.geofabrik.de/europe/austria-updates/
+# for the dump of austria-latest.osm.pbf, or from dupdates_url if given
+
+if [ "$#" -ne 0 ]; then
+  # load the appropriate config file
+  source "$1"
+fi
+
+if [ ! -z ${ddump_url+x} ]
+  then
+        ddump="../data/$destdir/ddump.pbf"
+        dupdates_url="${dupdates_url:-${ddump_url%-latest.osm.pbf}-updates/}"
+fi
+sequence="../data/$destdir/sequence.state"
+changes="../data/$destdir/changes.osc.gz"
+
+if [ ! -f "$sequence" ]
+  then
+        echo "1. prepare the database"
+        ./prepare_db.sh "$@"
+
+        echo "2. start the updates at the dump"
+        pyosmium-get-changes -O "$ddump" -f "$sequence"
+        exit
+fi
+
+echo "1. download and apply the changes since the last update"
+# each download holds 100MB of changes at most, they are applied until the database is up to date
+while true
+  do
+        rm -f "$changes"
+        # the sequence is moved on once the changes have been applied
+        cp "$sequence" "$sequence.new"
+        if ! pyosmium-get-changes --server "$dupdates_url" -f "$sequence.new" -o "$changes"
+          then
+                echo "No more changes downloaded, the database is up to date or the server is not reachable"
+                rm -f "$sequence.new"
+                exit
+        fi
+        if ! python ../app/DiffUpdater.py -D $dname -U $duser -X $dpassword -c "$changes"
+          then
+                rm -f "$sequence.new"
+                exit 1
+        fi
+        mv "$sequence.new" "$sequence"
+done
@@ -0,0 +1,96 @@
+-- query plans of the Transnet queries which depend on the indexes of transnet_indexes.sql, as Transnet.fetch_region
+-- runs them against the planet_osm_* tables
+-- psql -v vlevels='220000|380000' -f transnet_explain.sql
+-- the boundary is the extent of the imported lines, the single station the substation of the smallest id
+
+SELECT ST_AsText(ST_Transform(ST_SetSRID(ST_Extent(way)::geometry, 3857), 4269)) AS boundary
+FROM planet_osm_line \gset
+SELECT coalesce(min(osm_id), 0) AS ssid
+FROM planet_osm_polygon
+WHERE power ~ 'substation|station|sub_station' \gset
+
+-- the boundary tables of BoundaryTable.load
+DROP TABLE IF EXISTS transnet_boundary, transnet_boundary_parts;
+CREATE TEMPORARY TABLE transnet_boundary AS
+  SELECT st_transform(st_geomfromtext(:'boundary', 4269), 3857) AS way;
+CREATE TEMPORARY TABLE transnet_boundary_parts AS
+  SELECT ST_Subdivide(way, 256) AS way FROM transnet_boundary;
+CREATE INDEX ON transnet_boundary_parts USING gist (way);
+ANALYZE transnet_boundary_parts;
+
+\echo '### lines of the voltage levels within the boundary'
+EXPLAIN WITH lines AS (
+            SELECT row_number() OVER () AS row_id, l.osm_id, l.way, l.power, l.name, l.ref, l.voltage,
+              l.cables, w.nodes, w.tags
+            FROM planet_osm_line l, planet_osm_ways w
+            WHERE l.osm_id = w.id
+                  AND l.osm_id >= 0
+                  AND l.power ~ 'line|cable|minor_line'
+                  AND l.voltage ~ :'vlevels'
+                  AND EXISTS (SELECT 1 FROM transnet_boundary_parts b WHERE st_intersects(l.way, b.way))),
+          line_nodes AS (
+            SELECT u.row_id, u.ordinality, u.ordinality = array_length(u.nodes, 1) AS is_last,
+              ST_SetSRID(ST_MakePoint(n.lon / 100.0, n.lat / 100.0), 3857) AS point
+            FROM (SELECT row_id, nodes, node, ordinality
+                  FROM lines, unnest(lines.nodes) WITH ORDINALITY AS w(node, ordinality)) u,
+              planet_osm_nodes n
+            WHERE n.id = u.node),
+          line_geoms AS (
+            SELECT row_id,
+              st_makeline(array_agg(point ORDER BY ordinality)) AS geom,
+              (array_agg(point) FILTER (WHERE ordinality = 1))[1] AS first_point,
+              (array_agg(point) FILTER (WHERE is_last))[1] AS last_point
+            FROM line_nodes
+            GROUP BY row_id)
+        SELECT l.osm_id, g.geom, g.first_point, g.last_point
+        FROM lines l LEFT JOIN line_geoms g ON g.row_id = l.row_id
+        ORDER BY l.row_id;
+
+\echo '### substations of the lines with the ids of their lines'
+EXPLAIN SELECT p.osm_id, array_agg(l.osm_id) AS line_ids
+        FROM planet_osm_line l, planet_osm_polygon p
+        WHERE l.osm_id >= 0
+              AND p.osm_id >= 0
+              AND p.power ~ 'substation|station|sub_station'
+              AND (p.voltage ~ :'vlevels' OR (p.voltage = '') IS NOT FALSE)
+              AND l.power ~ 'line|cable|minor_line'
+              AND l.voltage ~ :'vlevels'
+              AND EXISTS (SELECT 1 FROM transnet_boundary_parts b WHERE st_intersects(l.way, b.way))
+              AND st_intersects(l.way, p.way)
+        GROUP BY p.osm_id, p.way, p.power, p.name, p.ref, p.voltage, p.tags;
+
+\echo '### substations close to the lines (--closenodes) with the ids of their lines'
+EXPLAIN SELECT p.osm_id, array_agg(l.osm_id) AS line_ids
+        FROM planet_osm_line l, planet_osm_polygon p
+        WHERE l.osm_id >= 0
+              AND p.osm_id >= 0
+              AND p.power ~ 'substation|station|sub_station'
+              AND (p.voltage ~ :'vlevels' OR (p.voltage = '') IS NOT FALSE)
+              AND l.power ~ 'line|cable|minor_line'
+              AND l.voltage ~ :'vlevels'
+              AND EXISTS (SELECT 1 FROM transnet_boundary_parts b WHERE st_intersects(l.way, b.way))
+              AND ST_DWithin(l.way, p.way, 100) AND st_distance(l.way, p.way) < 100
+        GROUP BY p.osm_id, p.way, p.power, p.name, p.ref, p.voltage, p.tags;
+
+\echo '### generators of the lines with the ids of their lines'
+EXPLAIN SELECT p.osm_id, array_agg(l.osm_id) AS line_ids
+        FROM planet_osm_line l, planet_osm_polygon p
+        WHERE l.osm_id >= 0
+              AND p.osm_id >= 0
+              AND p.power ~ 'plant|generator'
+              AND l.power ~ 'line|cable|minor_line'
+              AND l.voltage ~ :'vlevels'
+              AND EXISTS (SELECT 1 FROM transnet_boundary_parts b WHERE st_intersects(l.way, b.way))
+              AND st_intersects(l.way, p.way)
+        GROUP BY p.osm_id, p.way, p.power, p.name, p.ref, p.voltage, p."plant:output:electricity",
+          p."generator:output:electricity", p.tags;
+
+\echo '### lines around a single station (--ssid)'
+EXPLAIN SELECT l.osm_id
+        FROM planet_osm_line l
+        WHERE l.osm_id >= 0
+              AND l.power ~ 'line|cable|minor_line'
+              AND l.voltage ~ :'vlevels'
+              AND ST_DWithin(l.way, (SELECT way FROM planet_osm_polygon WHERE osm_id = :ssid), 300000);
+
+DROP TABLE transnet_boundary, transnet_boundary_parts;
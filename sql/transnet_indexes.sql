@@ -0,0 +1,32 @@
+-- indexes supporting the predicates of the Transnet queries, created after the import by osm2pgsql
+-- the predicates of the partial indexes are the conditions of RegionQueries.is_line, is_substation and
+-- is_generator - the planner uses a partial index only where it proves the predicate from the conditions of the
+-- query, for a regular expression only by the same operator with the same pattern, so the patterns here and there
+-- change together or not at all
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- lines of the voltage levels: regular expression on the voltage, geometry against boundaries and stations
+CREATE INDEX IF NOT EXISTS transnet_line_power_way_index
+  ON planet_osm_line USING gist (way)
+  WHERE power ~ 'line|cable|minor_line';
+
+CREATE INDEX IF NOT EXISTS transnet_line_power_voltage_index
+  ON planet_osm_line USING gin (voltage gin_trgm_ops)
+  WHERE power ~ 'line|cable|minor_line';
+
+-- substations and generators joined to the lines by st_intersects or ST_DWithin
+CREATE INDEX IF NOT EXISTS transnet_polygon_substation_way_index
+  ON planet_osm_polygon USING gist (way)
+  WHERE power ~ 'substation|station|sub_station';
+
+CREATE INDEX IF NOT EXISTS transnet_polygon_generator_way_index
+  ON planet_osm_polygon USING gist (way)
+  WHERE power ~ 'plant|generator';
+
+-- station looked up by the ssid of a single station inference
+CREATE INDEX IF NOT EXISTS transnet_polygon_osm_id_index
+  ON planet_osm_polygon (osm_id);
+
+ANALYZE planet_osm_line;
+ANALYZE planet_osm_polygon;
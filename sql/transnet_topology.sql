@@ -0,0 +1,81 @@
+-- inference ready tables of the power lines and stations of an import, which the Transnet queries read instead of
+-- building the line geometries from planet_osm_nodes and joining lines and stations spatially on every run
+-- the tables have to be rebuilt whenever the planet_osm_* tables change
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+DROP TABLE IF EXISTS transnet_station_lines, transnet_stations, transnet_lines;
+
+-- power lines with their geometry in EPSG:4326 and their end nodes
+CREATE TABLE transnet_lines AS
+  WITH lines AS (
+      SELECT l.osm_id, l.way, l.power, l.name, l.ref, l.voltage, l.cables, w.nodes, w.tags
+      FROM planet_osm_line l, planet_osm_ways w
+      WHERE l.osm_id = w.id AND l.osm_id >= 0 AND l.power ~ 'line|cable|minor_line'),
+    -- a way split into several rows by osm2pgsql is built once, all of its rows get its whole geometry as in
+    -- Transnet.lines_sql
+    line_ways AS (
+      SELECT w.id AS osm_id, w.nodes
+      FROM planet_osm_ways w
+      WHERE w.id IN (SELECT osm_id FROM lines)),
+    line_nodes AS (
+      SELECT u.osm_id, u.ordinality, u.ordinality = array_length(u.nodes, 1) AS is_last,
+        ST_SetSRID(ST_MakePoint(n.lon / 100.0, n.lat / 100.0), 3857) AS point
+      FROM (SELECT osm_id, nodes, node, ordinality
+            FROM line_ways, unnest(line_ways.nodes) WITH ORDINALITY AS w(node, ordinality)) u,
+        planet_osm_nodes n
+      WHERE n.id = u.node),
+    line_geoms AS (
+      SELECT osm_id,
+        st_makeline(array_agg(point ORDER BY ordinality)) AS geom,
+        (array_agg(point) FILTER (WHERE ordinality = 1))[1] AS first_point,
+        (array_agg(point) FILTER (WHERE is_last))[1] AS last_point
+      FROM line_nodes
+      GROUP BY osm_id)
+  SELECT l.osm_id,
+    l.way,
+    l.power,
+    l.name,
+    l.ref,
+    l.voltage,
+    l.cables,
+    l.nodes,
+    l.tags,
+    l.nodes[1] AS first_node,
+    l.nodes[array_length(l.nodes, 1)] AS last_node,
+    st_transform(g.geom, 4326) AS geom,
+    st_transform(g.first_point, 4326) AS first_node_geom,
+    st_transform(g.last_point, 4326) AS last_node_geom,
+    ST_Y(ST_Transform(ST_Centroid(l.way), 4326)) AS lat,
+    ST_X(ST_Transform(ST_Centroid(l.way), 4326)) AS lon,
+    st_length(st_transform(l.way, 4326), TRUE) AS spheric_length
+  FROM lines l LEFT JOIN line_geoms g ON g.osm_id = l.osm_id;
+
+CREATE INDEX transnet_lines_osm_id_index ON transnet_lines (osm_id);
+CREATE INDEX transnet_lines_way_index ON transnet_lines USING gist (way);
+CREATE INDEX transnet_lines_voltage_index ON transnet_lines USING gin (voltage gin_trgm_ops);
+
+-- substations and generators
+CREATE TABLE transnet_stations AS
+  SELECT DISTINCT ON (p.osm_id) p.osm_id, p.way, p.power, p.name, p.ref, p.voltage, p."plant:output:electricity",
+    p."generator:output:electricity", p.tags
+  FROM planet_osm_polygon p
+  WHERE p.osm_id >= 0 AND p.power ~ 'substation|station|sub_station|plant|generator';
+
+ALTER TABLE transnet_stations ADD PRIMARY KEY (osm_id);
+CREATE INDEX transnet_stations_way_index ON transnet_stations USING gist (way);
+
+-- stations and the lines closer than 100m to them, intersecting tells the lines connected without --closenodes -
+-- once for each station and line, also of lines split into several rows
+CREATE TABLE transnet_station_lines AS
+  SELECT p.osm_id AS station_id, l.osm_id AS line_id, bool_or(st_intersects(l.way, p.way)) AS intersecting
+  FROM transnet_lines l, transnet_stations p
+  WHERE ST_DWithin(l.way, p.way, 100) AND st_distance(l.way, p.way) < 100
+  GROUP BY p.osm_id, l.osm_id;
+
+CREATE INDEX transnet_station_lines_line_id_index ON transnet_station_lines (line_id);
+CREATE INDEX transnet_station_lines_station_id_index ON transnet_station_lines (station_id);
+
+ANALYZE transnet_lines;
+ANALYZE transnet_stations;
+ANALYZE transnet_station_lines;
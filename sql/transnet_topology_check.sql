@@ -0,0 +1,49 @@
+-- compares the tables of transnet_topology.sql with the planet_osm_* tables they are built of, as the Transnet queries
+-- read them without the tables - each query lists the rows that differ, none if the tables are up to date
+-- psql -f transnet_topology_check.sql, needs the functions of transnet_functions.sql
+
+\echo '### line rows missing from or extra in transnet_lines'
+(SELECT l.osm_id, l.way
+ FROM planet_osm_line l, planet_osm_ways w
+ WHERE l.osm_id = w.id AND l.osm_id >= 0 AND l.power ~ 'line|cable|minor_line'
+ EXCEPT ALL
+ SELECT l.osm_id, l.way
+ FROM transnet_lines l)
+UNION ALL
+(SELECT l.osm_id, l.way
+ FROM transnet_lines l
+ EXCEPT ALL
+ SELECT l.osm_id, l.way
+ FROM planet_osm_line l, planet_osm_ways w
+ WHERE l.osm_id = w.id AND l.osm_id >= 0 AND l.power ~ 'line|cable|minor_line');
+
+\echo '### lines whose geometry differs from the one built of their way'
+SELECT l.osm_id
+FROM transnet_lines l
+WHERE ST_AsEWKB(l.geom) IS DISTINCT FROM (
+        SELECT ST_AsEWKB(st_transform(st_makeline(
+                   array_agg(ST_SetSRID(ST_MakePoint(n.lon / 100.0, n.lat / 100.0), 3857) ORDER BY u.ordinality)), 4326))
+        FROM planet_osm_ways w, unnest(w.nodes) WITH ORDINALITY AS u(node, ordinality), planet_osm_nodes n
+        WHERE w.id = l.osm_id AND n.id = u.node)
+      OR ST_AsEWKB(l.first_node_geom) IS DISTINCT FROM ST_AsEWKB(st_transform(create_point(l.first_node), 4326))
+      OR ST_AsEWKB(l.last_node_geom) IS DISTINCT FROM ST_AsEWKB(st_transform(create_point(l.last_node), 4326));
+
+\echo '### station lines missing from or extra in transnet_station_lines'
+WITH station_lines AS (
+    SELECT p.osm_id AS station_id, l.osm_id AS line_id, bool_or(st_intersects(l.way, p.way)) AS intersecting
+    FROM planet_osm_line l, planet_osm_polygon p
+    WHERE l.osm_id >= 0 AND l.power ~ 'line|cable|minor_line'
+          AND p.osm_id >= 0 AND p.power ~ 'substation|station|sub_station|plant|generator'
+          AND ST_DWithin(l.way, p.way, 100) AND st_distance(l.way, p.way) < 100
+    GROUP BY p.osm_id, l.osm_id)
+(SELECT station_id, line_id, intersecting
+ FROM station_lines
+ EXCEPT ALL
+ SELECT station_id, line_id, intersecting
+ FROM transnet_station_lines)
+UNION ALL
+(SELECT station_id, line_id, intersecting
+ FROM transnet_station_lines
+ EXCEPT ALL
+ SELECT station_id, line_id, intersecting
+ FROM station_lines);
@@ -0,0 +1,85 @@
+-- refreshes the rows of the tables of transnet_topology.sql of the lines and stations an update of DiffUpdater changed,
+-- instead of rebuilding the tables - run by DiffUpdater with the update_id of the update
+
+CREATE TEMPORARY TABLE transnet_changed_ids AS
+  SELECT DISTINCT osm_id FROM transnet_changes WHERE update_id = %(update_id)s;
+
+DELETE FROM transnet_station_lines
+WHERE line_id IN (SELECT osm_id FROM transnet_changed_ids) OR station_id IN (SELECT osm_id FROM transnet_changed_ids);
+DELETE FROM transnet_lines WHERE osm_id IN (SELECT osm_id FROM transnet_changed_ids);
+DELETE FROM transnet_stations WHERE osm_id IN (SELECT osm_id FROM transnet_changed_ids);
+
+-- as in transnet_topology.sql, for the changed lines only
+INSERT INTO transnet_lines
+  WITH lines AS (
+      SELECT l.osm_id, l.way, l.power, l.name, l.ref, l.voltage, l.cables, w.nodes, w.tags
+      FROM planet_osm_line l, planet_osm_ways w
+      WHERE l.osm_id = w.id AND l.osm_id >= 0 AND l.power ~ 'line|cable|minor_line'
+        AND l.osm_id IN (SELECT osm_id FROM transnet_changed_ids)),
+    -- a way split into several rows by osm2pgsql is built once, all of its rows get its whole geometry as in
+    -- Transnet.lines_sql
+    line_ways AS (
+      SELECT w.id AS osm_id, w.nodes
+      FROM planet_osm_ways w
+      WHERE w.id IN (SELECT osm_id FROM lines)),
+    line_nodes AS (
+      SELECT u.osm_id, u.ordinality, u.ordinality = array_length(u.nodes, 1) AS is_last,
+        ST_SetSRID(ST_MakePoint(n.lon / 100.0, n.lat / 100.0), 3857) AS point
+      FROM (SELECT osm_id, nodes, node, ordinality
+            FROM line_ways, unnest(line_ways.nodes) WITH ORDINALITY AS w(node, ordinality)) u,
+        planet_osm_nodes n
+      WHERE n.id = u.node),
+    line_geoms AS (
+      SELECT osm_id,
+        st_makeline(array_agg(point ORDER BY ordinality)) AS geom,
+        (array_agg(point) FILTER (WHERE ordinality = 1))[1] AS first_point,
+        (array_agg(point) FILTER (WHERE is_last))[1] AS last_point
+      FROM line_nodes
+      GROUP BY osm_id)
+  SELECT l.osm_id,
+    l.way,
+    l.power,
+    l.name,
+    l.ref,
+    l.voltage,
+    l.cables,
+    l.nodes,
+    l.tags,
+    l.nodes[1] AS first_node,
+    l.nodes[array_length(l.nodes, 1)] AS last_node,
+    st_transform(g.geom, 4326) AS geom,
+    st_transform(g.first_point, 4326) AS first_node_geom,
+    st_transform(g.last_point, 4326) AS last_node_geom,
+    ST_Y(ST_Transform(ST_Centroid(l.way), 4326)) AS lat,
+    ST_X(ST_Transform(ST_Centroid(l.way), 4326)) AS lon,
+    st_length(st_transform(l.way, 4326), TRUE) AS spheric_length
+  FROM lines l LEFT JOIN line_geoms g ON g.osm_id = l.osm_id;
+
+-- as in transnet_topology.sql, for the changed stations only
+INSERT INTO transnet_stations
+  SELECT DISTINCT ON (p.osm_id) p.osm_id, p.way, p.power, p.name, p.ref, p.voltage, p."plant:output:electricity",
+    p."generator:output:electricity", p.tags
+  FROM planet_osm_polygon p
+  WHERE p.osm_id >= 0 AND p.power ~ 'substation|station|sub_station|plant|generator'
+    AND p.osm_id IN (SELECT osm_id FROM transnet_changed_ids);
+
+-- the changed lines with all stations closer than 100m to them and the changed stations with all lines closer than
+-- 100m to them
+INSERT INTO transnet_station_lines
+  SELECT p.osm_id AS station_id, l.osm_id AS line_id, bool_or(st_intersects(l.way, p.way)) AS intersecting
+  FROM transnet_lines l, transnet_stations p
+  WHERE l.osm_id IN (SELECT osm_id FROM transnet_changed_ids) AND ST_DWithin(l.way, p.way, 100)
+    AND st_distance(l.way, p.way) < 100
+  GROUP BY p.osm_id, l.osm_id
+  UNION
+  SELECT p.osm_id AS station_id, l.osm_id AS line_id, bool_or(st_intersects(l.way, p.way)) AS intersecting
+  FROM transnet_lines l, transnet_stations p
+  WHERE p.osm_id IN (SELECT osm_id FROM transnet_changed_ids) AND ST_DWithin(l.way, p.way, 100)
+    AND st_distance(l.way, p.way) < 100
+  GROUP BY p.osm_id, l.osm_id;
+
+DROP TABLE transnet_changed_ids;
+
+ANALYZE transnet_lines;
+ANALYZE transnet_stations;
+ANALYZE transnet_station_lines;
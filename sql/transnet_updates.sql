@@ -0,0 +1,19 @@
+-- the import and the updates applied to it since, created and written by prepare_db.sh after the import and by
+-- DiffUpdater with each update - the latest update tells the state of the import, e.g. to the snapshots of
+-- SnapshotCache, the changes of the lines and stations of each update are kept with their geometries before and
+-- after it
+
+CREATE TABLE IF NOT EXISTS transnet_updates (
+  update_id serial PRIMARY KEY,
+  change_file text,
+  applied_at timestamp with time zone DEFAULT now());
+
+CREATE TABLE IF NOT EXISTS transnet_changes (
+  update_id integer REFERENCES transnet_updates,
+  osm_id bigint,
+  kind text,
+  action text,
+  old_way geometry(Geometry, 3857),
+  new_way geometry(Geometry, 3857));
+
+CREATE INDEX IF NOT EXISTS transnet_changes_update_id_index ON transnet_changes (update_id);